@@ -0,0 +1,73 @@
+"""
+Benchmark: model calls per article and end-to-end generation time for the news
+pipeline, against local/fake_inference_server.py with simulated model latency.
+
+Compares the original serial article-then-headline calls, the concurrent
+separate-call mode and the combined headline+article mode:
+
+    python benchmarks/bench_news_generation.py --latency 1.0 --articles 3 --runs 5
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda_functions', 'shared'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda_functions', 'news_generator'))
+sys.path.insert(0, os.path.join(ROOT, 'local'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+
+import fake_inference_server  # noqa: E402
+
+
+def run_mode(news_generator, news_inference, plans, mode, workers, runs):
+    """Average (seconds, calls per article, fallback pieces) over runs."""
+    news_inference.MAX_WORKERS = workers
+    handler = fake_inference_server.FakeInferenceHandler
+    elapsed = calls = fallbacks = 0
+
+    for _ in range(runs):
+        start_count = handler.request_count
+        start = time.perf_counter()
+        articles = news_generator.generate_news(plans, 'hf_fake', time.monotonic() + 60, mode=mode)
+        elapsed += time.perf_counter() - start
+        calls += handler.request_count - start_count
+        for plan, article in zip(plans, articles):
+            fallbacks += (article['headline'] == plan['fallback_headline']) + (article['article'] == plan['fallback_article'])
+
+    return elapsed / runs, calls / (runs * len(plans)), fallbacks / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='News generation benchmark')
+    parser.add_argument('--latency', type=float, default=1.0, help='mean seconds per model call')
+    parser.add_argument('--articles', type=int, default=3)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    server = fake_inference_server.start_server(latency=args.latency)
+    os.environ['HUGGINGFACE_BASE_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+
+    import news_generator
+    import news_inference
+
+    movements = [{'symbol': 'EURUSD=X', 'future_change_percent': 0.4}]
+    planners = list(news_generator.NEWS_PLANNERS.values())
+    plans = [planners[i % len(planners)](movements) for i in range(args.articles)]
+
+    print(f"{args.articles} articles, {args.latency}s mean model latency, {args.runs} runs")
+    print(f"{'mode':<28} {'run time':>10} {'calls/article':>14} {'fallbacks':>10}")
+    for label, mode, workers in [
+        ('serial, separate calls', 'separate', 1),
+        ('concurrent, separate calls', 'separate', news_inference.MAX_WORKERS),
+        ('concurrent, combined call', 'combined', news_inference.MAX_WORKERS)
+    ]:
+        seconds, calls, fallbacks = run_mode(news_generator, news_inference, plans, mode, workers, args.runs)
+        print(f"{label:<28} {seconds:>9.2f}s {calls:>14.1f} {fallbacks:>10.1f}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Microbenchmark: pricing every symbol at the current second, as the handlers
+used to (utcnow minute arithmetic and a walk of the JSON window's per-second
+records), per symbol with PriceWindow.price_at, and with the batched
+PriceLookup.prices.
+
+    python benchmarks/bench_price_lookup.py --symbols 12 --lookups 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions', 'shared'))
+
+from price_lookup import PriceLookup, second_at  # noqa: E402
+from price_window_format import PriceWindow, encode_price_window  # noqa: E402
+
+
+def make_window(symbols, start_timestamp, num_seconds=600, seed=42):
+    """A simulated window dict in the latest_simulated_1sec.json shape."""
+    rng = random.Random(seed)
+    assets = {}
+    for symbol in symbols:
+        price = rng.uniform(0.5, 200)
+        prices = []
+        for _ in range(num_seconds):
+            price *= 1 + rng.gauss(0, 0.0005)
+            prices.append(round(price, 4))
+        assets[symbol] = {
+            'seconds': [
+                {'second': i, 'timestamp': start_timestamp + i, 'price': p}
+                for i, p in enumerate(prices)
+            ],
+            'start_price': prices[0],
+            'end_price': prices[-1],
+            'period_high': max(prices),
+            'period_low': min(prices),
+            'period_change': prices[-1] - prices[0],
+            'period_change_percent': (prices[-1] - prices[0]) / prices[0] * 100
+        }
+    return {
+        'timestamp': start_timestamp,
+        'datetime': datetime.utcfromtimestamp(start_timestamp).isoformat(),
+        'start_timestamp': start_timestamp,
+        'end_timestamp': start_timestamp + num_seconds,
+        'resolution': '1sec',
+        'assets': assets
+    }
+
+
+def legacy_prices(simulated_data):
+    """The per-handler lookup the shared helper replaces."""
+    current_time = datetime.utcnow()
+    current_second = ((current_time.minute % 10) * 60) + current_time.second
+    prices = {}
+    for symbol, asset_data in simulated_data['assets'].items():
+        seconds = asset_data['seconds']
+        if current_second < len(seconds):
+            prices[symbol] = seconds[current_second]['price']
+        else:
+            prices[symbol] = seconds[-1]['price']
+    return prices
+
+
+def per_symbol_prices(window):
+    second = second_at(window, time.time())
+    return {symbol: window.price_at(symbol, second) for symbol in window.symbols}
+
+
+def timed(label, func, lookups, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(lookups):
+            result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {best / lookups * 1e6:8.2f} us/lookup")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Price lookup microbenchmark')
+    parser.add_argument('--symbols', type=int, default=12)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    simulated_data = make_window([f'SYM{i}' for i in range(args.symbols)], now // 600 * 600)
+    window_json = json.dumps(simulated_data)
+    window_bytes = encode_price_window(simulated_data)
+    print(f"{args.symbols} symbols, JSON window {len(window_json)} bytes, TQPW window {len(window_bytes)} bytes")
+
+    start = time.perf_counter()
+    parsed = json.loads(window_json)
+    print(f"{'parse JSON window':<34} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    start = time.perf_counter()
+    window = PriceWindow(window_bytes)
+    print(f"{'open TQPW window':<34} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    start = time.perf_counter()
+    lookup = PriceLookup(window)
+    print(f"{'build PriceLookup':<34} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    legacy, legacy_time = timed('legacy JSON records', lambda: legacy_prices(parsed), args.lookups, args.repeat)
+    timed('PriceWindow.price_at per symbol', lambda: per_symbol_prices(window), args.lookups, args.repeat)
+    batched, batched_time = timed('PriceLookup.prices (batched)', lambda: lookup.prices(), args.lookups, args.repeat)
+
+    # Compared in the same second so both read the same index
+    agree = legacy_prices(parsed) == lookup.prices()
+    print(f"speedup: {legacy_time / batched_time:.1f}x, same prices: {agree}")
+
+
+if __name__ == '__main__':
+    main()
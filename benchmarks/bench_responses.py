@@ -0,0 +1,123 @@
+"""
+Microbenchmark: building an API response for a leaderboard-sized payload of
+DynamoDB Decimals, as the handlers used to (float() per field, json.dumps)
+and through http_responses (Decimals as exact fixed-point, orjson when
+installed), plus what ETag hashing and gzip/br compression add per request.
+
+    python benchmarks/bench_responses.py --entries 100 --requests 2000
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions', 'shared'))
+
+import http_responses  # noqa: E402
+
+
+def make_items(entries, seed=42):
+    """Leaderboard items as the low-level client deserializes them."""
+    rng = random.Random(seed)
+    items = []
+    for rank in range(1, entries + 1):
+        balance = Decimal(str(round(rng.uniform(0, 100000), 2)))
+        portfolio_value = Decimal(str(round(rng.uniform(0, 100000), 6)))
+        total_value = balance + portfolio_value
+        profit_loss = total_value - Decimal('100000')
+        items.append({
+            'user_id': f'user-{rank:08d}',
+            'username': f'trader{rank}',
+            'total_value': total_value,
+            'profit_loss': profit_loss,
+            'profit_loss_percent': profit_loss / Decimal('100000') * 100,
+            'total_trades': Decimal(rng.randint(0, 500)),
+            'balance': balance,
+            'portfolio_value': portfolio_value,
+            'rank': Decimal(rank)
+        })
+    return items
+
+
+def legacy_response(items):
+    entries = [
+        {
+            'user_id': item['user_id'],
+            'username': item['username'],
+            'total_value': float(item['total_value']),
+            'profit_loss': float(item['profit_loss']),
+            'profit_loss_percent': float(item['profit_loss_percent']),
+            'total_trades': int(item['total_trades']),
+            'balance': float(item['balance']),
+            'portfolio_value': float(item['portfolio_value']),
+            'rank': int(item['rank'])
+        }
+        for item in items
+    ]
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'success': True, 'data': {'leaderboard': entries}})
+    }
+
+
+def payload(items):
+    entries = [
+        dict(item, total_trades=int(item['total_trades']), rank=int(item['rank']))
+        for item in items
+    ]
+    return {'success': True, 'data': {'leaderboard': entries}}
+
+
+def timed(label, func, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = func()
+    elapsed = time.perf_counter() - start
+    body = response['body']
+    size = len(base64.b64decode(body)) if response.get('isBase64Encoded') else len(body.encode('utf-8'))
+    print(f"{label:<40} {elapsed / requests * 1e6:9.1f} us/request {size:8d} bytes")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API response serialization microbenchmark')
+    parser.add_argument('--entries', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    items = make_items(args.entries)
+    orjson = http_responses.orjson
+    print(f"{args.entries} entries; orjson {orjson.__version__ if orjson else 'not installed'}, "
+          f"brotli {'installed' if http_responses.brotli else 'not installed'}")
+
+    plain = {'headers': {}}
+    gzip_event = {'headers': {'accept-encoding': 'gzip'}}
+    br_event = {'headers': {'accept-encoding': 'gzip, deflate, br'}}
+
+    legacy = timed('legacy float() + json.dumps', lambda: legacy_response(items), args.requests)
+    timed('json_response, identity', lambda: http_responses.json_response(plain, payload(items)), args.requests)
+
+    # Distinct bodies defeat the compressed-body cache, as per-user responses would
+    def fresh(event):
+        items[0]['balance'] += 1
+        return http_responses.json_response(event, payload(items))
+
+    timed('json_response, gzip (per-user body)', lambda: fresh(gzip_event), args.requests)
+    if http_responses.brotli:
+        timed('json_response, br (per-user body)', lambda: fresh(br_event), args.requests)
+    shared = timed('json_response, gzip (shared body)', lambda: http_responses.json_response(gzip_event, payload(items)), args.requests)
+
+    response = http_responses.json_response(plain, payload(items))
+    revalidate = {'headers': {'if-none-match': response['headers']['ETag']}}
+    timed('json_response, If-None-Match hit', lambda: http_responses.json_response(revalidate, payload(items)), args.requests)
+
+    print(f"shared gzip body vs legacy: {legacy / shared:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
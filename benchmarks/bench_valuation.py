@@ -0,0 +1,93 @@
+"""
+Microbenchmark: per-position Decimal loop (as the leaderboard used to revalue
+users) versus the vectorized batch_portfolio_values pass, plus the per-position
+figures (value, cost basis, P/L) from batch_position_values checked against the
+exact value_portfolio path.
+
+Both batch functions convert every quantity and average price from Decimal to
+float in a Python loop, and that conversion is most of their time, so expect a
+speedup of about 2x over the legacy loop rather than orders of magnitude.
+
+    python benchmarks/bench_valuation.py --users 100000 --symbols 6
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions', 'shared'))
+
+from valuation import batch_portfolio_values, batch_position_values, value_portfolio  # noqa: E402
+
+
+def make_portfolios(users, symbols, max_positions, seed=42):
+    rng = random.Random(seed)
+    portfolios = []
+    for _ in range(users):
+        held = rng.sample(symbols, rng.randint(0, min(max_positions, len(symbols))))
+        portfolios.append({
+            symbol: {
+                'quantity': Decimal(rng.randint(1, 1000)),
+                'avg_price': Decimal(str(round(rng.uniform(0.5, 200), 4)))
+            }
+            for symbol in held
+        })
+    return portfolios
+
+
+def legacy_loop(portfolios, prices):
+    """The per-handler loop the shared valuation module replaces."""
+    values = []
+    for portfolio in portfolios:
+        portfolio_value = Decimal('0')
+        for symbol, holding in portfolio.items():
+            if symbol in prices:
+                current_price = Decimal(str(prices[symbol]))
+                quantity = Decimal(str(holding['quantity']))
+                portfolio_value += current_price * quantity
+        values.append(portfolio_value)
+    return values
+
+
+def timed(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<32} {best * 1000:10.2f} ms")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Portfolio valuation microbenchmark')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--symbols', type=int, default=6)
+    parser.add_argument('--max-positions', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    symbols = [f'SYM{i}' for i in range(args.symbols)]
+    prices = {symbol: round(random.uniform(0.5, 200), 4) for symbol in symbols}
+    portfolios = make_portfolios(args.users, symbols, args.max_positions)
+    positions = sum(len(p) for p in portfolios)
+
+    print(f"{args.users} portfolios, {positions} positions, {args.symbols} symbols")
+    legacy, legacy_time = timed('legacy Decimal loop', lambda: legacy_loop(portfolios, prices), args.repeat)
+    (batch, _), batch_time = timed('batch_portfolio_values', lambda: batch_portfolio_values(portfolios, prices), args.repeat)
+    batch_positions, _ = timed('batch_position_values', lambda: batch_position_values(portfolios, prices), args.repeat)
+    exact, _ = timed('value_portfolio (exact, top 100)', lambda: [value_portfolio(p, prices) for p in portfolios[:100]], args.repeat)
+
+    max_error = max((abs(float(a) - b) for a, b in zip(legacy, batch.tolist())), default=0.0)
+    print(f"speedup: {legacy_time / batch_time:.1f}x, max abs difference: {max_error:.2e}")
+
+    exact_pl = [float(position['profit_loss']) for positions, _, _ in exact for position in positions]
+    batch_pl = batch_positions['profit_loss'][:len(exact_pl)].tolist()
+    pl_error = max((abs(a - b) for a, b in zip(exact_pl, batch_pl)), default=0.0)
+    print(f"per-position P/L max abs difference (top 100): {pl_error:.2e}")
+
+
+if __name__ == '__main__':
+    main()
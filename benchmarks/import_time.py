@@ -0,0 +1,153 @@
+"""
+Cold-start import time of every Lambda handler, measured the way the runtime
+pays it: a fresh interpreter importing the handler module with the function's
+directory and shared/ on the path, timed with `python -X importtime`.
+
+Reports the median cumulative import time per handler over --runs fresh
+processes and the heaviest top-level imports, and exits non-zero when a
+handler goes over its budget in IMPORT_BUDGET_MS, so regressions show up
+before they reach a cold start. AWS clients are built on first use
+(shared/aws_clients.py), so that cost is reported separately: the time to
+then build every module-level client the handler holds, which the first
+invocation that needs them pays:
+
+    python benchmarks/import_time.py --runs 5
+    python benchmarks/import_time.py --handler news_generator --top 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FUNCTIONS = os.path.join(ROOT, 'lambda_functions')
+SHARED = os.path.join(FUNCTIONS, 'shared')
+
+# Milliseconds of module import each handler may spend, with headroom over the
+# measured medians. None of them imports boto3 at module load (~150 ms): the
+# DynamoDB types and condition builders are imported on first use as well.
+IMPORT_BUDGET_MS = {
+    'api_execute_trade': 75,
+    'api_get_leaderboard': 75,
+    'api_get_news': 75,
+    'api_get_portfolio': 75,
+    'api_get_prices': 75,
+    'api_get_trades': 75,
+    'leaderboard_builder': 75,
+    'news_generator': 75,
+    'price_collector': 200,
+    'price_simulator': 150,
+    'session_checker': 75,
+    'ws_price_stream': 75,
+}
+
+# Run in the fresh interpreter after the timed import: build the LazyClients
+# held by any loaded module and print how long that took
+BUILD_CLIENTS = """
+import sys, time
+import aws_clients
+started = time.perf_counter()
+for module in list(sys.modules.values()):
+    for value in list(getattr(module, '__dict__', {}).values()):
+        if isinstance(value, aws_clients.LazyClient):
+            value.meta
+print((time.perf_counter() - started) * 1000)
+"""
+
+# The handlers read these at call time only, but give imports a realistic environment
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+}
+
+
+def handlers():
+    return sorted(
+        name for name in os.listdir(FUNCTIONS)
+        if os.path.isfile(os.path.join(FUNCTIONS, name, f'{name}.py'))
+    )
+
+
+def parse_importtime(stderr):
+    """
+    (module, self_us, cumulative_us, depth) for each line of -X importtime
+    output, in the order Python prints them: a module after everything it imported.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        depth = (len(module) - len(module.lstrip(' ')) - 1) // 2
+        entries.append((module.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def direct_imports(entries, name):
+    """The entries for the modules the handler module imported itself."""
+    position = max(i for i, entry in enumerate(entries) if entry[0] == name and entry[3] == 0)
+    children = []
+    for entry in reversed(entries[:position]):
+        if entry[3] == 0:
+            break
+        if entry[3] == 1:
+            children.append(entry)
+    return children
+
+
+def measure(name):
+    """One fresh-interpreter import of a handler: (import_ms, clients_ms, direct imports)."""
+    env = dict(os.environ, **ENVIRONMENT)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join(FUNCTIONS, name), SHARED])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {name}\n{BUILD_CLIENTS}'],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = parse_importtime(result.stderr)
+    total = next(cumulative for module, _, cumulative, depth in reversed(entries) if module == name and depth == 0)
+    return total / 1000, float(result.stdout.strip().splitlines()[-1]), direct_imports(entries, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Handler import-time budget check')
+    parser.add_argument('--handler', action='append', help='Only these handlers (repeatable)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=3, help='Heaviest imports to list per handler')
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'handler':<22} {'import ms':>10} {'budget':>8} {'+clients':>9}  heaviest imports (cumulative ms)")
+
+    for name in args.handler or handlers():
+        try:
+            samples = [measure(name) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<22} {'failed':>10}  {e}")
+            over_budget.append(name)
+            continue
+
+        median = statistics.median(total for total, _, _ in samples)
+        clients = statistics.median(clients for _, clients, _ in samples)
+        # Heaviest direct imports, from the run closest to the median
+        _, _, imports = min(samples, key=lambda sample: abs(sample[0] - median))
+        heaviest = sorted(imports, key=lambda entry: entry[2], reverse=True)[:args.top]
+        budget = IMPORT_BUDGET_MS.get(name)
+        if budget is not None and median > budget:
+            over_budget.append(name)
+
+        listed = ', '.join(f"{module} {cumulative / 1000:.0f}" for module, _, cumulative, _ in heaviest)
+        flag = '  OVER' if name in over_budget else ''
+        print(f"{name:<22} {median:10.1f} {budget or '-':>8} {clients:9.1f}  {listed}{flag}")
+
+    if over_budget:
+        print(f"over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
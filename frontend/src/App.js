@@ -1,6 +1,8 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { LogOut } from 'lucide-react';
 import { useAuth } from './hooks/useAuth';
+import { usePriceStream } from './hooks/usePriceStream';
+import { usePriceWindow } from './hooks/usePriceWindow';
 import { API_BASE_URL } from './config';
 import AuthContainer from './components/Auth/AuthContainer';
 import MarketPrices from './components/Dashboard/MarketPrices';
@@ -11,9 +13,16 @@ import TradeModal from './components/Dashboard/TradeModal';
 
 function App() {
     const { user, loading: authLoading, signIn, signUp, confirmSignUp, signOut } = useAuth();
-    const [prices, setPrices] = useState({});
+    const [polledPrices, setPrices] = useState({});
+    // Streamed prices when the WebSocket is configured and has a window, else a
+    // locally played back window from /prices?mode=window, else polled per second
+    const streamedPrices = usePriceStream();
+    const playedPrices = usePriceWindow(streamedPrices === null);
+    const prices = streamedPrices || playedPrices || polledPrices;
+    const streaming = streamedPrices !== null || playedPrices !== null;
     const [portfolioData, setPortfolioData] = useState(null);
     const [news, setNews] = useState([]);
+    const newsCursor = useRef(null);
     const [leaderboard, setLeaderboard] = useState([]);
     const [tradeModal, setTradeModal] = useState({ isOpen: false, asset: null });
 
@@ -46,19 +55,21 @@ function App() {
     }, [user, loadUserData]);
 
     useEffect(() => {
-        refreshPrices();
         refreshNews();
         refreshLeaderboard();
 
-        const pricesInterval = setInterval(refreshPrices, 1000);
         const newsInterval = setInterval(refreshNews, 10000);
-
-        return () => {
-            clearInterval(pricesInterval);
-            clearInterval(newsInterval);
-        };
+        return () => clearInterval(newsInterval);
     }, []);
 
+    useEffect(() => {
+        if (streaming) return undefined;
+
+        refreshPrices();
+        const pricesInterval = setInterval(refreshPrices, 1000);
+        return () => clearInterval(pricesInterval);
+    }, [streaming]);
+
     const refreshPrices = async () => {
         try {
             const response = await fetch(`${API_BASE_URL}/prices`);
@@ -72,13 +83,27 @@ function App() {
         }
     };
 
+    // Only articles newer than the cursor are fetched; they are merged into the list
     const refreshNews = async () => {
         try {
-            const response = await fetch(`${API_BASE_URL}/news`);
+            const since = newsCursor.current ? `?since=${newsCursor.current}` : '';
+            const response = await fetch(`${API_BASE_URL}/news${since}`);
             const result = await response.json();
 
             if (result.success) {
-                setNews(result.data.articles);
+                newsCursor.current = result.data.cursor;
+                const now = Math.floor(Date.now() / 1000);
+
+                setNews(current => {
+                    if (!since) return result.data.articles;
+
+                    const seen = new Set(result.data.articles.map(article => article.id));
+                    const kept = current.filter(article =>
+                        !seen.has(article.id) && (article.valid_until || now) >= now
+                    );
+                    if (!result.data.changed && kept.length === current.length) return current;
+                    return [...result.data.articles, ...kept];
+                });
             }
         } catch (error) {
             console.error('Error fetching news:', error);
@@ -13,3 +13,6 @@ export const AWS_CONFIG = {
         responseType: 'code'
     }
 };
+
+// WebSocket price stream (terraform output price_stream_url); empty falls back to polling /prices
+export const PRICE_STREAM_URL = process.env.REACT_APP_PRICE_STREAM_URL || '';
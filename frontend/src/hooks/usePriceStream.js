@@ -0,0 +1,79 @@
+import { useState, useEffect } from 'react';
+import { PRICE_STREAM_URL } from '../config';
+import { pricesAt } from './usePriceWindow';
+
+const RECONNECT_DELAY_MS = 3000;
+// While the held window has ended (the next simulation may be late), ask again this often
+const RESUBSCRIBE_SECONDS = 5;
+
+// Subscribes to the WebSocket price stream and plays the current window back
+// locally once a second. Returns null until a window has arrived, or always when
+// no stream URL is configured, so callers can fall back to polling /prices.
+export const usePriceStream = () => {
+    const [prices, setPrices] = useState(null);
+
+    useEffect(() => {
+        if (!PRICE_STREAM_URL) return undefined;
+
+        let socket = null;
+        let closed = false;
+        let reconnectTimer = null;
+        let priceWindow = null;
+        let pending = null;
+        let lastSubscribe = 0;
+
+        const subscribe = () => {
+            lastSubscribe = Math.floor(Date.now() / 1000);
+            if (socket && socket.readyState === WebSocket.OPEN) {
+                socket.send(JSON.stringify({ action: 'subscribe' }));
+            }
+        };
+
+        const onMessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type !== 'window') return;
+
+            const chunk = message.window;
+            if (!pending || pending.start_timestamp !== chunk.start_timestamp) {
+                pending = { ...chunk, symbols: {}, received: 0 };
+            }
+            Object.assign(pending.symbols, chunk.symbols);
+            pending.received += 1;
+
+            if (pending.received === message.chunks) {
+                priceWindow = pending;
+                pending = null;
+            }
+        };
+
+        const connect = () => {
+            socket = new WebSocket(PRICE_STREAM_URL);
+            socket.onopen = subscribe;
+            socket.onmessage = onMessage;
+            socket.onclose = () => {
+                if (!closed) reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+            };
+        };
+
+        const tick = () => {
+            if (!priceWindow) return;
+            const now = Math.floor(Date.now() / 1000);
+            if (now >= priceWindow.end_timestamp && now - lastSubscribe >= RESUBSCRIBE_SECONDS) {
+                subscribe();
+            }
+            setPrices(pricesAt(priceWindow, now));
+        };
+
+        connect();
+        const tickInterval = setInterval(tick, 1000);
+
+        return () => {
+            closed = true;
+            clearInterval(tickInterval);
+            clearTimeout(reconnectTimer);
+            if (socket) socket.close();
+        };
+    }, []);
+
+    return prices;
+};
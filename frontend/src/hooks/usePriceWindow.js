@@ -0,0 +1,111 @@
+import { useState, useEffect } from 'react';
+import { API_BASE_URL } from '../config';
+
+// While the held window has ended (the next simulation may be late), retry this often
+const RETRY_SECONDS = 5;
+// While the held window has no next window yet, ask again this often (the
+// server caches that response for as long)
+const NEXT_WINDOW_RETRY_SECONDS = 30;
+
+// Same shape as the /prices response, for second t of a window payload
+export const pricesAt = (priceWindow, nowSeconds) => {
+    const second = Math.min(Math.max(nowSeconds - priceWindow.start_timestamp, 0), priceWindow.num_seconds - 1);
+    const prices = {};
+
+    priceWindow.missing.forEach((symbol) => {
+        prices[symbol] = { error: 'No data available', current: null };
+    });
+
+    Object.entries(priceWindow.symbols).forEach(([symbol, data]) => {
+        prices[symbol] = {
+            current: data.prices[second],
+            timestamp: priceWindow.start_timestamp + second,
+            second,
+            period_high: data.period_high,
+            period_low: data.period_low,
+            hour_start: data.start_price,
+            hour_projected_end: data.end_price,
+            period_change_percent: data.period_change_percent
+        };
+    });
+
+    return prices;
+};
+
+// Downloads the whole current window from /prices?mode=window and plays it back
+// locally once a second, keyed on server time (local clock plus the offset seen
+// in the X-Server-Time header of the first response). The response also carries the next window once it
+// exists; playback moves on to it when the held window ends and fetches again
+// for the one after. Until the next window has arrived it is asked for every
+// NEXT_WINDOW_RETRY_SECONDS.
+// Returns null until a window has arrived or while disabled, so callers can
+// fall back to polling /prices.
+export const usePriceWindow = (enabled = true) => {
+    const [prices, setPrices] = useState(null);
+
+    useEffect(() => {
+        if (!enabled) {
+            setPrices(null);
+            return undefined;
+        }
+
+        let priceWindow = null;
+        let nextWindow = null;
+        let offset = null;
+        let nextFetch = 0;
+        let fetching = false;
+
+        const serverNow = () => Date.now() / 1000 + (offset || 0);
+
+        const fetchWindow = async () => {
+            fetching = true;
+            try {
+                const requested = Date.now() / 1000;
+                // The first response sets the clock offset, so it must not come from a cache
+                const response = await fetch(`${API_BASE_URL}/prices?mode=window`, {
+                    cache: offset === null ? 'no-store' : 'default'
+                });
+                const result = await response.json();
+
+                if (result.success) {
+                    const serverTime = parseFloat(response.headers.get('X-Server-Time'));
+                    if (offset === null && !Number.isNaN(serverTime)) {
+                        const received = Date.now() / 1000;
+                        offset = serverTime - (requested + received) / 2;
+                    }
+                    priceWindow = result.data.window;
+                    nextWindow = result.data.next_window || null;
+                }
+            } catch (error) {
+                console.error('Error fetching price window:', error);
+            } finally {
+                fetching = false;
+            }
+
+            const now = serverNow();
+            if (!priceWindow || now >= priceWindow.end_timestamp) {
+                nextFetch = now + RETRY_SECONDS;
+            } else if (nextWindow) {
+                nextFetch = priceWindow.end_timestamp;
+            } else {
+                nextFetch = Math.min(now + NEXT_WINDOW_RETRY_SECONDS, priceWindow.end_timestamp);
+            }
+        };
+
+        const tick = () => {
+            const now = serverNow();
+            if (priceWindow && nextWindow && now >= nextWindow.start_timestamp) {
+                priceWindow = nextWindow;
+                nextWindow = null;
+            }
+            if (!fetching && now >= nextFetch) fetchWindow();
+            if (priceWindow) setPrices(pricesAt(priceWindow, Math.floor(now)));
+        };
+
+        tick();
+        const tickInterval = setInterval(tick, 1000);
+        return () => clearInterval(tickInterval);
+    }, [enabled]);
+
+    return prices;
+};
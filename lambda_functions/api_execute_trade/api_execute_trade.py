@@ -1,14 +1,17 @@
 import json
 import os
-import boto3
+import aws_clients
+import metrics
+import market_data_cache
+import trade_engine
+from price_lookup import lookup_for
+from http_responses import error_response, json_response
 from decimal import Decimal
-import time
-import uuid
 import base64
 
-dynamodb = boto3.resource('dynamodb')
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
+@metrics.instrument('api_execute_trade')
 def lambda_handler(event, context):
     """
     This will be the API endpoint we use to execute buy/sell trades.
@@ -17,9 +20,6 @@ def lambda_handler(event, context):
     trades_table_name = os.environ['TRADES_TABLE']
     market_data_bucket = os.environ['MARKET_DATA_BUCKET']
 
-    users_table = dynamodb.Table(users_table_name)
-    trades_table = dynamodb.Table(trades_table_name)
-
     try:
         username = None
         auth_header = event.get('headers', {}).get('Authorization', '') or event.get('headers', {}).get('authorization', '')
@@ -45,6 +45,10 @@ def lambda_handler(event, context):
 
         body = json.loads(event.get('body', '{}'))
         user_id = body.get('user_id')
+
+        if 'orders' in body:
+            return execute_batch(event, body, user_id, username, users_table_name, trades_table_name, market_data_bucket)
+
         symbol = body.get('symbol')
         action = body.get('action')  
         quantity = int(body.get('quantity', 0))
@@ -59,154 +63,125 @@ def lambda_handler(event, context):
             return error_response(400, 'Quantity must be positive')
 
         try:
-            response = s3_client.get_object(
-                Bucket=market_data_bucket,
-                Key='simulated_data/latest_simulated_1sec.json'
-            )
-            simulated_data = json.loads(response['Body'].read().decode('utf-8'))
-
-            from datetime import datetime
-            current_time = datetime.utcnow()
-            current_second = ((current_time.minute % 10) * 60) + current_time.second 
-
-            if symbol not in simulated_data['assets'] or simulated_data['assets'][symbol] is None:
-                return error_response(404, f'Symbol {symbol} not found or unavailable')
-
-            asset_data = simulated_data['assets'][symbol]
-
-            if 'seconds' in asset_data and current_second < len(asset_data['seconds']):
-                current_price = Decimal(str(asset_data['seconds'][current_second]['price']))
-            else:
-                current_price = Decimal(str(asset_data['seconds'][-1]['price']))
+            prices = current_prices(market_data_bucket, [symbol])
+        except KeyError:
+            return error_response(404, f'Symbol {symbol} not found or unavailable')
         except Exception as e:
             return error_response(500, f'Error fetching price data: {str(e)}')
 
-        try:
-            user_response = users_table.get_item(Key={'user_id': user_id})
-
-            if 'Item' not in user_response:
-                user_data = {
-                    'user_id': user_id,
-                    'username': username if username else user_id[:8],  
-                    'balance': Decimal('100000'),  
-                    'portfolio': {},
-                    'total_trades': 0,
-                    'total_profit_loss': Decimal('0')
-                }
-                users_table.put_item(Item=user_data)
-            else:
-                user_data = user_response['Item']
-                if username and 'username' not in user_data:
-                    user_data['username'] = username
+        current_price = prices[symbol]
 
+        try:
+            trade_record, new_balance = trade_engine.execute_trade(
+                users_table_name, trades_table_name, user_id,
+                symbol, action, quantity, current_price, username
+            )
+        except trade_engine.TradeRejected as e:
+            return error_response(400, str(e))
+        except trade_engine.TradeConflict as e:
+            return error_response(409, str(e))
         except Exception as e:
-            return error_response(500, f'Error fetching user data: {str(e)}')
+            return error_response(500, f'Error executing trade: {str(e)}')
+
+        trade_value = trade_record['total_value']
+
+        return json_response(event, {
+            'success': True,
+            'message': f'Trade executed successfully: {action.upper()} {quantity} shares of {symbol}',
+            'trade': {
+                'trade_id': trade_record['trade_id'],
+                'symbol': symbol,
+                'action': action,
+                'quantity': quantity,
+                'price': float(current_price),
+                'total_value': float(trade_value),
+                'new_balance': float(new_balance)
+            }
+        }, methods='POST, OPTIONS')
 
-        trade_value = current_price * Decimal(str(quantity))
-
-        # Execute trade logic
-        if action == 'buy':
-            if user_data['balance'] < trade_value:
-                return error_response(400, f'Insufficient balance. Required: ${float(trade_value):.2f}, Available: ${float(user_data["balance"]):.2f}')
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return error_response(500, f'Internal server error: {str(e)}')
 
-            user_data['balance'] -= trade_value
 
-            portfolio = user_data.get('portfolio', {})
-            if symbol in portfolio:
-                portfolio[symbol] = {
-                    'quantity': int(portfolio[symbol].get('quantity', 0)) + quantity,
-                    'avg_price': ((Decimal(str(portfolio[symbol].get('avg_price', 0))) * Decimal(str(portfolio[symbol].get('quantity', 0))) + trade_value) /
-                                  (Decimal(str(portfolio[symbol].get('quantity', 0))) + Decimal(str(quantity))))
-                }
-            else:
-                portfolio[symbol] = {
-                    'quantity': quantity,
-                    'avg_price': current_price
-                }
-            user_data['portfolio'] = portfolio
+def current_prices(market_data_bucket, symbols):
+    """
+    Prices of symbols at the current second, all read from one snapshot of the
+    price window. Raises KeyError for a symbol that is not in the window.
+    """
+    window = market_data_cache.get_price_window(s3_client, market_data_bucket)
+    prices = lookup_for(window).prices(symbols)
+    return {symbol: Decimal(str(price)) for symbol, price in prices.items()}
 
-        elif action == 'sell':
-            portfolio = user_data.get('portfolio', {})
-            if symbol not in portfolio or portfolio[symbol]['quantity'] < quantity:
-                available = portfolio.get(symbol, {}).get('quantity', 0)
-                return error_response(400, f'Insufficient shares. Required: {quantity}, Available: {available}')
 
-            user_data['balance'] += trade_value
+def execute_batch(event, body, user_id, username, users_table_name, trades_table_name, market_data_bucket):
+    """
+    Batch order mode: {"user_id": ..., "orders": [{"symbol", "action", "quantity"}, ...]}.
+    All orders are priced at the same second, validated in order against the
+    running balance and committed together, or not at all.
+    """
+    orders = body.get('orders')
 
-            portfolio[symbol]['quantity'] -= quantity
-            if portfolio[symbol]['quantity'] == 0:
-                del portfolio[symbol]
+    if not user_id or not isinstance(orders, list) or not orders:
+        return error_response(400, 'Missing required fields: user_id, orders')
 
-            user_data['portfolio'] = portfolio
+    if len(orders) > trade_engine.MAX_ORDERS:
+        return error_response(400, f'At most {trade_engine.MAX_ORDERS} orders can be submitted at once')
 
-        user_data['total_trades'] = int(user_data.get('total_trades', 0)) + 1
+    parsed_orders = []
+    for number, order in enumerate(orders, start=1):
+        if not isinstance(order, dict):
+            return error_response(400, f'Order {number}: must be an object with symbol, action, quantity')
 
+        symbol = order.get('symbol')
+        action = order.get('action')
         try:
-            users_table.put_item(Item=user_data)
-        except Exception as e:
-            return error_response(500, f'Error updating user data: {str(e)}')
-
-        trade_record = {
-            'trade_id': str(uuid.uuid4()),
-            'user_id': user_id,
-            'timestamp': int(time.time()),
-            'symbol': symbol,
-            'action': action,
-            'quantity': quantity,
-            'price': current_price,
-            'total_value': trade_value
-        }
+            quantity = int(order.get('quantity', 0))
+        except (TypeError, ValueError):
+            return error_response(400, f'Order {number}: quantity must be a whole number')
 
-        try:
-            trades_table.put_item(Item=trade_record)
-        except Exception as e:
-            print(f"Warning: Failed to record trade: {str(e)}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS'
-            },
-            'body': json.dumps({
-                'success': True,
-                'message': f'Trade executed successfully: {action.upper()} {quantity} shares of {symbol}',
-                'trade': {
-                    'trade_id': trade_record['trade_id'],
-                    'symbol': symbol,
-                    'action': action,
-                    'quantity': quantity,
-                    'price': float(current_price),
-                    'total_value': float(trade_value),
-                    'new_balance': float(user_data['balance'])
-                }
-            }, default=decimal_default)
-        }
+        if not all([symbol, action, quantity]):
+            return error_response(400, f'Order {number}: missing required fields: symbol, action, quantity')
 
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return error_response(500, f'Internal server error: {str(e)}')
+        if action not in ['buy', 'sell']:
+            return error_response(400, f'Order {number}: action must be either "buy" or "sell"')
+
+        if quantity <= 0:
+            return error_response(400, f'Order {number}: quantity must be positive')
+
+        parsed_orders.append((symbol, action, quantity))
 
+    try:
+        prices = current_prices(market_data_bucket, {symbol for symbol, _, _ in parsed_orders})
+    except KeyError as e:
+        return error_response(404, f'Symbol {e.args[0]} not found or unavailable')
+    except Exception as e:
+        return error_response(500, f'Error fetching price data: {str(e)}')
 
-def error_response(status_code, message):
-    """Helper function to return error responses"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': False,
-            'message': message
-        })
-    }
-
-
-def decimal_default(obj):
-    """Helper function to serialize Decimal objects"""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
+    try:
+        trade_records, new_balance = trade_engine.execute_orders(
+            users_table_name, trades_table_name, user_id, parsed_orders, prices, username
+        )
+    except trade_engine.TradeRejected as e:
+        return error_response(400, str(e))
+    except trade_engine.TradeConflict as e:
+        return error_response(409, str(e))
+    except Exception as e:
+        return error_response(500, f'Error executing trades: {str(e)}')
+
+    return json_response(event, {
+        'success': True,
+        'message': f'Executed {len(trade_records)} orders successfully',
+        'trades': [
+            {
+                'trade_id': record['trade_id'],
+                'symbol': record['symbol'],
+                'action': record['action'],
+                'quantity': record['quantity'],
+                'price': float(record['price']),
+                'total_value': float(record['total_value'])
+            }
+            for record in trade_records
+        ],
+        'new_balance': float(new_balance)
+    }, methods='POST, OPTIONS')
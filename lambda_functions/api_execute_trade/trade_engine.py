@@ -0,0 +1,322 @@
+import aws_clients
+from botocore.exceptions import ClientError
+from decimal import Decimal
+import time
+import uuid
+
+# Trade execution against DynamoDB without read-modify-write of the whole user.
+#
+# The engine reads only the balance and the positions a trade touches, works out
+# the new values, and commits them with one TransactWriteItems: an UpdateItem on
+# the user guarded by a ConditionExpression on the balance and position quantity
+# it read, plus the PutItem of the trade record. If another trade for the same
+# user lands in between, the condition fails, the transaction is cancelled as a
+# whole and the trade is re-evaluated against fresh values. Nothing is lost and
+# the request size does not grow with the number of symbols the user holds.
+#
+# User items written by older code may lack balance or the portfolio map. A
+# missing balance shows in the read and is guarded with attribute_not_exists
+# instead of an equality; a missing portfolio cannot be told apart from one
+# without the traded symbols by a per-symbol projection, so the update also
+# requires the portfolio to exist, and a retry reads the whole map to find out
+# and then creates it with the new positions.
+#
+# The client honours AWS_ENDPOINT_URL_DYNAMODB, so the engine can be run against
+# DynamoDB Local (see local/README.md).
+
+dynamodb_client = aws_clients.lazy_client('dynamodb')
+
+INITIAL_BALANCE = Decimal('100000')
+
+# Attempts before giving up on a user whose record keeps changing underneath us
+MAX_ATTEMPTS = 5
+
+# A transaction holds at most 100 items: the user update plus one record per order
+MAX_ORDERS = 99
+
+
+class TradeRejected(Exception):
+    """The trade cannot be covered by the account (balance or shares)."""
+
+
+class TradeConflict(Exception):
+    """The account changed on every attempt to commit the trade."""
+
+
+def load_account(users_table_name, user_id, symbols, whole_portfolio=False):
+    """
+    Consistent read of the balance, trade count and the positions in symbols only
+    (the whole portfolio map with whole_portfolio, to learn whether it exists).
+    Returns the account snapshot the trade is evaluated and guarded against;
+    has_portfolio is None when the read could not tell.
+    """
+    names = {'#portfolio': 'portfolio'}
+    projection = ['balance', 'total_trades']
+    if whole_portfolio:
+        projection.append('#portfolio')
+    else:
+        for i, symbol in enumerate(symbols):
+            names[f'#s{i}'] = symbol
+            projection.append(f'#portfolio.#s{i}')
+
+    response = dynamodb_client.get_item(
+        TableName=users_table_name,
+        Key={'user_id': {'S': user_id}},
+        ProjectionExpression=', '.join(projection),
+        ExpressionAttributeNames=names,
+        ConsistentRead=True
+    )
+
+    if 'Item' not in response:
+        return {
+            'user_id': user_id,
+            'exists': False,
+            'has_balance': False,
+            'has_portfolio': False,
+            'balance': INITIAL_BALANCE,
+            'total_trades': 0,
+            'positions': {}
+        }
+
+    item = aws_clients.deserialize_item(response['Item'])
+    positions = {
+        symbol: {
+            'quantity': int(holding.get('quantity', 0)),
+            'avg_price': Decimal(str(holding.get('avg_price', 0)))
+        }
+        for symbol, holding in item.get('portfolio', {}).items()
+        if symbol in symbols
+    }
+
+    if 'portfolio' in item:
+        has_portfolio = True
+    else:
+        has_portfolio = False if whole_portfolio else None
+
+    return {
+        'user_id': user_id,
+        'exists': True,
+        'has_balance': 'balance' in item,
+        'has_portfolio': has_portfolio,
+        'balance': item.get('balance', INITIAL_BALANCE),
+        'total_trades': int(item.get('total_trades', 0)),
+        'positions': positions
+    }
+
+
+def apply_order(balance, positions, symbol, action, quantity, price):
+    """
+    Apply one order to a balance and positions (symbol -> quantity/avg_price),
+    mutating positions in place. Returns (new_balance, trade_value) or raises
+    TradeRejected when the account cannot cover it.
+    """
+    trade_value = price * Decimal(str(quantity))
+
+    if action == 'buy':
+        if balance < trade_value:
+            raise TradeRejected(f'Insufficient balance. Required: ${float(trade_value):.2f}, Available: ${float(balance):.2f}')
+
+        holding = positions.get(symbol)
+        if holding:
+            held = Decimal(str(holding['quantity']))
+            positions[symbol] = {
+                'quantity': holding['quantity'] + quantity,
+                'avg_price': (holding['avg_price'] * held + trade_value) / (held + Decimal(str(quantity)))
+            }
+        else:
+            positions[symbol] = {'quantity': quantity, 'avg_price': price}
+
+        return balance - trade_value, trade_value
+
+    holding = positions.get(symbol)
+    if not holding or holding['quantity'] < quantity:
+        available = holding['quantity'] if holding else 0
+        raise TradeRejected(f'Insufficient shares. Required: {quantity}, Available: {available}')
+
+    remaining = holding['quantity'] - quantity
+    if remaining == 0:
+        del positions[symbol]
+    else:
+        positions[symbol] = {'quantity': remaining, 'avg_price': holding['avg_price']}
+
+    return balance + trade_value, trade_value
+
+
+def account_write(users_table_name, account, balance, positions, symbols, trade_count, username=None):
+    """
+    Transaction item that moves the user from the account snapshot to the new
+    balance and positions. New users are created with a conditional Put; existing
+    users get an UpdateItem touching only the traded symbols, guarded on the
+    balance and positions that were read; an existing user without a portfolio
+    map gets one holding the new positions.
+    """
+    user_id = account['user_id']
+
+    if not account['exists']:
+        return {
+            'Put': {
+                'TableName': users_table_name,
+                'Item': {key: aws_clients.serialize(value) for key, value in {
+                    'user_id': user_id,
+                    'username': username if username else user_id[:8],
+                    'balance': balance,
+                    'portfolio': positions,
+                    'total_trades': trade_count,
+                    'total_profit_loss': Decimal('0')
+                }.items()},
+                'ConditionExpression': 'attribute_not_exists(user_id)'
+            }
+        }
+
+    names = {'#portfolio': 'portfolio'}
+    values = {
+        ':balance': balance,
+        ':zero': 0,
+        ':trades': trade_count
+    }
+    conditions = ['attribute_exists(user_id)']
+    if account['has_balance']:
+        values[':expected_balance'] = account['balance']
+        conditions.append('balance = :expected_balance')
+    else:
+        conditions.append('attribute_not_exists(balance)')
+    set_actions = [
+        'balance = :balance',
+        'total_trades = if_not_exists(total_trades, :zero) + :trades'
+    ]
+    remove_actions = []
+
+    if username:
+        values[':username'] = username
+        set_actions.append('username = if_not_exists(username, :username)')
+
+    if account['has_portfolio'] is False:
+        # Nothing was held, so the new positions are the whole portfolio
+        values[':portfolio'] = positions
+        conditions.append('attribute_not_exists(#portfolio)')
+        set_actions.append('#portfolio = :portfolio')
+        symbols = []
+    else:
+        conditions.append('attribute_exists(#portfolio)')
+
+    for i, symbol in enumerate(symbols):
+        path = f'#portfolio.#s{i}'
+        names[f'#s{i}'] = symbol
+
+        before = account['positions'].get(symbol)
+        if before:
+            values[f':q{i}'] = before['quantity']
+            conditions.append(f'{path}.quantity = :q{i}')
+        else:
+            conditions.append(f'attribute_not_exists({path})')
+
+        after = positions.get(symbol)
+        if after:
+            values[f':p{i}'] = after
+            set_actions.append(f'{path} = :p{i}')
+        else:
+            remove_actions.append(path)
+
+    update = 'SET ' + ', '.join(set_actions)
+    if remove_actions:
+        update += ' REMOVE ' + ', '.join(remove_actions)
+
+    return {
+        'Update': {
+            'TableName': users_table_name,
+            'Key': {'user_id': {'S': user_id}},
+            'UpdateExpression': update,
+            'ConditionExpression': ' AND '.join(conditions),
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': {key: aws_clients.serialize(value) for key, value in values.items()}
+        }
+    }
+
+
+def trade_write(trades_table_name, trade_record):
+    """Transaction item recording one trade, never overwriting an existing one."""
+    return {
+        'Put': {
+            'TableName': trades_table_name,
+            'Item': {key: aws_clients.serialize(value) for key, value in trade_record.items()},
+            'ConditionExpression': 'attribute_not_exists(trade_id)'
+        }
+    }
+
+
+def is_condition_conflict(error):
+    """True when a cancelled transaction failed on a condition or a concurrent transaction."""
+    if error.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return False
+    reasons = error.response.get('CancellationReasons') or []
+    if not reasons:
+        return 'ConditionalCheckFailed' in str(error) or 'TransactionConflict' in str(error)
+    return any(reason.get('Code') in ('ConditionalCheckFailed', 'TransactionConflict') for reason in reasons)
+
+
+def execute_orders(users_table_name, trades_table_name, user_id, orders, prices, username=None):
+    """
+    Execute orders [(symbol, action, quantity)] for user_id, all priced from
+    prices (symbol -> Decimal) and validated in order against the running
+    balance and positions. The user update and every trade record are committed
+    in a single transaction, so either all orders fill or none do.
+    Returns (trade_records, new_balance). Raises TradeRejected naming the first
+    order the account cannot cover, and TradeConflict if the user record kept
+    changing for MAX_ATTEMPTS attempts.
+    """
+    if len(orders) > MAX_ORDERS:
+        raise TradeRejected(f'At most {MAX_ORDERS} orders can be executed together')
+
+    symbols = list(dict.fromkeys(symbol for symbol, _, _ in orders))
+
+    for attempt in range(MAX_ATTEMPTS):
+        # A retry may be down to a missing portfolio map, which only a read of the whole map shows
+        account = load_account(users_table_name, user_id, symbols, whole_portfolio=attempt > 0)
+        positions = dict(account['positions'])
+        balance = account['balance']
+        timestamp = int(time.time())
+        trade_records = []
+
+        for number, (symbol, action, quantity) in enumerate(orders, start=1):
+            price = prices[symbol]
+            try:
+                balance, trade_value = apply_order(balance, positions, symbol, action, quantity, price)
+            except TradeRejected as e:
+                if len(orders) == 1:
+                    raise
+                raise TradeRejected(f'Order {number} ({action.upper()} {quantity} {symbol}): {e}')
+
+            trade_records.append({
+                'trade_id': str(uuid.uuid4()),
+                'user_id': user_id,
+                'timestamp': timestamp,
+                # The user's running trade number, ordering trades made in the same second
+                'sequence': account['total_trades'] + number,
+                'symbol': symbol,
+                'action': action,
+                'quantity': quantity,
+                'price': price,
+                'total_value': trade_value
+            })
+
+        transact_items = [account_write(users_table_name, account, balance, positions, symbols, len(orders), username)]
+        transact_items.extend(trade_write(trades_table_name, record) for record in trade_records)
+
+        try:
+            dynamodb_client.transact_write_items(TransactItems=transact_items)
+            return trade_records, balance
+        except ClientError as e:
+            if not is_condition_conflict(e):
+                raise
+            print(f"Trade for {user_id} conflicted with a concurrent update (attempt {attempt + 1}), retrying")
+
+    raise TradeConflict(f'Account {user_id} changed during the trade, please retry')
+
+
+def execute_trade(users_table_name, trades_table_name, user_id, symbol, action, quantity, price, username=None):
+    """Execute one buy/sell at price for user_id. Returns (trade_record, new_balance)."""
+    trade_records, balance = execute_orders(
+        users_table_name, trades_table_name, user_id,
+        [(symbol, action, quantity)], {symbol: price}, username
+    )
+    return trade_records[0], balance
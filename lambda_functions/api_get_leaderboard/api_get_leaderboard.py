@@ -1,114 +1,75 @@
-import json
 import os
-import boto3
-from decimal import Decimal
+import aws_clients
+import metrics
+from http_responses import error_response, json_response
 
-dynamodb = boto3.resource('dynamodb')
-s3_client = boto3.client('s3')
+# A single Query: the low-level client is cheaper to build than a Table resource
+dynamodb_client = aws_clients.lazy_client('dynamodb')
 
+LEADERBOARD_PERIOD = 'all_time'
+METADATA_RANK = 0
+
+@metrics.instrument('api_get_leaderboard')
 def lambda_handler(event, context):
     """
     This will be the API endpoint we will use to get the leaderboard rankings based on total profit/loss made by each user.
+    Rankings are materialized by leaderboard_builder, so this is a single Query on the leaderboard table.
     """
-    users_table_name = os.environ['USERS_TABLE']
     leaderboard_table_name = os.environ['LEADERBOARD_TABLE']
-    market_data_bucket = os.environ.get('MARKET_DATA_BUCKET')
-
-    users_table = dynamodb.Table(users_table_name)
-    leaderboard_table = dynamodb.Table(leaderboard_table_name)
 
     try:
-        try:
-            response = s3_client.get_object(
-                Bucket=market_data_bucket,
-                Key='simulated_data/latest_simulated_1sec.json'
-            )
-            simulated_data = json.loads(response['Body'].read().decode('utf-8'))
-
-            from datetime import datetime
-            current_time = datetime.utcnow()
-            current_second = ((current_time.minute % 10) * 60) + current_time.second  
-        except Exception:
-            simulated_data = None
-            current_second = 0
-
-        users_response = users_table.scan()
-        users = users_response.get('Items', [])
-
+        params = event.get('queryStringParameters') or {}
+        period = params.get('period', LEADERBOARD_PERIOD)
+        limit = min(int(params.get('limit', 100)), 100)
+
+        response = dynamodb_client.query(
+            TableName=leaderboard_table_name,
+            KeyConditionExpression='#period = :period AND #rank BETWEEN :first AND :last',
+            ExpressionAttributeNames={'#period': 'period', '#rank': 'rank'},
+            ExpressionAttributeValues={
+                ':period': {'S': period},
+                ':first': {'N': str(METADATA_RANK)},
+                ':last': {'N': str(limit)}
+            }
+        )
+        items = [aws_clients.deserialize_item(item) for item in response.get('Items', [])]
+
+        metadata = {}
         leaderboard_entries = []
-        initial_investment = Decimal('100000')
-
-        for user in users:
-            user_id = user['user_id']
-            username = user.get('username', user_id[:8])  
-            balance = user.get('balance', Decimal('100000'))
-            portfolio = user.get('portfolio', {})
-            total_trades = user.get('total_trades', 0)
-
-            portfolio_value = Decimal('0')
-            if simulated_data:
-                for symbol, holding in portfolio.items():
-                    if symbol in simulated_data['assets'] and simulated_data['assets'][symbol]:
-                        asset_data = simulated_data['assets'][symbol]
-
-                        if 'seconds' in asset_data and current_second < len(asset_data['seconds']):
-                            current_price = Decimal(str(asset_data['seconds'][current_second]['price']))
-                        else:
-                            current_price = Decimal(str(asset_data['seconds'][-1]['price']))
 
-                        quantity = Decimal(str(holding['quantity']))
-                        portfolio_value += current_price * quantity
-
-            total_value = balance + portfolio_value
-            profit_loss = total_value - initial_investment
-            profit_loss_percent = (profit_loss / initial_investment * 100) if initial_investment > 0 else Decimal('0')
+        for item in items:
+            if item['rank'] == METADATA_RANK:
+                metadata = item
+                continue
 
+            # Decimals are written out as they are stored, without a float round-trip
             leaderboard_entries.append({
-                'user_id': user_id,
-                'username': username,
-                'total_value': float(total_value),
-                'profit_loss': float(profit_loss),
-                'profit_loss_percent': float(profit_loss_percent),
-                'total_trades': int(total_trades),
-                'balance': float(balance),
-                'portfolio_value': float(portfolio_value)
+                'user_id': item['user_id'],
+                'username': item['username'],
+                'total_value': item['total_value'],
+                'profit_loss': item['profit_loss'],
+                'profit_loss_percent': item['profit_loss_percent'],
+                'total_trades': int(item['total_trades']),
+                'balance': item['balance'],
+                'portfolio_value': item['portfolio_value'],
+                'rank': int(item['rank'])
             })
 
-        leaderboard_entries.sort(key=lambda x: x['profit_loss'], reverse=True)
-
-        for i, entry in enumerate(leaderboard_entries):
-            entry['rank'] = i + 1
-
-        leaderboard_entries = leaderboard_entries[:100]
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS'
+        # Ranks past the current entry count can briefly remain while a rebuild is in flight
+        if metadata:
+            leaderboard_entries = leaderboard_entries[:int(metadata.get('entries', len(leaderboard_entries)))]
+
+        # Rebuilt once a minute, so most polls in between revalidate to a 304
+        return json_response(event, {
+            'success': True,
+            'data': {
+                'leaderboard': leaderboard_entries,
+                'total_users': int(metadata.get('total_users', 0)),
+                'updated_at': int(metadata['updated_at']) if 'updated_at' in metadata else None
             },
-            'body': json.dumps({
-                'success': True,
-                'data': {
-                    'leaderboard': leaderboard_entries,
-                    'total_users': len(users)
-                },
-                'message': 'Leaderboard fetched successfully'
-            })
-        }
+            'message': 'Leaderboard fetched successfully'
+        })
 
     except Exception as e:
         print(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': f'Internal server error: {str(e)}'
-            })
-        }
+        return error_response(500, f'Internal server error: {str(e)}')
@@ -1,79 +1,57 @@
-import json
 import os
-import boto3
+import aws_clients
+import metrics
 import time
+import news_log
+from http_responses import error_response, json_response
 
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
+@metrics.instrument('api_get_news')
 def lambda_handler(event, context):
     """
     API endpoint to get AI-generated news articles.
     Only returns articles where publish_at <= current_time (staggered release).
+
+    Without parameters it returns the articles of the last hour. With
+    ?since=<cursor> (the cursor of a previous response) it returns only the
+    articles added after it, or an empty, unchanged delta when there are none.
     """
     news_bucket = os.environ['NEWS_BUCKET']
     current_time = int(time.time())
 
+    query_params = event.get('queryStringParameters') or {}
+    since = query_params.get('since')
+
     try:
-        response = s3_client.get_object(
-            Bucket=news_bucket,
-            Key='latest_news.json'
-        )
-        news_data = json.loads(response['Body'].read().decode('utf-8'))
+        try:
+            cursor = int(since) if since else 0
+        except ValueError:
+            return error_response(400, 'since must be a cursor returned by a previous /news response')
 
-        all_articles = news_data.get('articles', [])
-        published_articles = [
-            article for article in all_articles
-            if article.get('publish_at', 0) <= current_time
-        ]
+        published_articles, pending, next_cursor = news_log.read_since(
+            s3_client, news_bucket, cursor, current_time
+        )
 
-        published_articles.sort(key=lambda x: x.get('publish_at', 0), reverse=True)
+        if not since and not published_articles and not pending:
+            return error_response(404, 'No news available yet. Please wait for the first news generation.')
 
         filtered_news_data = {
-            'timestamp': news_data.get('timestamp'),
-            'datetime': news_data.get('datetime'),
+            'timestamp': next_cursor,
+            'cursor': str(next_cursor),
+            'since': since,
+            'changed': bool(published_articles),
             'articles': published_articles,
-            'total_articles': len(all_articles),
             'published_articles': len(published_articles),
-            'pending_articles': len(all_articles) - len(published_articles)
+            'pending_articles': pending
         }
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS'
-            },
-            'body': json.dumps({
-                'success': True,
-                'data': filtered_news_data,
-                'message': f'{len(published_articles)} news articles available'
-            })
-        }
+        return json_response(event, {
+            'success': True,
+            'data': filtered_news_data,
+            'message': f'{len(published_articles)} news articles available'
+        })
 
-    except s3_client.exceptions.NoSuchKey:
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': 'No news available yet. Please wait for the first news generation.'
-            })
-        }
     except Exception as e:
         print(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': f'Error fetching news: {str(e)}'
-            })
-        }
+        return error_response(500, f'Error fetching news: {str(e)}')
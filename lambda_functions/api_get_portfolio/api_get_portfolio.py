@@ -1,11 +1,17 @@
-import json
 import os
-import boto3
+import aws_clients
+import metrics
+import market_data_cache
+from price_lookup import lookup_for
+from valuation import value_portfolio
+from http_responses import error_response, json_response
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-s3_client = boto3.client('s3')
+# A single GetItem: the low-level client is cheaper to build than a Table resource
+dynamodb_client = aws_clients.lazy_client('dynamodb')
+s3_client = aws_clients.lazy_client('s3')
 
+@metrics.instrument('api_get_portfolio')
 def lambda_handler(event, context):
     """
     API endpoint to get user's portfolio including positions, balance, and P/L.
@@ -13,8 +19,6 @@ def lambda_handler(event, context):
     users_table_name = os.environ['USERS_TABLE']
     market_data_bucket = os.environ['MARKET_DATA_BUCKET']
 
-    users_table = dynamodb.Table(users_table_name)
-
     try:
         user_id = event.get('queryStringParameters', {}).get('user_id')
 
@@ -22,86 +26,53 @@ def lambda_handler(event, context):
             return error_response(400, 'Missing required parameter: user_id')
 
         try:
-            user_response = users_table.get_item(Key={'user_id': user_id})
+            user_response = dynamodb_client.get_item(TableName=users_table_name, Key={'user_id': {'S': user_id}})
 
             if 'Item' not in user_response:
-                return {
-                    'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*',
-                        'Access-Control-Allow-Headers': '*',
-                        'Access-Control-Allow-Methods': 'GET, OPTIONS'
+                return json_response(event, {
+                    'success': True,
+                    'data': {
+                        'user_id': user_id,
+                        'balance': 100000.0,
+                        'portfolio': {},
+                        'portfolio_value': 0.0,
+                        'total_value': 100000.0,
+                        'total_profit_loss': 0.0,
+                        'total_profit_loss_percent': 0.0,
+                        'positions': []
                     },
-                    'body': json.dumps({
-                        'success': True,
-                        'data': {
-                            'user_id': user_id,
-                            'balance': 100000.0,
-                            'portfolio': {},
-                            'portfolio_value': 0.0,
-                            'total_value': 100000.0,
-                            'total_profit_loss': 0.0,
-                            'total_profit_loss_percent': 0.0,
-                            'positions': []
-                        },
-                        'message': 'New user portfolio'
-                    })
-                }
-
-            user_data = user_response['Item']
+                    'message': 'New user portfolio'
+                })
+
+            user_data = aws_clients.deserialize_item(user_response['Item'])
 
         except Exception as e:
             return error_response(500, f'Error fetching user data: {str(e)}')
 
         try:
-            response = s3_client.get_object(
-                Bucket=market_data_bucket,
-                Key='simulated_data/latest_simulated_1sec.json'
-            )
-            simulated_data = json.loads(response['Body'].read().decode('utf-8'))
-
-            from datetime import datetime
-            current_time = datetime.utcnow()
-            current_second = ((current_time.minute % 10) * 60) + current_time.second  
+            window = market_data_cache.get_price_window(s3_client, market_data_bucket)
 
         except Exception as e:
             return error_response(500, f'Error fetching price data: {str(e)}')
 
         portfolio = user_data.get('portfolio', {})
-        positions = []
-        total_portfolio_value = Decimal('0')
-        total_cost_basis = Decimal('0')
-
-        for symbol, holding in portfolio.items():
-            if symbol in simulated_data['assets'] and simulated_data['assets'][symbol]:
-                asset_data = simulated_data['assets'][symbol]
-
-                if 'seconds' in asset_data and current_second < len(asset_data['seconds']):
-                    current_price = Decimal(str(asset_data['seconds'][current_second]['price']))
-                else:
-                    current_price = Decimal(str(asset_data['seconds'][-1]['price']))
-                quantity = Decimal(str(holding['quantity']))
-                avg_price = Decimal(str(holding['avg_price']))
-
-                market_value = current_price * quantity
-                cost_basis = avg_price * quantity
-                profit_loss = market_value - cost_basis
-                profit_loss_percent = (profit_loss / cost_basis * 100) if cost_basis > 0 else Decimal('0')
-
-                positions.append({
-                    'symbol': symbol,
-                    'quantity': int(quantity),
-                    'avg_price': float(avg_price),
-                    'current_price': float(current_price),
-                    'market_value': float(market_value),
-                    'cost_basis': float(cost_basis),
-                    'profit_loss': float(profit_loss),
-                    'profit_loss_percent': float(profit_loss_percent)
-                })
-
-                total_portfolio_value += market_value
-                total_cost_basis += cost_basis
+        with metrics.span('valuation'):
+            prices = lookup_for(window).prices([symbol for symbol in portfolio if symbol in window])
+            valued_positions, total_portfolio_value, total_cost_basis = value_portfolio(portfolio, prices)
+
+        positions = [
+            {
+                'symbol': position['symbol'],
+                'quantity': int(position['quantity']),
+                'avg_price': float(position['avg_price']),
+                'current_price': float(position['current_price']),
+                'market_value': float(position['market_value']),
+                'cost_basis': float(position['cost_basis']),
+                'profit_loss': float(position['profit_loss']),
+                'profit_loss_percent': float(position['profit_loss_percent'])
+            }
+            for position in valued_positions
+        ]
 
         balance = user_data.get('balance', Decimal('100000'))
         total_value = balance + total_portfolio_value
@@ -121,36 +92,12 @@ def lambda_handler(event, context):
             'positions': sorted(positions, key=lambda x: x['market_value'], reverse=True)
         }
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS'
-            },
-            'body': json.dumps({
-                'success': True,
-                'data': portfolio_data,
-                'message': 'Portfolio fetched successfully'
-            })
-        }
+        return json_response(event, {
+            'success': True,
+            'data': portfolio_data,
+            'message': 'Portfolio fetched successfully'
+        })
 
     except Exception as e:
         print(f"Error: {str(e)}")
         return error_response(500, f'Internal server error: {str(e)}')
-
-
-def error_response(status_code, message):
-    """Helper function to return error responses"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': False,
-            'message': message
-        })
-    }
@@ -1,112 +1,102 @@
-import json
 import os
-import boto3
-from datetime import datetime
+import aws_clients
+import metrics
+import time
+import market_data_cache
+from http_responses import body_response, dumps, error_response
+from price_lookup import second_at
+from simulation_windows import WINDOW_SECONDS
+from window_payload import window_payload
 
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
+# Until the next window has been written, window responses may be cached only
+# this long, so clients pick it up well before the current window ends
+NEXT_WINDOW_RETRY_SECONDS = 30
+
+# Serialized window payloads of the current and next window, keyed by start_timestamp
+_window_json = {}
+
+
+def window_json(window):
+    """JSON bytes for window_payload(window), serialized once per window while warm."""
+    if window.start_timestamp not in _window_json:
+        for start in [start for start in _window_json if start < window.start_timestamp - WINDOW_SECONDS]:
+            del _window_json[start]
+        with metrics.span('serialize'):
+            _window_json[window.start_timestamp] = dumps(window_payload(window))
+    return _window_json[window.start_timestamp]
+
+
+def window_response(event, market_data_bucket):
+    """
+    ?mode=window: the whole current window for local playback, and the next
+    one as soon as it exists (null before), so playback carries on across the
+    boundary without waiting for a request. The response does not change until
+    the window ends or the next one appears, so it may be cached until
+    end_timestamp once it has both, and for NEXT_WINDOW_RETRY_SECONDS before.
+    The server time the client keys playback on is sent in the X-Server-Time
+    header, outside the body the ETag stands for, so a cached or revalidated
+    body never carries a stale clock.
+    """
+    now = time.time()
+    window = market_data_cache.get_price_window(s3_client, market_data_bucket, now=now)
+    next_window = market_data_cache.get_price_window_at(
+        s3_client, market_data_bucket, window.start_timestamp + WINDOW_SECONDS, now=now
+    )
+
+    max_age = max(int(window.end_timestamp - now), 1)
+    if next_window is None:
+        max_age = min(max_age, NEXT_WINDOW_RETRY_SECONDS)
+        next_json, etag = b'null', f'"window-{window.start_timestamp}"'
+    else:
+        next_json, etag = window_json(next_window), f'"window-{window.start_timestamp}-next"'
+
+    body = b'{"success":true,"data":{"window":%s,"next_window":%s}}' % (window_json(window), next_json)
+    return body_response(
+        event, body,
+        cache_control=f'public, max-age={max_age}',
+        etag=etag,
+        extra_headers={'X-Server-Time': f'{now:.3f}'}
+    )
+
+
+@metrics.instrument('api_get_prices')
 def lambda_handler(event, context):
     """
     API endpoint to get current second's simulated prices for all assets.
     Returns the appropriate price from the pre-generated 600-price batch
-    based on the current second within the 10-minute period.
+    based on the current second within the 10-minute period. The response
+    body for every second is pre-rendered by price_simulator, so this only
+    slices out the bytes for the current second.
+
+    With ?mode=window the whole 600-second window (and the next one, once it
+    exists) is returned instead, so a client can play it back locally with
+    one request per window.
     """
     market_data_bucket = os.environ['MARKET_DATA_BUCKET']
+    params = event.get('queryStringParameters') or {}
+    mode = params.get('mode', 'second')
+
+    if mode not in ('second', 'window'):
+        return error_response(400, f'Unknown mode {mode}; expected second or window')
 
     try:
-        response = s3_client.get_object(
-            Bucket=market_data_bucket,
-            Key='simulated_data/latest_simulated_1sec.json'
+        if mode == 'window':
+            return window_response(event, market_data_bucket)
+
+        snapshots = market_data_cache.get_price_snapshots(s3_client, market_data_bucket)
+        current_second = second_at(snapshots, time.time())
+
+        # Every caller in the same second gets the same body, so it is compressed once
+        return body_response(
+            event, snapshots.body(current_second),
+            cache_control='public, max-age=1',
+            etag=f'"prices-{snapshots.start_timestamp}-{current_second}"'
         )
-        simulated_data = json.loads(response['Body'].read().decode('utf-8'))
-
-        current_time = datetime.utcnow()
-        current_second = ((current_time.minute % 10) * 60) + current_time.second  
-
-        prices = {}
-
-        for symbol, asset_data in simulated_data['assets'].items():
-            if asset_data is None or 'seconds' not in asset_data:
-                prices[symbol] = {
-                    'error': 'No data available',
-                    'current': None
-                }
-                continue
-
-            if current_second < len(asset_data['seconds']):
-                second_data = asset_data['seconds'][current_second]
-                prices[symbol] = {
-                    'current': second_data['price'],
-                    'timestamp': second_data['timestamp'],
-                    'datetime': second_data['datetime'],
-                    'second': second_data['second'],
-                    'period_high': asset_data.get('period_high', asset_data.get('hour_high')),
-                    'period_low': asset_data.get('period_low', asset_data.get('hour_low')),
-                    'hour_start': asset_data['start_price'],
-                    'hour_projected_end': asset_data['end_price'],
-                    'period_change_percent': asset_data.get('period_change_percent', asset_data.get('hour_change_percent'))
-                }
-            else:
-                second_data = asset_data['seconds'][-1]
-                prices[symbol] = {
-                    'current': second_data['price'],
-                    'timestamp': second_data['timestamp'],
-                    'datetime': second_data['datetime'],
-                    'second': second_data['second'],
-                    'period_high': asset_data.get('period_high', asset_data.get('hour_high')),
-                    'period_low': asset_data.get('period_low', asset_data.get('hour_low')),
-                    'hour_start': asset_data['start_price'],
-                    'hour_projected_end': asset_data['end_price'],
-                    'period_change_percent': asset_data.get('period_change_percent', asset_data.get('hour_change_percent')),
-                    'note': 'Using last available second (simulation may be outdated)'
-                }
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS'
-            },
-            'body': json.dumps({
-                'success': True,
-                'data': {
-                    'prices': prices,
-                    'current_second': current_second,
-                    'current_time': current_time.isoformat(),
-                    'simulation_timestamp': simulated_data['timestamp'],
-                    'simulation_datetime': simulated_data['datetime'],
-                    'simulation_start': simulated_data['start_timestamp'],
-                    'simulation_end': simulated_data['end_timestamp'],
-                    'resolution': simulated_data['resolution']
-                },
-                'message': f'Prices for second {current_second} fetched successfully'
-            })
-        }
 
     except s3_client.exceptions.NoSuchKey:
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': 'No price data available yet. Please wait for the first simulation run.'
-            })
-        }
+        return error_response(404, 'No price data available yet. Please wait for the first simulation run.')
     except Exception as e:
         print(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': f'Error fetching prices: {str(e)}'
-            })
-        }
+        return error_response(500, f'Error fetching prices: {str(e)}')
@@ -0,0 +1,81 @@
+import os
+import aws_clients
+import metrics
+import trade_history
+from decimal import Decimal
+from http_responses import error_response, json_response
+
+dynamodb = aws_clients.lazy_resource('dynamodb')
+
+@metrics.instrument('api_get_trades')
+def lambda_handler(event, context):
+    """
+    API endpoint to get a user's trade history, newest first.
+
+    Query parameters: user_id (required), from / to (epoch seconds, inclusive),
+    symbol, limit (default 50, at most 200) and cursor (the next_cursor of a
+    previous response). With mode=summary the whole range is aggregated per
+    symbol (counts, VWAP, realized P/L) instead of returning the trades.
+    """
+    trades_table = dynamodb.Table(os.environ['TRADES_TABLE'])
+    params = event.get('queryStringParameters') or {}
+
+    user_id = params.get('user_id')
+    if not user_id:
+        return error_response(400, 'Missing required parameter: user_id')
+
+    mode = params.get('mode', 'list')
+    if mode not in ('list', 'summary'):
+        return error_response(400, 'mode must be either "list" or "summary"')
+
+    try:
+        start = int(params['from']) if params.get('from') else None
+        end = int(params['to']) if params.get('to') else None
+        limit = int(params.get('limit', trade_history.DEFAULT_LIMIT))
+    except ValueError:
+        return error_response(400, 'from, to and limit must be integers')
+
+    if not 1 <= limit <= trade_history.MAX_LIMIT:
+        return error_response(400, f'limit must be between 1 and {trade_history.MAX_LIMIT}')
+    if start is not None and end is not None and start > end:
+        return error_response(400, 'from must not be after to')
+
+    symbol = params.get('symbol')
+
+    try:
+        if mode == 'summary':
+            summary = trade_history.summarize(
+                trade_history.iter_trades(trades_table, user_id, start, end, symbol)
+            )
+            data = {
+                'user_id': user_id,
+                'from': start,
+                'to': end,
+                'symbols': summary,
+                'total_trades': sum(s['trades'] for s in summary.values()),
+                'realized_profit_loss': sum((s['realized_profit_loss'] for s in summary.values()), Decimal('0'))
+            }
+            message = 'Trade summary fetched successfully'
+        else:
+            trades, next_cursor = trade_history.query_page(
+                trades_table, user_id, start, end, symbol, limit, params.get('cursor')
+            )
+            data = {
+                'user_id': user_id,
+                'trades': trades,
+                'count': len(trades),
+                'next_cursor': next_cursor
+            }
+            message = f'Fetched {len(trades)} trades'
+
+        return json_response(event, {
+            'success': True,
+            'data': data,
+            'message': message
+        })
+
+    except trade_history.InvalidCursor as e:
+        return error_response(400, str(e))
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return error_response(500, f'Error fetching trades: {str(e)}')
@@ -0,0 +1,181 @@
+import base64
+import json
+from decimal import Decimal
+
+# One user's trades, read through the trades table's UserIdIndex GSI
+# (hash user_id, range timestamp).
+#
+# Every read is a Query on a single user_id with the time range as a key
+# condition, so its cost follows that user's history rather than the table.
+# Only the attributes a history view shows are projected. Pages are resumed
+# from an opaque cursor (the base64 LastEvaluatedKey), and the summary mode
+# folds the pages into per-symbol figures as they arrive instead of holding
+# the whole history.
+#
+# The index orders trades by timestamp only, and a batch order writes all its
+# trades in the same second, so ties come back in arbitrary order. Trades carry
+# the user's running trade number as 'sequence', and the summary puts each
+# second's trades back in that order before folding them. Trades recorded
+# before 'sequence' was written keep the order the index returned them in.
+
+USER_INDEX = 'UserIdIndex'
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# 'timestamp', 'action' and 'sequence' are DynamoDB reserved words
+PROJECTION = '#ts, trade_id, symbol, #action, quantity, price, total_value, #seq'
+PROJECTION_NAMES = {'#ts': 'timestamp', '#action': 'action', '#seq': 'sequence'}
+
+CURSOR_KEYS = {'user_id', 'timestamp', 'trade_id'}
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued for this user by a previous response."""
+
+
+def encode_cursor(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    key = {name: int(value) if isinstance(value, Decimal) else value for name, value in last_evaluated_key.items()}
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, user_id):
+    """ExclusiveStartKey for a cursor. Raises InvalidCursor unless it belongs to user_id."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(key, dict) or set(key) != CURSOR_KEYS or key['user_id'] != user_id:
+        raise InvalidCursor('Cursor does not belong to this query')
+    return key
+
+
+def key_condition(user_id, start=None, end=None):
+    from boto3.dynamodb.conditions import Key
+    condition = Key('user_id').eq(user_id)
+    if start is not None and end is not None:
+        return condition & Key('timestamp').between(start, end)
+    if start is not None:
+        return condition & Key('timestamp').gte(start)
+    if end is not None:
+        return condition & Key('timestamp').lte(end)
+    return condition
+
+
+def base_query(user_id, start=None, end=None, symbol=None, newest_first=True):
+    query = {
+        'IndexName': USER_INDEX,
+        'KeyConditionExpression': key_condition(user_id, start, end),
+        'ProjectionExpression': PROJECTION,
+        'ExpressionAttributeNames': dict(PROJECTION_NAMES),
+        'ScanIndexForward': not newest_first
+    }
+    if symbol:
+        from boto3.dynamodb.conditions import Attr
+        query['FilterExpression'] = Attr('symbol').eq(symbol)
+    return query
+
+
+def query_page(trades_table, user_id, start=None, end=None, symbol=None, limit=DEFAULT_LIMIT, cursor=None):
+    """
+    Up to limit trades, newest first, from cursor on. Returns (trades, next_cursor);
+    next_cursor is None on the last page.
+
+    With a symbol filter DynamoDB may return fewer matches than it read, so
+    pages are followed until limit matches or the end of the range.
+    """
+    query = base_query(user_id, start, end, symbol)
+    if cursor:
+        query['ExclusiveStartKey'] = decode_cursor(cursor, user_id)
+
+    trades = []
+    while True:
+        response = trades_table.query(Limit=limit - len(trades), **query)
+        trades.extend(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or len(trades) >= limit:
+            return trades, encode_cursor(last_key)
+        query['ExclusiveStartKey'] = last_key
+
+
+def iter_trades(trades_table, user_id, start=None, end=None, symbol=None):
+    """Every trade in the range, oldest first, one page at a time."""
+    query = base_query(user_id, start, end, symbol, newest_first=False)
+    while True:
+        response = trades_table.query(**query)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def in_execution_order(trades):
+    """
+    trades (oldest first) with the trades of each second sorted by sequence.
+    Only one second's trades are held at a time.
+    """
+    same_second = []
+    for trade in trades:
+        if same_second and trade['timestamp'] != same_second[0]['timestamp']:
+            yield from sorted(same_second, key=lambda t: t.get('sequence', 0))
+            same_second = []
+        same_second.append(trade)
+    yield from sorted(same_second, key=lambda t: t.get('sequence', 0))
+
+
+def summarize(trades):
+    """
+    Per-symbol figures in one pass over trades (oldest first): counts, quantities,
+    buy and sell VWAP, and realized P/L against the running average cost, the
+    same basis api_execute_trade keeps avg_price on. Only trades in the range
+    count, so a range that starts mid-position realizes against the cost of
+    the buys it contains.
+    """
+    symbols = {}
+    for trade in in_execution_order(trades):
+        quantity = Decimal(trade['quantity'])
+        price = Decimal(trade['price'])
+        stats = symbols.setdefault(trade['symbol'], {
+            'trades': 0, 'buys': 0, 'sells': 0,
+            'quantity_bought': Decimal('0'), 'quantity_sold': Decimal('0'),
+            'bought_value': Decimal('0'), 'sold_value': Decimal('0'),
+            'position': Decimal('0'), 'avg_cost': Decimal('0'),
+            'realized_profit_loss': Decimal('0'),
+            'first_timestamp': trade['timestamp']
+        })
+        stats['trades'] += 1
+        stats['last_timestamp'] = trade['timestamp']
+
+        if trade['action'] == 'buy':
+            stats['buys'] += 1
+            stats['quantity_bought'] += quantity
+            stats['bought_value'] += quantity * price
+            position = stats['position'] + quantity
+            stats['avg_cost'] = (stats['avg_cost'] * stats['position'] + quantity * price) / position
+            stats['position'] = position
+        else:
+            stats['sells'] += 1
+            stats['quantity_sold'] += quantity
+            stats['sold_value'] += quantity * price
+            matched = min(quantity, stats['position'])
+            stats['realized_profit_loss'] += (price - stats['avg_cost']) * matched
+            stats['position'] -= matched
+
+    summary = {}
+    for symbol, stats in symbols.items():
+        summary[symbol] = {
+            'trades': stats['trades'],
+            'buys': stats['buys'],
+            'sells': stats['sells'],
+            'quantity_bought': stats['quantity_bought'],
+            'quantity_sold': stats['quantity_sold'],
+            'buy_vwap': stats['bought_value'] / stats['quantity_bought'] if stats['quantity_bought'] else None,
+            'sell_vwap': stats['sold_value'] / stats['quantity_sold'] if stats['quantity_sold'] else None,
+            'realized_profit_loss': stats['realized_profit_loss'],
+            'open_quantity': stats['position'],
+            'first_timestamp': stats['first_timestamp'],
+            'last_timestamp': stats['last_timestamp']
+        }
+    return summary
@@ -0,0 +1,191 @@
+import json
+import os
+import aws_clients
+import metrics
+import heapq
+import market_data_cache
+from price_lookup import lookup_for
+from valuation import batch_portfolio_values, value_portfolio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+import time
+
+dynamodb = aws_clients.lazy_resource('dynamodb')
+dynamodb_client = aws_clients.lazy_client('dynamodb')
+s3_client = aws_clients.lazy_client('s3')
+
+LEADERBOARD_PERIOD = 'all_time'
+INITIAL_INVESTMENT = Decimal('100000')
+
+# Rank 0 of every period holds the metadata (user count, entry count, build time),
+# so the API gets entries and metadata from a single Query.
+METADATA_RANK = 0
+
+# Users valued together in one vectorized pass
+VALUATION_CHUNK_SIZE = 1000
+
+
+def scan_segment(users_table_name, segment, total_segments):
+    """Yield every user in one parallel-scan segment, following pagination."""
+    paginator = dynamodb_client.get_paginator('scan')
+    pages = paginator.paginate(
+        TableName=users_table_name,
+        Segment=segment,
+        TotalSegments=total_segments,
+        ProjectionExpression='user_id, username, balance, portfolio, total_trades'
+    )
+    for page in pages:
+        for item in page.get('Items', []):
+            yield aws_clients.deserialize_item(item)
+
+
+def value_user(user, prices):
+    """Leaderboard entry for one user with exact Decimal figures, valued at prices."""
+    user_id = user['user_id']
+    balance = user.get('balance', INITIAL_INVESTMENT)
+
+    _, portfolio_value, _ = value_portfolio(user.get('portfolio', {}), prices)
+
+    total_value = balance + portfolio_value
+    profit_loss = total_value - INITIAL_INVESTMENT
+
+    return {
+        'user_id': user_id,
+        'username': user.get('username', user_id[:8]),
+        'total_value': total_value,
+        'profit_loss': profit_loss,
+        'profit_loss_percent': profit_loss / INITIAL_INVESTMENT * 100,
+        'total_trades': int(user.get('total_trades', 0)),
+        'balance': balance,
+        'portfolio_value': portfolio_value
+    }
+
+
+def chunked(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def top_users_for_segment(users_table_name, segment, total_segments, prices, size):
+    """
+    Rank every user in a scan segment by approximate profit, valuing users a chunk
+    at a time in one vectorized pass, and keep only the best `size` in a bounded
+    min-heap. Returns ([(profit, user_id, user)], users_seen).
+    """
+    heap = []
+    users_seen = 0
+    initial_investment = float(INITIAL_INVESTMENT)
+
+    for users in chunked(scan_segment(users_table_name, segment, total_segments), VALUATION_CHUNK_SIZE):
+        users_seen += len(users)
+        with metrics.span('valuation'):
+            market_values, _ = batch_portfolio_values([user.get('portfolio', {}) for user in users], prices)
+
+        for user, market_value in zip(users, market_values.tolist()):
+            profit = float(user.get('balance', INITIAL_INVESTMENT)) + market_value - initial_investment
+            item = (profit, user['user_id'], user)
+
+            if len(heap) < size:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    return heap, users_seen
+
+
+@metrics.instrument('leaderboard_builder')
+def lambda_handler(event, context):
+    """
+    Materializes the leaderboard: values every user's portfolio at the current
+    second, keeps the top entries, and writes them ranked into the leaderboard
+    table so the leaderboard API is a single Query.
+    Triggered every minute by EventBridge.
+    """
+    users_table_name = os.environ['USERS_TABLE']
+    leaderboard_table_name = os.environ['LEADERBOARD_TABLE']
+    market_data_bucket = os.environ['MARKET_DATA_BUCKET']
+    size = int(os.environ.get('LEADERBOARD_SIZE', '100'))
+    total_segments = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+    leaderboard_table = dynamodb.Table(leaderboard_table_name)
+    started = time.time()
+
+    try:
+        window = market_data_cache.get_price_window(s3_client, market_data_bucket)
+        prices = lookup_for(window).prices()
+    except Exception as e:
+        print(f"Warning: No price data available, valuing cash only: {str(e)}")
+        prices = {}
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        results = list(executor.map(
+            lambda segment: top_users_for_segment(
+                users_table_name, segment, total_segments, prices, size
+            ),
+            range(total_segments)
+        ))
+
+    total_users = sum(users_seen for _, users_seen in results)
+    candidates = heapq.nlargest(size, (item for heap, _ in results for item in heap), key=lambda item: item[:2])
+
+    # Exact figures only for the entries that are actually published
+    top_entries = sorted(
+        (value_user(user, prices) for _, _, user in candidates),
+        key=lambda e: (e['profit_loss'], e['user_id']),
+        reverse=True
+    )
+
+    try:
+        previous = leaderboard_table.get_item(
+            Key={'period': LEADERBOARD_PERIOD, 'rank': METADATA_RANK}
+        ).get('Item', {})
+        previous_entries = int(previous.get('entries', 0))
+    except Exception as e:
+        print(f"Warning: Could not read previous leaderboard metadata: {str(e)}")
+        previous_entries = size
+
+    updated_at = int(time.time())
+
+    with leaderboard_table.batch_writer() as batch:
+        for rank, entry in enumerate(top_entries, start=1):
+            batch.put_item(Item=dict(
+                entry,
+                period=LEADERBOARD_PERIOD,
+                rank=rank,
+                total_profit=entry['profit_loss'],
+                updated_at=updated_at
+            ))
+
+        # Drop ranks left over from a previous, longer leaderboard
+        for rank in range(len(top_entries) + 1, previous_entries + 1):
+            batch.delete_item(Key={'period': LEADERBOARD_PERIOD, 'rank': rank})
+
+        batch.put_item(Item={
+            'period': LEADERBOARD_PERIOD,
+            'rank': METADATA_RANK,
+            'total_users': total_users,
+            'entries': len(top_entries),
+            'updated_at': updated_at,
+            'datetime': datetime.utcnow().isoformat()
+        })
+
+    print(f"✅ Leaderboard built: {len(top_entries)} entries from {total_users} users in {time.time() - started:.2f}s")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Leaderboard materialized successfully',
+            'period': LEADERBOARD_PERIOD,
+            'entries': len(top_entries),
+            'total_users': total_users,
+            'timestamp': updated_at
+        })
+    }
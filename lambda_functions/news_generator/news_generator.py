@@ -1,49 +1,28 @@
 import json
 import os
-import boto3
+import aws_clients
+import metrics
 from datetime import datetime
 import time
 import random
-from huggingface_hub import InferenceClient
+from news_inference import MAX_HEADLINE_LENGTH, clean_generated_text, generate_all, parse_headline_article
+from price_history_store import load_history
+import news_log
+import prompt_cache
 
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
-def generate_ai_news_with_huggingface(api_key, prompt):
-    """
-    Generate AI news using Hugging Face InferenceClient.
-    Uses Llama 3.2 1B Instruct model for fast, quality text generation.
-    """
-    try:
-        client = InferenceClient(token=api_key)
-
-        messages = [
-            {"role": "user", "content": f"Write a brief, neutral financial news article (2-3 sentences) about: {prompt}. Do not include specific numbers or percentages."}
-        ]
-
-        response = client.chat_completion(
-            messages=messages,
-            model="meta-llama/Llama-3.2-1B-Instruct",
-            max_tokens=100,
-            temperature=0.7
-        )
-
-        generated_text = response.choices[0].message.content.strip()
+# Seconds of the invocation kept back for saving the news after generating it
+SAVE_RESERVE_SECONDS = 15
+DEFAULT_GENERATION_BUDGET_SECONDS = 45
 
-        sentences = generated_text.split('.')[:3]
-        clean_text = '. '.join(s.strip() for s in sentences if s.strip())
-        if clean_text and not clean_text.endswith('.'):
-            clean_text += '.'
+# Model calls slower than this are answered from the prompt cache when it can
+DEFAULT_SLOW_SECONDS = 8
 
-        return clean_text if clean_text else None
-
-    except Exception as e:
-        print(f"Error calling Hugging Face API: {str(e)}")
-        return None
-
-
-def generate_market_wide_news(movements, timestamp, api_key):
+def plan_market_wide_news(movements):
     """
-    Generate market-wide news using Hugging Face AI, connected to a specific asset prediction.
+    Plan market-wide news connected to a specific asset prediction: the topic, the
+    prompts for the article and headline, and the template fallbacks.
     """
     currency_info = {
         'EURUSD=X': ('Euro', 'US Dollar', 'European Central Bank', 'Federal Reserve'),
@@ -88,30 +67,22 @@ def generate_market_wide_news(movements, timestamp, api_key):
         ]
 
     topic = random.choice(topics)
-    prompt = f"Write a brief, neutral financial news article (2-3 sentences) about {topic}. Do not include specific numbers or percentages."
-
-    article = generate_ai_news_with_huggingface(api_key, prompt)
-
-    if not article:
-        article = "Currency markets continue responding to evolving economic conditions. Traders are monitoring central bank policies and economic indicators for guidance on future exchange rate movements."
-
-    headline_prompt = f"Write a short, neutral news headline (max 10 words) about: {topic}"
-    headline = generate_ai_news_with_huggingface(api_key, headline_prompt)
-
-    if not headline or len(headline) > 100:
-        headline = "Currency Markets React to Economic Developments"
 
     return {
-        'headline': headline.strip(),
-        'article': article.strip(),
         'category': 'market_wide',
-        'sentiment': 'neutral'
+        'sentiment': 'neutral',
+        'topic': topic,
+        'article_prompt': f"Write a brief, neutral financial news article (2-3 sentences) about {topic}. Do not include specific numbers or percentages.",
+        'headline_prompt': f"Write a short, neutral news headline (max 10 words) about: {topic}",
+        'fallback_article': "Currency markets continue responding to evolving economic conditions. Traders are monitoring central bank policies and economic indicators for guidance on future exchange rate movements.",
+        'fallback_headline': "Currency Markets React to Economic Developments"
     }
 
 
-def generate_sector_news(movements, timestamp, api_key):
+def plan_sector_news(movements):
     """
-    Generate forex sector news using Hugging Face AI, connected to a specific asset prediction.
+    Plan forex sector news connected to a specific asset prediction: the topic, the
+    prompts for the article and headline, and the template fallbacks.
     """
     currency_info = {
         'EURUSD=X': ('EUR/USD', 'Euro', 'US Dollar'),
@@ -150,30 +121,22 @@ def generate_sector_news(movements, timestamp, api_key):
         ]
 
     topic = random.choice(topics)
-    prompt = f"Write a brief, neutral forex market update (2-3 sentences) about {topic}. Do not include specific numbers or percentages."
-
-    article = generate_ai_news_with_huggingface(api_key, prompt)
-
-    if not article:
-        article = "Currency pairs showed varying activity as traders assessed economic data. Major currencies continue responding to shifts in monetary policy expectations."
-
-    headline_prompt = f"Write a short, neutral forex news headline (max 10 words) about: {topic}"
-    headline = generate_ai_news_with_huggingface(api_key, headline_prompt)
-
-    if not headline or len(headline) > 100:
-        headline = "Forex Markets Show Mixed Trading Patterns"
 
     return {
-        'headline': headline.strip(),
-        'article': article.strip(),
         'category': 'sector',
-        'sentiment': 'neutral'
+        'sentiment': 'neutral',
+        'topic': topic,
+        'article_prompt': f"Write a brief, neutral forex market update (2-3 sentences) about {topic}. Do not include specific numbers or percentages.",
+        'headline_prompt': f"Write a short, neutral forex news headline (max 10 words) about: {topic}",
+        'fallback_article': "Currency pairs showed varying activity as traders assessed economic data. Major currencies continue responding to shifts in monetary policy expectations.",
+        'fallback_headline': "Forex Markets Show Mixed Trading Patterns"
     }
 
 
-def generate_geopolitical_news(movements, timestamp, api_key):
+def plan_geopolitical_news(movements):
     """
-    Generate geopolitical news using Hugging Face AI, connected to a specific asset prediction.
+    Plan geopolitical news connected to a specific asset prediction: the topic, the
+    prompts for the article and headline, and the template fallbacks.
     """
     currency_info = {
         'EURUSD=X': ('EUR/USD', 'Euro', 'US Dollar', 'Eurozone', 'United States'),
@@ -211,30 +174,22 @@ def generate_geopolitical_news(movements, timestamp, api_key):
         ]
 
     topic = random.choice(topics)
-    prompt = f"Write a brief, neutral financial news update (2-3 sentences) about {topic}. Do not include specific numbers or percentages."
-
-    article = generate_ai_news_with_huggingface(api_key, prompt)
-
-    if not article:
-        article = "Global markets continue monitoring geopolitical developments. Traders are evaluating how international events may influence currency valuations and trading strategies."
-
-    headline_prompt = f"Write a short, neutral news headline (max 10 words) about: {topic}"
-    headline = generate_ai_news_with_huggingface(api_key, headline_prompt)
-
-    if not headline or len(headline) > 100:
-        headline = "Global Events Shape Market Outlook"
 
     return {
-        'headline': headline.strip(),
-        'article': article.strip(),
         'category': 'geopolitical',
-        'sentiment': 'neutral'
+        'sentiment': 'neutral',
+        'topic': topic,
+        'article_prompt': f"Write a brief, neutral financial news update (2-3 sentences) about {topic}. Do not include specific numbers or percentages.",
+        'headline_prompt': f"Write a short, neutral news headline (max 10 words) about: {topic}",
+        'fallback_article': "Global markets continue monitoring geopolitical developments. Traders are evaluating how international events may influence currency valuations and trading strategies.",
+        'fallback_headline': "Global Events Shape Market Outlook"
     }
 
 
-def generate_economic_data_news(movements, timestamp, api_key):
+def plan_economic_data_news(movements):
     """
-    Generate economic data news using Hugging Face AI, connected to a specific asset prediction.
+    Plan economic data news connected to a specific asset prediction: the topic, the
+    prompts for the article and headline, and the template fallbacks.
     """
     currency_info = {
         'EURUSD=X': ('EUR/USD', 'Euro', 'US Dollar', 'Eurozone', 'US'),
@@ -272,25 +227,82 @@ def generate_economic_data_news(movements, timestamp, api_key):
         ]
 
     topic = random.choice(topics)
-    prompt = f"Write a brief, neutral economic news update (2-3 sentences) about {topic}. Do not include specific numbers or percentages."
 
-    article = generate_ai_news_with_huggingface(api_key, prompt)
+    return {
+        'category': 'economic',
+        'sentiment': 'neutral',
+        'topic': topic,
+        'article_prompt': f"Write a brief, neutral economic news update (2-3 sentences) about {topic}. Do not include specific numbers or percentages.",
+        'headline_prompt': f"Write a short, neutral news headline (max 10 words) about: {topic}",
+        'fallback_article': "Economic indicators continue drawing attention from market participants. Analysts are evaluating recent data releases for insights into future economic trends.",
+        'fallback_headline': "Economic Data Continues to Guide Markets"
+    }
 
-    if not article:
-        article = "Economic indicators continue drawing attention from market participants. Analysts are evaluating recent data releases for insights into future economic trends."
 
-    headline_prompt = f"Write a short, neutral news headline (max 10 words) about: {topic}"
-    headline = generate_ai_news_with_huggingface(api_key, headline_prompt)
+def combined_prompt(plan):
+    """One prompt asking for the plan's headline and article as labelled sections."""
+    return (
+        f"{plan['article_prompt']} Also write a short, neutral headline (max 10 words) for it. "
+        "Reply in exactly this format:\nHEADLINE: <headline>\nARTICLE: <article>"
+    )
 
-    if not headline or len(headline) > 100:
-        headline = "Economic Data Continues to Guide Markets"
 
-    return {
-        'headline': headline.strip(),
-        'article': article.strip(),
-        'category': 'economic',
-        'sentiment': 'neutral'
-    }
+def generate_news(plans, api_key, deadline, mode=None, cache=None):
+    """
+    Generate the article and headline of every plan with all model calls in
+    flight at once. Pieces that fail, miss the deadline or cannot be parsed use
+    the plan's template fallbacks.
+
+    In 'combined' mode (the default, NEWS_GENERATION_MODE) each plan is one
+    completion holding both headline and article; 'separate' mode makes one
+    call for the article and another for the headline. With a PromptCache,
+    repeated prompts are answered from cached completions and slow or failed
+    calls fall back to them before the templates.
+    """
+    slow_after = float(os.environ.get('PROMPT_CACHE_SLOW_SECONDS', DEFAULT_SLOW_SECONDS))
+    mode = mode or os.environ.get('NEWS_GENERATION_MODE', 'combined')
+
+    if mode == 'separate':
+        prompts = []
+        for plan in plans:
+            prompts.extend([plan['article_prompt'], plan['headline_prompt']])
+
+        completions = [
+            clean_generated_text(text) if text else None
+            for text in generate_all(api_key, prompts, deadline, cache=cache, slow_after=slow_after)
+        ]
+        pieces = [(completions[2 * i + 1], completions[2 * i]) for i in range(len(plans))]
+    else:
+        completions = generate_all(
+            api_key, [combined_prompt(plan) for plan in plans], deadline,
+            max_tokens=150, cache=cache, slow_after=slow_after
+        )
+        pieces = [parse_headline_article(text) if text else (None, None) for text in completions]
+
+    news_articles = []
+    for plan, (headline, article) in zip(plans, pieces):
+        if not article:
+            article = plan['fallback_article']
+
+        if not headline or len(headline) > MAX_HEADLINE_LENGTH:
+            headline = plan['fallback_headline']
+
+        news_articles.append({
+            'headline': headline.strip(),
+            'article': article.strip(),
+            'category': plan['category'],
+            'sentiment': plan['sentiment']
+        })
+
+    return news_articles
+
+
+NEWS_PLANNERS = {
+    'market': plan_market_wide_news,
+    'sector': plan_sector_news,
+    'geopolitical': plan_geopolitical_news,
+    'economic': plan_economic_data_news
+}
 
 
 def create_asset_specific_news(symbol, past_change_pct, future_change_pct, current_price, sentiment):
@@ -341,10 +353,11 @@ def create_asset_specific_news(symbol, past_change_pct, future_change_pct, curre
     }
 
 
+@metrics.instrument('news_generator')
 def lambda_handler(event, context):
     """
-    Generates 2-3 diverse news articles that are immediately available.
-    Runs every 5 minutes to provide fresh, timely news.
+    Generates 2-3 diverse news articles that are immediately available and
+    appends them to the news log. Runs every 5 minutes to provide fresh, timely news.
     News types: market-wide, sector, geopolitical, economic, asset-specific
     """
     huggingface_api_key = os.environ.get('HUGGINGFACE_API_KEY', '')
@@ -352,15 +365,9 @@ def lambda_handler(event, context):
     news_bucket = os.environ['NEWS_BUCKET']
 
     timestamp = int(time.time())
-    date_str = datetime.utcnow().strftime('%Y-%m-%d')
-    time_str = datetime.utcnow().strftime('%H-%M-%S')
 
     try:
-        response = s3_client.get_object(
-            Bucket=market_data_bucket,
-            Key='collected_prices/rolling_history_60min.json'
-        )
-        history_data = json.loads(response['Body'].read().decode('utf-8'))
+        history_data = load_history(s3_client, market_data_bucket)
         print(f"Loaded price history for {len(history_data['assets'])} assets")
     except Exception as e:
         print(f"Error loading price history: {str(e)}")
@@ -404,42 +411,28 @@ def lambda_handler(event, context):
 
     movements.sort(key=lambda x: x['volatility'], reverse=True)
 
-    news_articles = []
-
-    article_types = ['market', 'sector', 'geopolitical', 'economic']
+    article_types = list(NEWS_PLANNERS)
     selected_types = random.sample(article_types, k=random.randint(2, 3))
 
+    # Leave enough of the invocation to save the news after generating it
+    generation_budget = float(os.environ.get('NEWS_GENERATION_BUDGET_SECONDS', DEFAULT_GENERATION_BUDGET_SECONDS))
+    if context is not None:
+        generation_budget = min(generation_budget, context.get_remaining_time_in_millis() / 1000 - SAVE_RESERVE_SECONDS)
+    deadline = time.monotonic() + max(generation_budget, 1)
+
     print(f"Generating {len(selected_types)} AI news articles using Hugging Face...")
 
-    for article_type in selected_types:
-        if article_type == 'market':
-            news_articles.append(generate_market_wide_news(movements, timestamp, huggingface_api_key))
-        elif article_type == 'sector':
-            news_articles.append(generate_sector_news(movements, timestamp, huggingface_api_key))
-        elif article_type == 'geopolitical':
-            news_articles.append(generate_geopolitical_news(movements, timestamp, huggingface_api_key))
-        elif article_type == 'economic':
-            news_articles.append(generate_economic_data_news(movements, timestamp, huggingface_api_key))
+    cache = prompt_cache.load_cache(s3_client, news_bucket)
 
+    plans = [NEWS_PLANNERS[article_type](movements) for article_type in selected_types]
+    with metrics.span('generation'):
+        news_articles = generate_news(plans, huggingface_api_key, deadline, cache=cache)
 
-    existing_articles = []
+    print(f"Prompt cache: {cache.stats}")
     try:
-        response = s3_client.get_object(
-            Bucket=news_bucket,
-            Key='latest_news.json'
-        )
-        existing_data = json.loads(response['Body'].read().decode('utf-8'))
-        existing_articles = existing_data.get('articles', [])
-
-        existing_articles = [
-            article for article in existing_articles
-            if article.get('timestamp', 0) > timestamp - 3600
-        ]
-        print(f"Loaded {len(existing_articles)} existing articles (filtered to last hour)")
-    except s3_client.exceptions.NoSuchKey:
-        print("No existing news found, starting fresh")
+        prompt_cache.save_cache(s3_client, news_bucket, cache)
     except Exception as e:
-        print(f"Error loading existing news: {str(e)}")
+        print(f"Warning: Could not save prompt cache: {str(e)}")
 
     new_articles = []
     for i, news in enumerate(news_articles):
@@ -460,54 +453,22 @@ def lambda_handler(event, context):
         new_articles.append(news_article)
         print(f"✓ {news['category']} news: '{news['headline'][:50]}...' (immediately available)")
 
-    all_articles = existing_articles + new_articles
-    all_articles.sort(key=lambda x: x.get('publish_at', 0), reverse=True)
-
-    news_data = {
-        'timestamp': timestamp,
-        'datetime': datetime.utcnow().isoformat(),
-        'articles': all_articles,
-        'total_articles': len(all_articles),
-        'new_articles': len(new_articles),
-        'publication_period': '5 minutes',
-        'based_on_past_hour': True,
-        'predictions_for_next_hour': True
-    }
-
-    s3_key = f"{date_str}/{time_str}_news.json"
-
+    # Appended as its own immutable shard; the log is read back by api_get_news
     try:
-        s3_client.put_object(
-            Bucket=news_bucket,
-            Key=s3_key,
-            Body=json.dumps(news_data, indent=2),
-            ContentType='application/json'
-        )
+        s3_key = news_log.append_articles(s3_client, news_bucket, timestamp, new_articles)
         print(f"News saved to s3://{news_bucket}/{s3_key}")
     except Exception as e:
         print(f"Error saving news to S3: {str(e)}")
         raise
 
-    latest_key = "latest_news.json"
-    try:
-        s3_client.put_object(
-            Bucket=news_bucket,
-            Key=latest_key,
-            Body=json.dumps(news_data, indent=2),
-            ContentType='application/json'
-        )
-        print(f"Latest news updated at s3://{news_bucket}/{latest_key}")
-    except Exception as e:
-        print(f"Error updating latest news: {str(e)}")
-
     return {
         'statusCode': 200,
         'body': json.dumps({
-            'message': f'Generated {len(new_articles)} new articles, {len(all_articles)} total available',
+            'message': f'Generated {len(new_articles)} new articles',
             's3_key': s3_key,
             'new_articles_count': len(new_articles),
-            'total_articles_count': len(all_articles),
             'timestamp': timestamp,
+            'prompt_cache': cache.stats,
             'categories': {
                 'market_wide': sum(1 for a in new_articles if a['category'] == 'market_wide'),
                 'sector': sum(1 for a in new_articles if a['category'] == 'sector'),
@@ -0,0 +1,181 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from prompt_cache import prompt_key
+
+MODEL = "meta-llama/Llama-3.2-1B-Instruct"
+REQUEST_TIMEOUT_SECONDS = 20
+MAX_WORKERS = 8
+
+HEADLINE_LABEL = re.compile(r'^\W*headline\W*:', re.IGNORECASE | re.MULTILINE)
+ARTICLE_LABEL = re.compile(r'(?:^|\s)\W*(?:article|body|story)\s*:', re.IGNORECASE | re.MULTILINE)
+MAX_HEADLINE_LENGTH = 100
+
+# Reused across prompts and warm invocations so connections to the endpoint stay alive
+_client = None
+_client_key = None
+
+
+def get_client(api_key):
+    """
+    Shared InferenceClient. HUGGINGFACE_BASE_URL points it at another
+    OpenAI-compatible endpoint, e.g. local/fake_inference_server.py.
+
+    huggingface_hub is imported here rather than at module level: it takes
+    longer to import than the rest of the function together, and runs without
+    a model to call (see model_available) never get this far.
+    """
+    global _client, _client_key
+    if _client is None or _client_key != api_key:
+        from huggingface_hub import InferenceClient
+        _client = InferenceClient(
+            token=api_key or None,
+            base_url=os.environ.get('HUGGINGFACE_BASE_URL') or None,
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+        _client_key = api_key
+    return _client
+
+
+def model_available(api_key):
+    """Whether completions can be requested: a token, or a local endpoint that needs none."""
+    return bool(api_key or os.environ.get('HUGGINGFACE_BASE_URL'))
+
+
+def clean_generated_text(generated_text):
+    """Keep at most the first three sentences, ending with a full stop."""
+    sentences = generated_text.strip().split('.')[:3]
+    clean_text = '. '.join(s.strip() for s in sentences if s.strip())
+    if clean_text and not clean_text.endswith('.'):
+        clean_text += '.'
+    return clean_text if clean_text else None
+
+
+def parse_headline_article(generated_text):
+    """
+    Split a combined completion into (headline, article).
+
+    Expects "HEADLINE: ..." and "ARTICLE: ..." sections, tolerating markdown
+    emphasis, quotes, either order, both on one line, or no labels at all when
+    a short first line is followed by the article. Returns (None, None) when no
+    headline can be found, so callers fall back to templates.
+    """
+    text = generated_text.replace('**', '').replace('__', '').strip()
+
+    headline_match = HEADLINE_LABEL.search(text)
+    article_match = ARTICLE_LABEL.search(text)
+
+    if not headline_match:
+        # Unlabelled reply: accept a short first line followed by the article
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) < 2 or len(lines[0]) > MAX_HEADLINE_LENGTH:
+            return None, None
+        headline, article = lines[0], ' '.join(lines[1:])
+    elif article_match and article_match.start() > headline_match.start():
+        headline = text[headline_match.end():article_match.start()]
+        article = text[article_match.end():]
+    elif article_match:
+        article = text[article_match.end():headline_match.start()]
+        headline = text[headline_match.end():]
+    else:
+        # Headline label only: the headline is its line, the article what follows
+        lines = text[headline_match.end():].strip().split('\n', 1)
+        headline = lines[0]
+        article = lines[1] if len(lines) > 1 else ''
+
+    headline = headline.strip().splitlines()[0].strip(' "\'#*') if headline.strip() else ''
+    article = ' '.join(article.split())
+
+    return (headline or None), (clean_generated_text(article) if article else None)
+
+
+def generate_text(client, prompt, max_tokens=100):
+    """
+    Generate text for one prompt using Llama 3.2 1B Instruct.
+    Returns the raw completion, or None if the call failed.
+    """
+    try:
+        response = client.chat_completion(
+            messages=[{"role": "user", "content": prompt}],
+            model=MODEL,
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        return (response.choices[0].message.content or '').strip() or None
+
+    except Exception as e:
+        print(f"Error calling Hugging Face API: {str(e)}")
+        return None
+
+
+def generate_all(api_key, prompts, deadline, max_tokens=100, cache=None, slow_after=None):
+    """
+    Run every prompt concurrently over the shared client.
+
+    deadline is a time.monotonic() value; prompts still running when it passes
+    are abandoned. With a PromptCache, prompts it can answer are not sent at
+    all, new completions are stored as variants, and prompts that fail, miss
+    the deadline or are still running after slow_after seconds are answered
+    from retained variants when there are any.
+
+    Returns one raw completion per prompt, in order, with None for prompts that
+    could not be answered so callers can fall back.
+    """
+    unique_prompts = list(dict.fromkeys(prompts))
+    keys = {prompt: prompt_key(MODEL, prompt, max_tokens) for prompt in unique_prompts}
+    completions = {}
+
+    pending = []
+    for prompt in unique_prompts:
+        cached = cache.lookup(keys[prompt]) if cache else None
+        if cached is not None:
+            completions[prompt] = cached
+        else:
+            pending.append(prompt)
+
+    if pending and not model_available(api_key):
+        print(f"No Hugging Face API key, {len(pending)} prompts left to cached and template fallbacks")
+        pending = []
+
+    if pending:
+        client = get_client(api_key)
+        executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(pending)))
+        futures = {
+            executor.submit(generate_text, client, prompt, max_tokens): prompt
+            for prompt in pending
+        }
+
+        def collect(done):
+            for future in done:
+                prompt = futures[future]
+                text = future.result()
+                if text and cache:
+                    cache.store(keys[prompt], text)
+                completions[prompt] = text
+
+        not_done = set(futures)
+        if cache and slow_after is not None:
+            done, not_done = wait(not_done, timeout=max(min(deadline, time.monotonic() + slow_after) - time.monotonic(), 0))
+            collect(done)
+
+            # Slow prompts with a retained variant are answered from the cache
+            for future in list(not_done):
+                cached = cache.fallback(keys[futures[future]])
+                if cached is not None:
+                    completions[futures[future]] = cached
+                    not_done.discard(future)
+
+        done, not_done = wait(not_done, timeout=max(deadline - time.monotonic(), 0))
+        executor.shutdown(wait=False, cancel_futures=True)
+        collect(done)
+
+        if not_done:
+            print(f"Generation deadline reached, {len(not_done)} of {len(futures)} prompts unanswered")
+
+    if cache:
+        for prompt in unique_prompts:
+            if not completions.get(prompt):
+                completions[prompt] = cache.fallback(keys[prompt])
+
+    return [completions.get(prompt) for prompt in prompts]
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import random
+import time
+
+# Prompt-keyed cache of model completions for news generation.
+#
+# The news topics are a small set of templates crossed with the tracked pairs,
+# so the same prompts come back run after run. Entries are keyed by a hash of
+# model, token limit and prompt and hold several completions ("variants"), so a
+# cached answer does not repeat the same article every time.
+#
+# - Once a prompt has max_variants fresh variants it is answered from the cache
+#   without calling the model; variants older than ttl_seconds no longer count.
+# - When the model fails, is slow or misses the run's deadline, any variant
+#   still retained (up to retain_seconds old) is served instead of a template.
+# - Entries are evicted least recently used beyond max_entries.
+#
+# The cache is one JSON document in the news bucket, or a local file when
+# PROMPT_CACHE_PATH is set.
+
+CACHE_KEY = 'cache/prompt_cache.json'
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_RETAIN_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_VARIANTS = 5
+
+
+def prompt_key(model, prompt, max_tokens):
+    """Content address of one model request."""
+    return hashlib.sha256(f"{model}\n{max_tokens}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+class PromptCache:
+    """Variants per prompt key with TTL, LRU eviction and hit/miss counters."""
+
+    def __init__(self, entries=None, ttl_seconds=DEFAULT_TTL_SECONDS, retain_seconds=DEFAULT_RETAIN_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_variants=DEFAULT_MAX_VARIANTS):
+        self.entries = entries or {}
+        self.ttl_seconds = ttl_seconds
+        self.retain_seconds = retain_seconds
+        self.max_entries = max_entries
+        self.max_variants = max_variants
+        self.stats = {'hits': 0, 'misses': 0, 'fallback_hits': 0, 'stores': 0, 'evictions': 0}
+        self.dirty = False
+
+    @classmethod
+    def from_env(cls, entries=None):
+        return cls(
+            entries,
+            ttl_seconds=int(os.environ.get('PROMPT_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.environ.get('PROMPT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            max_variants=int(os.environ.get('PROMPT_CACHE_VARIANTS', DEFAULT_MAX_VARIANTS))
+        )
+
+    def _touch(self, entry, now):
+        entry['last_used'] = now
+        self.dirty = True
+
+    def lookup(self, key, now=None):
+        """A cached variant if the key has a full set of fresh ones, else None (a miss)."""
+        now = now or time.time()
+        entry = self.entries.get(key)
+        fresh = [v for v in entry['variants'] if now - v['created'] < self.ttl_seconds] if entry else []
+
+        if len(fresh) >= self.max_variants:
+            self.stats['hits'] += 1
+            self._touch(entry, now)
+            return random.choice(fresh)['text']
+
+        self.stats['misses'] += 1
+        return None
+
+    def fallback(self, key, now=None):
+        """Any retained variant for a prompt the model could not answer in time, else None."""
+        now = now or time.time()
+        entry = self.entries.get(key)
+        if not entry or not entry['variants']:
+            return None
+
+        self.stats['fallback_hits'] += 1
+        self._touch(entry, now)
+        return random.choice(entry['variants'])['text']
+
+    def store(self, key, text, now=None):
+        """Add a completion as the newest variant of key, dropping the oldest beyond max_variants."""
+        now = now or time.time()
+        entry = self.entries.setdefault(key, {'variants': [], 'last_used': now})
+        entry['variants'].append({'text': text, 'created': now})
+        entry['variants'] = entry['variants'][-self.max_variants:]
+        self.stats['stores'] += 1
+        self._touch(entry, now)
+
+    def evict(self, now=None):
+        """Drop variants past retention, then least recently used entries beyond max_entries."""
+        now = now or time.time()
+        for key in list(self.entries):
+            entry = self.entries[key]
+            entry['variants'] = [v for v in entry['variants'] if now - v['created'] < self.retain_seconds]
+            if not entry['variants']:
+                del self.entries[key]
+                self.stats['evictions'] += 1
+
+        if len(self.entries) > self.max_entries:
+            by_last_use = sorted(self.entries, key=lambda k: self.entries[k]['last_used'])
+            for key in by_last_use[:len(self.entries) - self.max_entries]:
+                del self.entries[key]
+                self.stats['evictions'] += 1
+
+    def to_dict(self):
+        return {'entries': self.entries, 'updated_at': int(time.time())}
+
+
+def load_cache(s3_client, bucket):
+    """The persisted cache, or an empty one if there is none yet or it cannot be read."""
+    path = os.environ.get('PROMPT_CACHE_PATH')
+    try:
+        if path:
+            with open(path) as f:
+                data = json.load(f)
+        else:
+            response = s3_client.get_object(Bucket=bucket, Key=CACHE_KEY)
+            data = json.loads(response['Body'].read().decode('utf-8'))
+        return PromptCache.from_env(data.get('entries', {}))
+    except s3_client.exceptions.NoSuchKey:
+        return PromptCache.from_env()
+    except FileNotFoundError:
+        return PromptCache.from_env()
+    except Exception as e:
+        print(f"Warning: Could not load prompt cache, starting empty: {str(e)}")
+        return PromptCache.from_env()
+
+
+def save_cache(s3_client, bucket, cache):
+    """Evict and persist the cache if anything changed."""
+    if not cache.dirty:
+        return
+
+    cache.evict()
+    body = json.dumps(cache.to_dict(), separators=(',', ':'))
+    path = os.environ.get('PROMPT_CACHE_PATH')
+    if path:
+        with open(path, 'w') as f:
+            f.write(body)
+    else:
+        s3_client.put_object(Bucket=bucket, Key=CACHE_KEY, Body=body, ContentType='application/json')
+    cache.dirty = False
@@ -1,16 +1,24 @@
 import json
 import os
-import boto3
-import requests
+import aws_clients
+import metrics
+from quote_fetcher import fetch_quotes
+from price_history_store import write_minute_shard
 from datetime import datetime
 import time
 
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
+# Seconds of the invocation kept back for saving the shard to S3
+SAVE_RESERVE_SECONDS = 15
+DEFAULT_FETCH_BUDGET_SECONDS = 60
+
+@metrics.instrument('price_collector')
 def lambda_handler(event, context):
     """
     Collects current prices using Yahoo Finance query API every minute.
-    Maintains a rolling 60-minute (1 hour) history for each asset (60 datapoints x 1min).
+    Each run is stored as its own immutable minute shard; readers assemble the
+    rolling 60-minute (1 hour) history for each asset (60 datapoints x 1min) from the shards.
     This data is used by price_simulator to generate 600 simulated prices (1 per second for 10 min).
     """
     market_data_bucket = os.environ['MARKET_DATA_BUCKET']
@@ -19,113 +27,59 @@ def lambda_handler(event, context):
     current_timestamp = int(time.time())
     current_datetime = datetime.utcnow()
 
-    try:
-        response = s3_client.get_object(
-            Bucket=market_data_bucket,
-            Key='collected_prices/rolling_history_60min.json'
-        )
-        history_data = json.loads(response['Body'].read().decode('utf-8'))
-        print(f"Loaded existing history with {len(history_data.get('assets', {}))} assets")
-    except s3_client.exceptions.NoSuchKey:
-        print("No existing history found, creating new")
-        history_data = {
-            'created_at': current_datetime.isoformat(),
-            'assets': {}
-        }
-
-    newly_fetched = 0
-    for symbol in assets_to_track:
-        try:
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1m&range=1d"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if 'chart' in data and 'result' in data['chart'] and len(data['chart']['result']) > 0:
-                result = data['chart']['result'][0]
-                meta = result.get('meta', {})
-
-                current_price = meta.get('regularMarketPrice')
+    # Leave enough of the invocation to save the shard after fetching
+    if context is not None:
+        fetch_budget = context.get_remaining_time_in_millis() / 1000 - SAVE_RESERVE_SECONDS
+    else:
+        fetch_budget = DEFAULT_FETCH_BUDGET_SECONDS
+    deadline = time.monotonic() + max(fetch_budget, 1)
 
-                if current_price and current_price > 0:
-                    high = meta.get('regularMarketDayHigh', current_price)
-                    low = meta.get('regularMarketDayLow', current_price)
-                    open_price = meta.get('regularMarketOpen', current_price)
-                    previous_close = meta.get('previousClose', current_price)
+    quotes, errors = fetch_quotes(
+        assets_to_track,
+        deadline,
+        batch_size=int(os.environ.get('QUOTE_BATCH_SIZE', '1'))
+    )
 
-                    if symbol not in history_data['assets']:
-                        history_data['assets'][symbol] = {
-                            'symbol': symbol,
-                            'data_points': []
-                        }
+    for symbol, message in errors.items():
+        print(f"✗ {symbol}: {message}")
 
-                    data_point = {
-                        'timestamp': current_timestamp,
-                        'datetime': current_datetime.isoformat(),
-                        'price': float(current_price),
-                        'high': float(high),
-                        'low': float(low),
-                        'open': float(open_price),
-                        'previous_close': float(previous_close)
-                    }
-
-                    history_data['assets'][symbol]['data_points'].append(data_point)
-
-                    if len(history_data['assets'][symbol]['data_points']) > 60:
-                        history_data['assets'][symbol]['data_points'] = \
-                            history_data['assets'][symbol]['data_points'][-60:]
-
-                    count = len(history_data['assets'][symbol]['data_points'])
-                    print(f"✓ {symbol}: ${current_price:.2f} (collected {count}/60 data points)")
-                    newly_fetched += 1
-                else:
-                    print(f"✗ {symbol}: No valid price data")
-            else:
-                print(f"✗ {symbol}: Invalid response structure")
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {symbol}: {str(e)}")
-        except Exception as e:
-            print(f"Unexpected error for {symbol}: {str(e)}")
-
-    history_data['last_updated'] = current_datetime.isoformat()
-    history_data['last_updated_timestamp'] = current_timestamp
-
-    assets_with_full_hour = 0
-    for symbol, asset_data in history_data['assets'].items():
-        if len(asset_data['data_points']) >= 60:
-            assets_with_full_hour += 1
-
-    history_data['stats'] = {
-        'total_assets': len(history_data['assets']),
-        'assets_with_full_hour': assets_with_full_hour,
-        'ready_for_simulation': assets_with_full_hour >= len(assets_to_track) * 0.8  
-    }
+    data_points = {}
+    for symbol in assets_to_track:
+        if symbol not in quotes:
+            continue
+
+        quote = quotes[symbol]
+        data_points[symbol] = {
+            'timestamp': current_timestamp,
+            'datetime': current_datetime.isoformat(),
+            'price': quote['price'],
+            'high': quote['high'],
+            'low': quote['low'],
+            'open': quote['open'],
+            'previous_close': quote['previous_close']
+        }
+        print(f"✓ {symbol}: ${quote['price']:.2f}")
 
-    s3_key = 'collected_prices/rolling_history_60min.json'
     try:
-        s3_client.put_object(
-            Bucket=market_data_bucket,
-            Key=s3_key,
-            Body=json.dumps(history_data, indent=2),
-            ContentType='application/json'
+        s3_key = write_minute_shard(
+            s3_client,
+            market_data_bucket,
+            current_timestamp,
+            current_datetime.isoformat(),
+            data_points
         )
-        print(f"\n✅ History saved: {assets_with_full_hour}/{len(assets_to_track)} assets have full 60min data")
-        print(f"   Ready for simulation: {history_data['stats']['ready_for_simulation']}")
+        print(f"\n✅ Minute shard saved to s3://{market_data_bucket}/{s3_key}: {len(data_points)}/{len(assets_to_track)} assets")
     except Exception as e:
-        print(f"Error saving history to S3: {str(e)}")
+        print(f"Error saving price shard to S3: {str(e)}")
         raise
 
     return {
         'statusCode': 200,
         'body': json.dumps({
-            'message': f'Collected prices for {newly_fetched} assets',
-            'assets_with_full_hour': assets_with_full_hour,
+            'message': f'Collected prices for {len(data_points)} assets',
+            's3_key': s3_key,
             'total_assets': len(assets_to_track),
-            'ready_for_simulation': history_data['stats']['ready_for_simulation'],
+            'failed_assets': sorted(errors),
             'timestamp': current_timestamp
         })
     }
@@ -0,0 +1,141 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = 'https://query1.finance.yahoo.com'
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_WORKERS = 16
+
+# Reused across warm invocations so connections to the quote API stay alive
+_session = None
+
+
+def get_session():
+    """Pooled keep-alive session sized for the fetch thread pool."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+        _session.mount('https://', adapter)
+        _session.mount('http://', adapter)
+        _session.headers.update(REQUEST_HEADERS)
+    return _session
+
+
+def parse_meta(meta):
+    """
+    Turn a chart/spark 'meta' block into a quote, or None if it has no usable price.
+    """
+    current_price = meta.get('regularMarketPrice')
+    if not current_price or current_price <= 0:
+        return None
+
+    return {
+        'price': float(current_price),
+        'high': float(meta.get('regularMarketDayHigh', current_price)),
+        'low': float(meta.get('regularMarketDayLow', current_price)),
+        'open': float(meta.get('regularMarketOpen', current_price)),
+        'previous_close': float(meta.get('previousClose', current_price))
+    }
+
+
+def request_timeout(deadline):
+    """Per-request timeout that never runs past the overall deadline."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError('Fetch deadline reached before request was sent')
+    return min(REQUEST_TIMEOUT_SECONDS, remaining)
+
+
+def fetch_chart_quote(session, base_url, symbol, deadline):
+    """Fetch one symbol from the chart endpoint. Returns {symbol: quote or None}."""
+    response = session.get(
+        f"{base_url}/v8/finance/chart/{symbol}",
+        params={'interval': '1m', 'range': '1d'},
+        timeout=request_timeout(deadline)
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    if 'chart' in data and data['chart'].get('result'):
+        return {symbol: parse_meta(data['chart']['result'][0].get('meta', {}))}
+    raise ValueError('Invalid response structure')
+
+
+def fetch_spark_quotes(session, base_url, symbols, deadline):
+    """Fetch several symbols with one spark call. Returns {symbol: quote or None}."""
+    response = session.get(
+        f"{base_url}/v8/finance/spark",
+        params={'symbols': ','.join(symbols), 'interval': '1m', 'range': '1d'},
+        timeout=request_timeout(deadline)
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    if 'spark' not in data or not data['spark'].get('result'):
+        raise ValueError('Invalid response structure')
+
+    quotes = {}
+    for result in data['spark']['result']:
+        responses = result.get('response') or [{}]
+        quotes[result.get('symbol')] = parse_meta(responses[0].get('meta', {}))
+    return quotes
+
+
+def fetch_quotes(symbols, deadline, base_url=None, batch_size=1):
+    """
+    Fetch quotes for all symbols concurrently over the shared session.
+
+    deadline is a time.monotonic() value; requests still running when it passes
+    are abandoned and reported as errors. With batch_size > 1 symbols are grouped
+    into multi-symbol spark calls, otherwise each symbol gets its own chart call.
+
+    Returns (quotes, errors): symbol -> quote dict, and symbol -> error message.
+    """
+    base_url = base_url or os.environ.get('YAHOO_BASE_URL', DEFAULT_BASE_URL)
+    session = get_session()
+
+    if batch_size > 1:
+        groups = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    else:
+        groups = [[symbol] for symbol in symbols]
+
+    quotes = {}
+    errors = {}
+
+    executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(groups)) or 1)
+    futures = {}
+    for group in groups:
+        if len(group) > 1:
+            future = executor.submit(fetch_spark_quotes, session, base_url, group, deadline)
+        else:
+            future = executor.submit(fetch_chart_quote, session, base_url, group[0], deadline)
+        futures[future] = group
+
+    done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for future in done:
+        group = futures[future]
+        try:
+            results = future.result()
+        except Exception as e:
+            for symbol in group:
+                errors[symbol] = str(e)
+            continue
+
+        for symbol in group:
+            quote = results.get(symbol)
+            if quote:
+                quotes[symbol] = quote
+            else:
+                errors[symbol] = 'No valid price data'
+
+    for future in not_done:
+        for symbol in futures[future]:
+            errors[symbol] = 'Deadline exceeded'
+
+    return quotes, errors
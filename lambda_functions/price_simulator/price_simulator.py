@@ -1,85 +1,187 @@
 import json
 import os
-import boto3
-import random
-import math
-from datetime import datetime, timedelta
+import aws_clients
+import metrics
+from price_window_format import encode_price_window, PriceWindow
+from price_snapshots import encode_price_snapshots
+from simulation_engine import simulate_second_prices, symbol_seed
+from running_stats import ReturnStats
+from price_history_store import load_history, seed_from_legacy
+from simulation_windows import (
+    PRICE_SNAPSHOTS, PRICE_WINDOW, SIMULATED_DATA, WINDOW_SECONDS,
+    read_manifest, update_manifest, window_key, window_start, write_manifest
+)
+from datetime import datetime
 import time
 
-s3_client = boto3.client('s3')
+s3_client = aws_clients.lazy_client('s3')
 
-def calculate_statistics(candles):
+def calculate_statistics(prices):
     """
-    Calculate statistical properties from historical candle data.
-    Returns mean return, volatility, and trend.
+    Calculate statistical properties from a stream of historical prices (oldest first)
+    in a single pass. Returns mean return, volatility, and trend.
     """
-    if len(candles) < 2:
-        return 0, 0.02, 0
+    return ReturnStats.from_prices(prices).summary()
 
-    returns = []
-    for i in range(1, len(candles)):
-        ret = (candles[i]['close'] - candles[i-1]['close']) / candles[i-1]['close']
-        returns.append(ret)
 
-    mean_return = sum(returns) / len(returns) if returns else 0
+def simulate_window(history_data, start_timestamp, timestamp, start_prices=None):
+    """
+    Simulate the 600-second window starting at start_timestamp from the
+    statistics of the collected history. start_prices (symbol -> price), when
+    given, are the previous window's end prices: the window starts from them so
+    consecutive windows join up, and converges on the last collected price by
+    its end so the simulation keeps tracking the market instead of drifting.
+    """
+    start_prices = start_prices or {}
+    start_dt = datetime.utcfromtimestamp(start_timestamp)
 
-    if len(returns) > 1:
-        variance = sum((r - mean_return) ** 2 for r in returns) / (len(returns) - 1)
-        volatility = math.sqrt(variance)
-    else:
-        volatility = 0.02
+    simulated_data = {
+        'timestamp': timestamp,
+        'datetime': datetime.utcfromtimestamp(timestamp).isoformat(),
+        'start_timestamp': start_timestamp,
+        'end_timestamp': start_timestamp + WINDOW_SECONDS,
+        'resolution': '1sec',
+        'assets': {}
+    }
 
-    trend = (candles[-1]['close'] - candles[0]['close']) / candles[0]['close']
+    symbols = []
+    parameters = []
 
-    return mean_return, volatility, trend
+    for symbol, asset_history in history_data['assets'].items():
+        if asset_history is None or not asset_history.get('data_points'):
+            print(f"Skipping {symbol} - no price data available")
+            simulated_data['assets'][symbol] = None
+            continue
 
+        try:
+            last_price = asset_history['data_points'][-1]['price']
+            start_price = start_prices.get(symbol) or last_price
 
-def generate_second_prices(start_price, mean_return, volatility, trend, num_seconds=600):
-    """
-    Generate simulated prices for the next 10 minutes using GBM with historical statistics.
-    Returns list of 600 prices (one per second).
-    """
-    prices = []
-    current_price = start_price
+            prices = (point['price'] for point in asset_history['data_points'])
+            mean_return, volatility, trend = calculate_statistics(prices)
 
-    drift = mean_return + (trend / num_seconds) 
+            print(f"📊 {symbol}: mean_return={mean_return:.6f}, volatility={volatility:.4f}, trend={trend:+.2%}")
 
-    for second in range(num_seconds):
-        dt = 1 / (24 * 60 * 60)  
-        dW = random.gauss(0, math.sqrt(dt))
+            symbols.append(symbol)
+            parameters.append((start_price, last_price, mean_return, volatility, trend))
 
-        price_change = drift * current_price + volatility * current_price * dW
-        new_price = current_price + price_change
+        except Exception as e:
+            print(f"Error simulating {symbol}: {str(e)}")
+            simulated_data['assets'][symbol] = None
 
-        max_change = current_price * 0.05
-        new_price = max(new_price, current_price - max_change)
-        new_price = min(new_price, current_price + max_change)
+    # All symbols x all seconds in one vectorized pass
+    with metrics.span('simulation'):
+        price_matrix = simulate_second_prices(
+            start_prices=[p[0] for p in parameters],
+            mean_returns=[p[2] for p in parameters],
+            volatilities=[p[3] * 2 for p in parameters],
+            trends=[p[4] for p in parameters],
+            seeds=[symbol_seed(start_timestamp, symbol) for symbol in symbols],
+            num_seconds=WINDOW_SECONDS,
+            anchor_prices=[p[1] for p in parameters]
+        ).round(4)
+
+    second_timestamps = [start_timestamp + i for i in range(WINDOW_SECONDS)]
+    second_datetimes = [datetime.fromtimestamp(ts).isoformat() for ts in second_timestamps]
+
+    for symbol, (_, last_price, mean_return, volatility, trend), row in zip(symbols, parameters, price_matrix):
+        simulated_prices = row.tolist()
+
+        second_data = [
+            {
+                'second': i,
+                'timestamp': second_timestamps[i],
+                'datetime': second_datetimes[i],
+                'price': price
+            }
+            for i, price in enumerate(simulated_prices)
+        ]
+
+        simulated_data['assets'][symbol] = {
+            'seconds': second_data,
+            'count': len(second_data),
+            'start_price': simulated_prices[0],
+            'end_price': simulated_prices[-1],
+            'period_high': max(simulated_prices),
+            'period_low': min(simulated_prices),
+            'period_change': simulated_prices[-1] - simulated_prices[0],
+            'period_change_percent': ((simulated_prices[-1] - simulated_prices[0]) / simulated_prices[0] * 100),
+            'based_on': {
+                'historical_mean_return': mean_return,
+                'historical_volatility': volatility,
+                'historical_trend': trend,
+                'historical_last_price': last_price
+            }
+        }
 
-        new_price = max(new_price, start_price * 0.5)
+        change_pct = simulated_data['assets'][symbol]['period_change_percent']
+        print(f"✓ {symbol} {start_dt.strftime('%H:%M')}: Generated {WINDOW_SECONDS} prices, ${simulated_prices[0]:.2f} → ${simulated_prices[-1]:.2f} ({change_pct:+.2f}%)")
 
-        prices.append(round(new_price, 4))
-        current_price = new_price
+    return simulated_data
 
-    return prices
 
+def save_window(market_data_bucket, simulated_data):
+    """
+    Write a window under its versioned keys: the full JSON, the compact columnar
+    copy for the API readers and the pre-rendered /prices bodies for every second.
+    """
+    start_timestamp = simulated_data['start_timestamp']
+    with metrics.span('encode'):
+        window_bytes = encode_price_window(simulated_data)
+        snapshot_bytes = encode_price_snapshots(PriceWindow(window_bytes))
+
+    for name, body, content_type in (
+        (SIMULATED_DATA, json.dumps(simulated_data), 'application/json'),
+        (PRICE_WINDOW, window_bytes, 'application/octet-stream'),
+        (PRICE_SNAPSHOTS, snapshot_bytes, 'application/octet-stream')
+    ):
+        key = window_key(start_timestamp, name)
+        s3_client.put_object(Bucket=market_data_bucket, Key=key, Body=body, ContentType=content_type)
+        print(f"Saved s3://{market_data_bucket}/{key} ({len(body)} bytes)")
+
+
+def load_end_prices(market_data_bucket, start_timestamp):
+    """End price per symbol of an already written window, or None if it does not exist."""
+    try:
+        response = s3_client.get_object(Bucket=market_data_bucket, Key=window_key(start_timestamp, PRICE_WINDOW))
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    window = PriceWindow(response['Body'].read())
+    return {symbol: fields['end_price'] for symbol, fields in window.symbols.items()}
 
+
+def end_prices(simulated_data):
+    return {
+        symbol: asset['end_price']
+        for symbol, asset in simulated_data['assets'].items()
+        if asset is not None
+    }
+
+
+@metrics.instrument('price_simulator')
 def lambda_handler(event, context):
     """
-    Generates 600 simulated prices (1 per second) for the NEXT 10 minutes
-    based on statistical distribution from the PAST 60 minutes collected price data.
+    Generates 600 simulated prices (1 per second) for the NEXT aligned 10-minute
+    window based on statistical distribution from the PAST 60 minutes collected
+    price data, so the window exists before it starts. The current window is
+    generated too if it is missing (first run, or runs were skipped).
     """
     market_data_bucket = os.environ['MARKET_DATA_BUCKET']
 
     timestamp = int(time.time())
-    date_str = datetime.utcnow().strftime('%Y-%m-%d')
-    time_str = datetime.utcnow().strftime('%H-%M-%S')
+    current_start = window_start(timestamp)
+    next_start = current_start + WINDOW_SECONDS
 
     try:
-        response = s3_client.get_object(
-            Bucket=market_data_bucket,
-            Key='collected_prices/rolling_history_60min.json'
-        )
-        history_data = json.loads(response['Body'].read().decode('utf-8'))
+        history_data = load_history(s3_client, market_data_bucket, now=timestamp)
+
+        # Right after the move to minute shards, fill the hour from the old rolling history
+        if not history_data['stats']['ready_for_simulation']:
+            seeded = seed_from_legacy(s3_client, market_data_bucket, now=timestamp)
+            if seeded:
+                print(f"Seeded {seeded} minute shards from the legacy rolling history")
+                history_data = load_history(s3_client, market_data_bucket, now=timestamp)
+
         print(f"Loaded price history for {len(history_data['assets'])} assets")
 
         if not history_data.get('stats', {}).get('ready_for_simulation', False):
@@ -88,116 +190,68 @@ def lambda_handler(event, context):
         print(f"Error loading price history: {str(e)}")
         raise
 
-    current_dt = datetime.utcnow()
-    start_timestamp = int(current_dt.replace(microsecond=0).timestamp())
-
-    simulated_data = {
-        'timestamp': timestamp,
-        'datetime': current_dt.isoformat(),
-        'start_timestamp': start_timestamp,
-        'end_timestamp': start_timestamp + 600,
-        'resolution': '1sec',
-        'assets': {}
-    }
-
-    for symbol, asset_history in history_data['assets'].items():
-        if asset_history is None or not asset_history.get('data_points'):
-            print(f"Skipping {symbol} - no price data available")
-            simulated_data['assets'][symbol] = None
-            continue
-
-        try:
-            data_points = asset_history['data_points']
-
-            candles = []
-            for point in data_points:
-                candles.append({
-                    'close': point['price'],
-                    'timestamp': point['timestamp']
-                })
-
-            last_price = data_points[-1]['price'] 
-
-            mean_return, volatility, trend = calculate_statistics(candles)
-
-            print(f"📊 {symbol}: mean_return={mean_return:.6f}, volatility={volatility:.4f}, trend={trend:+.2%}")
-
-            random.seed(int(timestamp) + hash(symbol) % 10000)
-            simulated_prices = generate_second_prices(
-                start_price=last_price,
-                mean_return=mean_return,
-                volatility=volatility * 2,  
-                trend=trend,
-                num_seconds=600
-            )
-
-            second_data = []
-            for i, price in enumerate(simulated_prices):
-                second_timestamp = start_timestamp + i
-                second_data.append({
-                    'second': i,
-                    'timestamp': second_timestamp,
-                    'datetime': datetime.fromtimestamp(second_timestamp).isoformat(),
-                    'price': price
-                })
-
-            simulated_data['assets'][symbol] = {
-                'seconds': second_data,
-                'count': len(second_data),
-                'start_price': simulated_prices[0],
-                'end_price': simulated_prices[-1],
-                'period_high': max(simulated_prices),
-                'period_low': min(simulated_prices),
-                'period_change': simulated_prices[-1] - simulated_prices[0],
-                'period_change_percent': ((simulated_prices[-1] - simulated_prices[0]) / simulated_prices[0] * 100),
-                'based_on': {
-                    'historical_mean_return': mean_return,
-                    'historical_volatility': volatility,
-                    'historical_trend': trend,
-                    'historical_last_price': last_price
-                }
-            }
-
-            change_pct = simulated_data['assets'][symbol]['period_change_percent']
-            print(f"✓ {symbol}: Generated 600 prices, ${simulated_prices[0]:.2f} → ${simulated_prices[-1]:.2f} ({change_pct:+.2f}%)")
-
-        except Exception as e:
-            print(f"Error simulating {symbol}: {str(e)}")
-            simulated_data['assets'][symbol] = None
-
-    s3_key = f"simulated_data/{date_str}/{time_str}_simulated_1sec.json"
-
+    # A window without symbols would be served until the next one; leave the last good one in place
+    if not history_data['assets']:
+        print("No collected price history yet, no window written")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'No collected price history yet; simulation skipped',
+                'windows_generated': [],
+                'timestamp': timestamp
+            })
+        }
+
+    generated = []
     try:
-        s3_client.put_object(
-            Bucket=market_data_bucket,
-            Key=s3_key,
-            Body=json.dumps(simulated_data, indent=2),
-            ContentType='application/json'
+        current_end_prices = load_end_prices(market_data_bucket, current_start)
+        if current_end_prices is None:
+            print(f"No window for {current_start} yet, generating it")
+            current_data = simulate_window(history_data, current_start, timestamp)
+            save_window(market_data_bucket, current_data)
+            current_end_prices = end_prices(current_data)
+            generated.append(current_data)
+
+        # Windows are written once; a retried run leaves an existing next window alone
+        if load_end_prices(market_data_bucket, next_start) is None:
+            next_data = simulate_window(history_data, next_start, timestamp, current_end_prices)
+            save_window(market_data_bucket, next_data)
+            generated.append(next_data)
+        else:
+            print(f"Window for {next_start} already exists")
+
+        manifest = update_manifest(
+            read_manifest(s3_client, market_data_bucket),
+            [current_start, next_start],
+            timestamp
         )
-        print(f"Simulated data saved to s3://{market_data_bucket}/{s3_key}")
+        write_manifest(s3_client, market_data_bucket, manifest)
     except Exception as e:
-        print(f"Error saving simulated data to S3: {str(e)}")
+        print(f"Error saving simulated windows to S3: {str(e)}")
         raise
 
-    latest_key = "simulated_data/latest_simulated_1sec.json"
-    try:
-        s3_client.put_object(
-            Bucket=market_data_bucket,
-            Key=latest_key,
-            Body=json.dumps(simulated_data, indent=2),
-            ContentType='application/json'
-        )
-        print(f"Latest simulated data updated at s3://{market_data_bucket}/{latest_key}")
-    except Exception as e:
-        print(f"Error updating latest simulated data: {str(e)}")
+    # Newest window as plain JSON for the news generator
+    if generated:
+        latest_key = "simulated_data/latest_simulated_1sec.json"
+        try:
+            s3_client.put_object(
+                Bucket=market_data_bucket,
+                Key=latest_key,
+                Body=json.dumps(generated[-1], indent=2),
+                ContentType='application/json'
+            )
+            print(f"Latest simulated data updated at s3://{market_data_bucket}/{latest_key}")
+        except Exception as e:
+            print(f"Error updating latest simulated data: {str(e)}")
 
     return {
         'statusCode': 200,
         'body': json.dumps({
             'message': 'Price simulation completed successfully',
-            's3_key': s3_key,
-            'assets_simulated': len([a for a in simulated_data['assets'].values() if a is not None]),
+            'windows_generated': [data['start_timestamp'] for data in generated],
+            'manifest_windows': manifest['windows'],
+            'assets_simulated': len([a for a in generated[-1]['assets'].values() if a is not None]) if generated else 0,
             'timestamp': timestamp,
-            'simulation_period': f"{datetime.fromtimestamp(start_timestamp).strftime('%H:%M')} - {datetime.fromtimestamp(start_timestamp + 600).strftime('%H:%M')}"
+            'simulation_period': f"{datetime.utcfromtimestamp(next_start).strftime('%H:%M')} - {datetime.utcfromtimestamp(next_start + WINDOW_SECONDS).strftime('%H:%M')}"
         })
     }
@@ -0,0 +1,64 @@
+import math
+import zlib
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# A single second may not move the price by more than this fraction...
+MAX_STEP_CHANGE = 0.05
+# ...and no price may fall below this fraction of the window's start price.
+PRICE_FLOOR_RATIO = 0.5
+
+
+def symbol_seed(timestamp, symbol):
+    """
+    Deterministic per-symbol seed for a simulation run. Uses crc32 rather than
+    hash(), which is salted per process and so not reproducible between runs.
+    """
+    return int(timestamp) + zlib.crc32(symbol.encode('utf-8')) % 10000
+
+
+def simulate_second_prices(start_prices, mean_returns, volatilities, trends, seeds, num_seconds=600, anchor_prices=None):
+    """
+    Generate GBM price paths for many symbols at once, one row per symbol and
+    one column per second, using historical statistics.
+
+    With anchor_prices, each path is simulated from its anchor price and then
+    offset to start from start_prices, with the offset fading out linearly (in
+    log space) over the window. A window that continues the previous one thus
+    starts where it ended but is pulled back to the collected price by its end,
+    instead of compounding each window's drift onto the next.
+
+    Each step is price * (1 + drift + volatility * dW), clamped to +/-5% of the
+    previous price and floored at 50% of the start price. The clamp is a clip on
+    the per-step growth factor, and the floor is applied in log space as a
+    running maximum, so the whole matrix is computed without a per-second loop.
+    """
+    start_prices = np.asarray(start_prices, dtype=np.float64)[:, None]
+    drift = (np.asarray(mean_returns, dtype=np.float64) + np.asarray(trends, dtype=np.float64) / num_seconds)[:, None]
+    volatilities = np.asarray(volatilities, dtype=np.float64)[:, None]
+
+    if start_prices.shape[0] == 0:
+        return np.empty((0, num_seconds))
+
+    dt = 1 / SECONDS_PER_DAY
+    draws = np.vstack([
+        np.random.default_rng(seed).standard_normal(num_seconds)
+        for seed in seeds
+    ])
+    dW = draws * math.sqrt(dt)
+
+    growth = np.clip(1 + drift + volatilities * dW, 1 - MAX_STEP_CHANGE, 1 + MAX_STEP_CHANGE)
+    log_path = np.cumsum(np.log(growth), axis=1)
+
+    # log p_t = max(log p_{t-1} + g_t, floor) has the closed form
+    # S_t + max(0, max_{s<=t}(floor - S_s)) where S is the unfloored cumulative sum.
+    log_floor = math.log(PRICE_FLOOR_RATIO)
+    floor_correction = np.maximum.accumulate(np.maximum(log_floor - log_path, 0), axis=1)
+
+    if anchor_prices is None:
+        return start_prices * np.exp(log_path + floor_correction)
+
+    anchor_prices = np.asarray(anchor_prices, dtype=np.float64)[:, None]
+    fade = np.linspace(1, 0, num_seconds)
+    return anchor_prices * np.exp(log_path + floor_correction + np.log(start_prices / anchor_prices) * fade)
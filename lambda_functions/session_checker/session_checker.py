@@ -1,31 +1,46 @@
 import json
 import os
-import boto3
+import aws_clients
+import metrics
 import time
+import session_store
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = aws_clients.lazy_resource('dynamodb')
 
+@metrics.instrument('session_checker')
 def lambda_handler(event, context):
     """
     Checks for active user sessions.
     This function is triggered every 15 minutes by EventBridge.
     It verifies if any users are actively connected before releasing news.
+    Uses the sessions expiry index, so only live sessions are ever read.
     """
     sessions_table_name = os.environ['SESSIONS_TABLE']
     sessions_table = dynamodb.Table(sessions_table_name)
 
+    # Also scan for sessions written without expires_bucket; only needed until
+    # the one-off {"backfill": true} run below has migrated them
+    scan_fallback = os.environ.get('SESSIONS_SCAN_FALLBACK', 'false').lower() == 'true'
+
     current_time = int(time.time())
+    event = event or {}
 
     try:
-        response = sessions_table.scan(
-            FilterExpression='expires_at > :current_time',
-            ExpressionAttributeValues={
-                ':current_time': current_time
+        if event.get('backfill'):
+            backfilled = session_store.backfill_legacy(sessions_table, current_time)
+            print(f"Backfilled expires_bucket on {backfilled} sessions")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'backfilled': backfilled})
             }
-        )
 
-        active_sessions = response.get('Items', [])
-        active_count = len(active_sessions)
+        # Only "any active" is needed to gate news, so stop at the first live
+        # session; {"count": true} counts them all instead. active_sessions is
+        # 1 for "at least one" otherwise
+        if event.get('count'):
+            active_count = session_store.count_active(sessions_table, current_time, scan_fallback=scan_fallback)
+        else:
+            active_count = int(session_store.any_active(sessions_table, current_time, scan_fallback=scan_fallback))
 
         print(f"Found {active_count} active sessions")
 
@@ -35,6 +50,7 @@ def lambda_handler(event, context):
                 'statusCode': 200,
                 'body': json.dumps({
                     'active_sessions': active_count,
+                    'any_active': True,
                     'message': 'Active users detected',
                     'should_show_news': True
                 })
@@ -45,6 +61,7 @@ def lambda_handler(event, context):
                 'statusCode': 200,
                 'body': json.dumps({
                     'active_sessions': 0,
+                    'any_active': False,
                     'message': 'No active users',
                     'should_show_news': False
                 })
@@ -0,0 +1,98 @@
+import threading
+import metrics
+
+# Shared boto3 clients, built on first use instead of at import.
+#
+# Importing boto3 and constructing a client (service model, endpoint rules)
+# costs on the order of 100 ms each, and used to run in every handler's module
+# body whether or not the invocation went on to touch that service: a 400 on a
+# missing parameter or a WebSocket ping still paid for S3 and DynamoDB. Handlers
+# keep a module-level name for each client, but it is a LazyClient that builds
+# the real client, registered with metrics.watch(), the first time an attribute
+# is used, and every later invocation in the container reuses it.
+#
+# Prefer client() to resource(): a DynamoDB resource builds its own client and
+# then its resource model on top, so it is only worth it where the code relies on
+# the Table helpers (batch_writer, condition builders).
+#
+# boto3.dynamodb.types and boto3.dynamodb.conditions import boto3 itself, so
+# handlers do not import them at module load either: serialize() and
+# deserialize_item() wrap TypeSerializer/TypeDeserializer built on first use,
+# and condition builders (Key, Attr) are imported inside the functions that
+# build expressions.
+
+_clients = {}
+_lock = threading.Lock()
+_serializer = None
+_deserializer = None
+
+
+def _build(kind, service_name, kwargs):
+    key = (kind, service_name, tuple(sorted(kwargs.items())))
+    built = _clients.get(key)
+    if built is None:
+        # Threads fanning out over shards can hit a client first at the same time
+        with _lock:
+            built = _clients.get(key)
+            if built is None:
+                import boto3
+                factory = boto3.client if kind == 'client' else boto3.resource
+                built = _clients[key] = metrics.watch(factory(service_name, **kwargs))
+    return built
+
+
+def client(service_name, **kwargs):
+    """The shared low-level client for a service (and endpoint_url etc. in kwargs)."""
+    return _build('client', service_name, kwargs)
+
+
+def resource(service_name, **kwargs):
+    """The shared boto3 resource for a service."""
+    return _build('resource', service_name, kwargs)
+
+
+def clear():
+    """Forget every built client, e.g. after switching credentials or endpoints."""
+    with _lock:
+        _clients.clear()
+
+
+class LazyClient:
+    """Module-level stand-in for a client or resource, built on first attribute access."""
+
+    def __init__(self, factory, service_name, **kwargs):
+        self._factory = factory
+        self._service_name = service_name
+        self._kwargs = kwargs
+
+    def __getattr__(self, name):
+        return getattr(self._factory(self._service_name, **self._kwargs), name)
+
+    def __repr__(self):
+        return f'LazyClient({self._service_name!r})'
+
+
+def lazy_client(service_name, **kwargs):
+    return LazyClient(client, service_name, **kwargs)
+
+
+def lazy_resource(service_name, **kwargs):
+    return LazyClient(resource, service_name, **kwargs)
+
+
+def serialize(value):
+    """A Python value as a low-level DynamoDB attribute value."""
+    global _serializer
+    if _serializer is None:
+        from boto3.dynamodb.types import TypeSerializer
+        _serializer = TypeSerializer()
+    return _serializer.serialize(value)
+
+
+def deserialize_item(item):
+    """A low-level DynamoDB item ({'S': ...} etc.) as plain Python values."""
+    global _deserializer
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
@@ -0,0 +1,214 @@
+import base64
+import gzip
+import hashlib
+import json
+import metrics
+import os
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# API Gateway proxy responses for the HTTP API handlers.
+#
+# - Bodies are serialized with orjson when it is installed (bytes out, several
+#   times faster than json.dumps). Decimals from DynamoDB are written as exact
+#   fixed-point numbers (orjson.Fragment of the decimal text) instead of going
+#   through float; without orjson they keep the old int/float conversion.
+# - GET responses carry an ETag (the caller's, or a hash of the body), and a
+#   request whose If-None-Match matches gets an empty 304. The browser sends
+#   If-None-Match by itself when it revalidates a cached response.
+# - Bodies of at least COMPRESS_MIN_BYTES are compressed with br (when brotli is
+#   installed) or gzip if Accept-Encoding allows it, and returned base64-encoded
+#   with isBase64Encoded so API Gateway sends the compressed bytes. Bodies that
+#   many callers share (a second of /prices, the leaderboard) are compressed
+#   once and kept in a small cache keyed by body hash and encoding.
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+# Brotli's default quality (11) is far too slow for per-request compression
+BROTLI_QUALITY = 5
+COMPRESSED_CACHE_ENTRIES = 64
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': '*'
+}
+
+_compressed = {}
+
+
+def fixed_point(value):
+    """JSON number text for a Decimal, exact and never in exponent notation."""
+    text = str(value)
+    # str() switches to exponent notation only for very large or very small exponents
+    if 'E' in text:
+        text = format(value, 'f')
+    return text
+
+
+if orjson is not None and hasattr(orjson, 'Fragment'):
+    def _decimal(value):
+        return orjson.Fragment(fixed_point(value))
+else:
+    # Without orjson.Fragment (orjson < 3.9, or the stdlib) there is no way to
+    # emit raw number text, so Decimals go through int or float as before
+    def _decimal(value):
+        return int(value) if value == value.to_integral_value() else float(value)
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return _decimal(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Compact JSON bytes for payload; Decimals allowed anywhere in it."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def request_header(event, name):
+    """A request header, whatever case API Gateway delivered it in."""
+    headers = (event or {}).get('headers') or {}
+    value = headers.get(name)
+    if value is None:
+        name = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == name), None)
+    return value
+
+
+def request_method(event):
+    event = event or {}
+    return event.get('httpMethod') or event.get('requestContext', {}).get('http', {}).get('method', 'GET')
+
+
+def accepted_encoding(event):
+    """'br', 'gzip' or None: the best encoding the client accepts and we can produce."""
+    accept = request_header(event, 'accept-encoding')
+    if not accept:
+        return None
+
+    accepted = set()
+    for part in accept.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, digest):
+    """body compressed with encoding, cached by (digest, encoding) while warm."""
+    key = (digest, encoding)
+    compressed = _compressed.get(key)
+    if compressed is None:
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(_compressed) >= COMPRESSED_CACHE_ENTRIES:
+            _compressed.pop(next(iter(_compressed)))
+        _compressed[key] = compressed
+    return compressed
+
+
+def etag_matches(event, etag):
+    if_none_match = request_header(event, 'if-none-match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Compare weakly: a W/ prefix added by an intermediary still matches
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag.removeprefix('W/') in candidates
+
+
+def body_response(event, body, status_code=200, methods='GET, OPTIONS', cache_control=None, etag=None,
+                  extra_headers=None):
+    """
+    Proxy response for an already serialized JSON body (bytes or str), with
+    ETag / 304 handling for successful GETs and compression when it pays.
+    extra_headers are sent on the response and on a 304 alike, and exposed to
+    browser scripts through CORS.
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+
+    headers = {'Content-Type': 'application/json', **CORS_HEADERS, 'Access-Control-Allow-Methods': methods}
+    if cache_control:
+        headers['Cache-Control'] = cache_control
+    if extra_headers:
+        headers.update(extra_headers)
+        headers['Access-Control-Expose-Headers'] = ', '.join(extra_headers)
+
+    digest = None
+    if status_code == 200 and request_method(event) == 'GET':
+        if etag is None:
+            digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+            etag = f'"{digest}"'
+        headers['ETag'] = etag
+        if etag_matches(event, etag):
+            return {'statusCode': 304, 'headers': headers, 'body': ''}
+
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        headers['Vary'] = 'Accept-Encoding'
+        encoding = accepted_encoding(event)
+    if encoding:
+        if digest is None:
+            digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        with metrics.span('compress'):
+            compressed = compress(body, encoding, digest)
+        if len(compressed) < len(body):
+            headers['Content-Encoding'] = encoding
+            return {
+                'statusCode': status_code,
+                'headers': headers,
+                'body': base64.b64encode(compressed).decode('ascii'),
+                'isBase64Encoded': True
+            }
+
+    return {'statusCode': status_code, 'headers': headers, 'body': body.decode('utf-8')}
+
+
+def json_response(event, payload, status_code=200, methods='GET, OPTIONS', cache_control=None, etag=None,
+                  extra_headers=None):
+    """Proxy response with payload serialized by dumps(); see body_response."""
+    with metrics.span('serialize'):
+        body = dumps(payload)
+    return body_response(event, body, status_code, methods, cache_control, etag, extra_headers)
+
+
+def error_response(status_code, message):
+    """Helper function to return error responses"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({
+            'success': False,
+            'message': message
+        })
+    }
@@ -0,0 +1,177 @@
+import json
+import time
+import metrics
+from botocore.exceptions import ClientError
+from price_window_format import PriceWindow
+from price_snapshots import PriceSnapshots
+from simulation_windows import (
+    MANIFEST_KEY, PRICE_SNAPSHOTS, PRICE_WINDOW, WINDOW_SECONDS,
+    key_window_start, latest_start, window_key, window_start
+)
+
+# Written by simulator versions before aligned windows; read only until a manifest exists
+PRICE_WINDOW_KEY = 'simulated_data/latest_simulated_1sec.bin'
+PRICE_SNAPSHOTS_KEY = 'simulated_data/latest_prices_snapshots.bin'
+
+# While a cached object is past its known validity, S3 is asked again at most
+# this often (e.g. when the next simulation run is late).
+REVALIDATE_INTERVAL_SECONDS = 5
+
+# The next window is loaded this long before the current one ends, so the
+# first request after the boundary does not pay for the download and parse.
+PREFETCH_SECONDS = 30
+
+# Live in module scope so they survive across warm invocations of a Lambda container.
+_cache = {}
+# Keys found missing, by when they were checked
+_missing = {}
+
+
+def get_cached_object(s3_client, bucket, key, parse, fresh_until=None, now=None):
+    """
+    Return the parsed contents of s3://bucket/key, reusing the copy cached in this
+    container whenever possible.
+
+    An entry is served without touching S3 until fresh_until(value) has passed. After
+    that it is revalidated with If-None-Match, so an unchanged object costs a 304
+    instead of a full download and parse.
+    """
+    now = time.time() if now is None else now
+    cache_key = (bucket, key)
+    entry = _cache.get(cache_key)
+
+    if entry is not None:
+        if now < entry['fresh_until'] or now - entry['checked_at'] < REVALIDATE_INTERVAL_SECONDS:
+            metrics.count('cache_hits')
+            return entry['value']
+
+    request = {'Bucket': bucket, 'Key': key}
+    if entry is not None and entry['etag']:
+        request['IfNoneMatch'] = entry['etag']
+
+    try:
+        response = s3_client.get_object(**request)
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code')
+        if entry is not None and error_code in ('304', 'NotModified'):
+            entry['checked_at'] = now
+            return entry['value']
+        raise
+
+    body = response['Body'].read()
+    with metrics.span('parse'):
+        value = parse(body)
+
+    _cache[cache_key] = {
+        'value': value,
+        'etag': response.get('ETag'),
+        'fresh_until': fresh_until(value) if fresh_until else 0,
+        'checked_at': now
+    }
+    return value
+
+
+def is_missing(error):
+    return error.response.get('Error', {}).get('Code') in ('NoSuchKey', '404')
+
+
+def _get_window_part(s3_client, bucket, start, name, parse, now):
+    """One object of the window at start, or None if it has not been written."""
+    key = window_key(start, name)
+    if now - _missing.get((bucket, key), float('-inf')) < REVALIDATE_INTERVAL_SECONDS:
+        return None
+
+    try:
+        # Window objects are written once, so a cached copy never goes stale
+        value = get_cached_object(s3_client, bucket, key, parse, fresh_until=lambda _: float('inf'), now=now)
+    except ClientError as e:
+        if not is_missing(e):
+            raise
+        _missing[(bucket, key)] = now
+        return None
+
+    _missing.pop((bucket, key), None)
+    return value
+
+
+def _drop_windows_before(start):
+    """Forget cached and missing window objects older than the window before start."""
+    for entries in (_cache, _missing):
+        for cache_key in list(entries):
+            key_start = key_window_start(cache_key[1])
+            if key_start is not None and key_start < start - WINDOW_SECONDS:
+                del entries[cache_key]
+
+
+def get_window_part(s3_client, bucket, name, parse, legacy_key, now=None):
+    """
+    The object name (PRICE_WINDOW or PRICE_SNAPSHOTS) of the aligned window
+    containing now.
+
+    The key is computed from the time, so nothing is listed or looked up on the
+    normal path. If that window has not been written (simulator late or failed)
+    the newest window that has started, per the manifest, is served instead;
+    with no manifest at all, the legacy latest_* object is. Raises NoSuchKey if
+    there is no price data.
+    """
+    now = time.time() if now is None else now
+    start = window_start(now)
+    _drop_windows_before(start)
+
+    value = _get_window_part(s3_client, bucket, start, name, parse, now)
+
+    if value is None:
+        try:
+            manifest = get_cached_object(
+                s3_client, bucket, MANIFEST_KEY,
+                parse=lambda body: json.loads(body.decode('utf-8')), now=now
+            )
+        except ClientError as e:
+            if not is_missing(e):
+                raise
+            return get_cached_object(s3_client, bucket, legacy_key, parse, fresh_until=lambda _: 0, now=now)
+
+        fallback_start = latest_start(manifest, now)
+        if fallback_start is not None:
+            value = _get_window_part(s3_client, bucket, fallback_start, name, parse, now)
+        if value is None:
+            raise s3_client.exceptions.NoSuchKey(
+                {'Error': {'Code': 'NoSuchKey', 'Message': f'No simulation window for {int(now)}'}},
+                'GetObject'
+            )
+
+    if now >= start + WINDOW_SECONDS - PREFETCH_SECONDS:
+        _get_window_part(s3_client, bucket, start + WINDOW_SECONDS, name, parse, now)
+
+    return value
+
+
+def get_price_window(s3_client, bucket, now=None):
+    """
+    Return the simulation window for now in the compact columnar format as a
+    PriceWindow. Only its header is decoded; prices are read on demand.
+    """
+    return get_window_part(s3_client, bucket, PRICE_WINDOW, PriceWindow, PRICE_WINDOW_KEY, now=now)
+
+
+def get_price_window_at(s3_client, bucket, start, now=None):
+    """
+    The PriceWindow of the window starting at start, or None if it has not
+    been written yet (e.g. the next window before the simulator has run).
+    """
+    now = time.time() if now is None else now
+    return _get_window_part(s3_client, bucket, start, PRICE_WINDOW, PriceWindow, now)
+
+
+def get_price_snapshots(s3_client, bucket, now=None):
+    """
+    Return the pre-rendered /prices bodies for the simulation window for now as
+    PriceSnapshots.
+    """
+    return get_window_part(s3_client, bucket, PRICE_SNAPSHOTS, PriceSnapshots, PRICE_SNAPSHOTS_KEY, now=now)
+
+
+def clear_cache():
+    """Drop every cached object, e.g. between tests or when the data has been replaced."""
+    _cache.clear()
+    _missing.clear()
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Per-invocation timing and I/O metrics, emitted as one CloudWatch Embedded
+# Metric Format (EMF) log line per invocation.
+#
+# A handler wrapped with @instrument('name') collects:
+# - spans: accumulated milliseconds per named phase (span('parse'), ...), plus
+#   one per AWS operation on clients passed through watch()
+# - counters: calls per AWS operation, bytes read and written, DynamoDB items
+#   scanned and returned, and anything recorded with count()
+# and logs them with Function and Start (cold or warm) as dimensions, so
+# CloudWatch extracts the metrics from the log line without any API calls.
+# Helpers record into the invocation in progress through the module-level
+# span() and count(), so nothing has to be threaded through call signatures.
+# Worker threads (shard reads, quote fetches, completions) record into the
+# same invocation, so updates are made under a lock.
+#
+# The sink is stdout by default; set_sink(MemorySink()) collects records in
+# memory instead, for local runs and tests.
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'TradeQuest')
+DIMENSIONS = ['Function', 'Start']
+
+
+class MemorySink:
+    """Keeps emitted records in a list instead of logging them."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+
+def stdout_sink(record):
+    print(json.dumps(record, separators=(',', ':'), default=str))
+
+
+class Metrics:
+    """Spans and counters of one invocation."""
+
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.spans = {}
+        self.counters = {}
+        self.units = {}
+        self.properties = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, (time.perf_counter() - started) * 1000)
+
+    def add_time(self, name, milliseconds):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + milliseconds
+
+    def count(self, name, value=1, unit='Count'):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.units[name] = unit
+
+    def set_property(self, name, value):
+        """Searchable field on the log line that is not a metric (request id, status code)."""
+        self.properties[name] = value
+
+    def record(self, start):
+        """The EMF document for this invocation."""
+        with self._lock:
+            spans = dict(self.spans)
+            counters = dict(self.counters)
+        definitions = [{'Name': name, 'Unit': 'Milliseconds'} for name in spans]
+        definitions += [{'Name': name, 'Unit': self.units[name]} for name in counters]
+
+        return dict(
+            self.properties,
+            _aws={
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [DIMENSIONS],
+                    'Metrics': definitions
+                }]
+            },
+            Function=self.function_name,
+            Start=start,
+            **{name: round(value, 3) for name, value in spans.items()},
+            **counters
+        )
+
+
+_sink = stdout_sink
+# Collector outside any instrumented invocation (imports, scripts); never emitted
+_idle = Metrics(None)
+_current = _idle
+_cold_start = True
+
+
+def set_sink(sink):
+    """Send records to sink (a callable taking the EMF dict) instead of stdout."""
+    global _sink
+    _sink = sink
+
+
+def current():
+    return _current
+
+
+def span(name):
+    """Time a block into the current invocation: with metrics.span('parse'): ..."""
+    return _current.span(name)
+
+
+def count(name, value=1, unit='Count'):
+    _current.count(name, value, unit)
+
+
+def _body_size(body):
+    """Size of a request body, which S3 hands over as a file-like object."""
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if hasattr(body, 'seek') and hasattr(body, 'tell'):
+        position = body.tell()
+        size = body.seek(0, 2)
+        body.seek(position)
+        return size
+    return 0
+
+
+def _before_call(model, params, context, **kwargs):
+    context['metrics_started'] = time.perf_counter()
+    size = _body_size(params.get('body'))
+    if size:
+        _current.count(f'{model.service_model.service_name}.bytes_written', size, 'Bytes')
+
+
+def _after_call(model, http_response, parsed, context, **kwargs):
+    service = model.service_model.service_name
+    operation = f'{service}.{model.name}'
+    started = context.get('metrics_started')
+    if started is not None:
+        _current.add_time(operation, (time.perf_counter() - started) * 1000)
+    _current.count(f'{operation}.calls')
+
+    content_length = http_response.headers.get('content-length') if http_response is not None else None
+    if content_length and content_length.isdigit():
+        _current.count(f'{service}.bytes_read', int(content_length), 'Bytes')
+
+    if service == 'dynamodb' and isinstance(parsed, dict):
+        if 'ScannedCount' in parsed:
+            _current.count('dynamodb.items_scanned', parsed['ScannedCount'])
+        if 'Count' in parsed:
+            _current.count('dynamodb.items_returned', parsed['Count'])
+        elif 'Item' in parsed:
+            _current.count('dynamodb.items_returned')
+
+
+def watch(client):
+    """
+    Time every call made through a boto3 client (or resource) and count its
+    bytes and items into the current invocation. Returns the client.
+    """
+    events = client.meta.client.meta.events if hasattr(client.meta, 'client') else client.meta.events
+    events.register('before-call', _before_call)
+    events.register('after-call', _after_call)
+    return client
+
+
+def instrument(function_name):
+    """Decorator for a lambda_handler: collect metrics for each invocation and emit them."""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(event, context):
+            global _current, _cold_start
+
+            start = 'cold' if _cold_start else 'warm'
+            _cold_start = False
+
+            metrics = Metrics(function_name)
+            if context is not None and hasattr(context, 'aws_request_id'):
+                metrics.set_property('RequestId', context.aws_request_id)
+            _current = metrics
+
+            try:
+                with metrics.span('handler'):
+                    response = handler(event, context)
+                if isinstance(response, dict) and 'statusCode' in response:
+                    metrics.set_property('StatusCode', response['statusCode'])
+                    metrics.count('errors', int(response['statusCode'] >= 500))
+                return response
+            except Exception:
+                metrics.count('errors')
+                raise
+            finally:
+                _current = _idle
+                try:
+                    _sink(metrics.record(start))
+                except Exception as e:
+                    print(f"Warning: Could not emit metrics: {str(e)}")
+
+        return wrapper
+    return decorator
@@ -0,0 +1,52 @@
+from time_shards import list_shard_keys, read_shards, shard_key, shard_timestamp, write_shard
+
+# Append-only news log.
+#
+# Every news_generator run appends its articles as one immutable shard keyed by
+# the run timestamp, so the key listing is a time-ordered index. A reader's
+# cursor is the timestamp of the last shard it has seen; a delta lists only the
+# shards after it, and no one rewrites or re-reads the whole article history.
+LOG_PREFIX = 'news_log/'
+NEWS_WINDOW_SECONDS = 3600
+
+
+def append_articles(s3_client, bucket, timestamp, articles):
+    """Write one run's articles as the log shard for timestamp. Returns its key."""
+    key = shard_key(LOG_PREFIX, timestamp)
+    write_shard(s3_client, bucket, key, {'timestamp': int(timestamp), 'articles': articles})
+    return key
+
+
+def read_since(s3_client, bucket, cursor, now):
+    """
+    Articles from shards after cursor within the last NEWS_WINDOW_SECONDS, newest
+    first, plus the cursor to pass next time.
+
+    The cursor only moves past shards whose articles are all published
+    (publish_at <= now), so articles released later are still picked up by the
+    next delta. Returns (published_articles, pending_count, next_cursor).
+    """
+    after = max(int(cursor or 0), now - NEWS_WINDOW_SECONDS)
+    keys = list_shard_keys(s3_client, bucket, LOG_PREFIX, after)
+
+    published = []
+    pending = 0
+    next_cursor = int(cursor or 0)
+    cursor_blocked = False
+
+    for key, shard in zip(keys, read_shards(s3_client, bucket, keys)):
+        shard_pending = 0
+        for article in shard.get('articles', []):
+            if article.get('publish_at', 0) <= now:
+                published.append(article)
+            else:
+                shard_pending += 1
+
+        pending += shard_pending
+        if shard_pending:
+            cursor_blocked = True
+        elif not cursor_blocked:
+            next_cursor = shard_timestamp(LOG_PREFIX, key)
+
+    published.sort(key=lambda x: x.get('publish_at', 0), reverse=True)
+    return published, pending, next_cursor
@@ -0,0 +1,94 @@
+import json
+import time
+from time_shards import list_shard_keys, read_shards, shard_key, write_shard
+
+# One immutable shard per collected minute, holding that minute's data point for
+# every symbol fetched. Old shards are expired by an S3 lifecycle rule.
+#
+# The collector used to keep the whole hour in one rolling_history_60min.json.
+# Until an hour of shards exists, seed_from_legacy() fills the minutes that have
+# no shard from that document, so a fresh deploy simulates from the same history
+# instead of from nothing.
+SHARD_PREFIX = 'collected_prices/minutes/'
+HISTORY_MINUTES = 60
+LEGACY_HISTORY_KEY = 'collected_prices/rolling_history_60min.json'
+
+
+def minute_shard_key(timestamp):
+    """Shard key for the minute containing timestamp."""
+    return shard_key(SHARD_PREFIX, int(timestamp) // 60 * 60)
+
+
+def write_minute_shard(s3_client, bucket, timestamp, datetime_str, data_points):
+    """
+    Store one collection run as its own shard. data_points maps symbol -> data point.
+    Overlapping runs in the same minute write the same key, never each other's history.
+    """
+    key = minute_shard_key(timestamp)
+    write_shard(s3_client, bucket, key, {
+        'timestamp': timestamp,
+        'datetime': datetime_str,
+        'prices': data_points
+    })
+    return key
+
+
+def seed_from_legacy(s3_client, bucket, now=None, minutes=HISTORY_MINUTES):
+    """
+    Write a minute shard from the legacy rolling history for every minute of the
+    last `minutes` that has data points there and no shard yet. Returns the
+    number of shards written (0 without a legacy document).
+    """
+    now = int(time.time()) if now is None else int(now)
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=LEGACY_HISTORY_KEY)
+    except s3_client.exceptions.NoSuchKey:
+        return 0
+    legacy = json.loads(response['Body'].read().decode('utf-8'))
+
+    existing = set(list_shard_keys(s3_client, bucket, SHARD_PREFIX, now - minutes * 60, until_timestamp=now))
+    by_minute = {}
+    for symbol, asset_history in (legacy.get('assets') or {}).items():
+        for data_point in (asset_history or {}).get('data_points', []):
+            minute = int(data_point['timestamp']) // 60 * 60
+            # The same range of shard keys load_history reads
+            if now - minutes * 60 < minute <= now:
+                by_minute.setdefault(minute, {})[symbol] = data_point
+
+    written = 0
+    for minute, data_points in sorted(by_minute.items()):
+        if minute_shard_key(minute) in existing:
+            continue
+        first = min(data_points.values(), key=lambda point: point['timestamp'])
+        write_minute_shard(s3_client, bucket, int(first['timestamp']), first.get('datetime', ''), data_points)
+        written += 1
+    return written
+
+
+def load_history(s3_client, bucket, now=None, minutes=HISTORY_MINUTES):
+    """
+    Assemble the last `minutes` data points per symbol from the minute shards, in
+    the same shape the rolling_history_60min.json document used to have.
+    """
+    now = int(time.time()) if now is None else int(now)
+    keys = list_shard_keys(s3_client, bucket, SHARD_PREFIX, now - minutes * 60, until_timestamp=now)
+    shards = read_shards(s3_client, bucket, keys[-minutes:])
+
+    assets = {}
+    for shard in shards:
+        for symbol, data_point in shard['prices'].items():
+            if symbol not in assets:
+                assets[symbol] = {'symbol': symbol, 'data_points': []}
+            assets[symbol]['data_points'].append(data_point)
+
+    assets_with_full_hour = sum(1 for a in assets.values() if len(a['data_points']) >= minutes)
+
+    return {
+        'assets': assets,
+        'last_updated_timestamp': shards[-1]['timestamp'] if shards else None,
+        'stats': {
+            'total_assets': len(assets),
+            'assets_with_full_hour': assets_with_full_hour,
+            'ready_for_simulation': bool(assets) and assets_with_full_hour >= len(assets) * 0.8
+        }
+    }
@@ -0,0 +1,63 @@
+import time
+
+# Price of any symbol at any timestamp, checked against the window bounds.
+#
+# Second i of a window is start_timestamp + i, so the price at timestamp t is
+# the window column at t - start_timestamp: one subtraction and one index into
+# the float64 column, with no per-second records and no wall-clock minute
+# arithmetic. Timestamps outside the window are clamped to its first or last
+# second, which is what a reader holding a late window should serve.
+
+
+def second_at(window, timestamp):
+    """
+    Index of timestamp within window (a PriceWindow or PriceSnapshots), clamped
+    to the window's seconds.
+    """
+    last = window.end_timestamp - window.start_timestamp - 1
+    return min(max(int(timestamp) - window.start_timestamp, 0), last)
+
+
+class PriceLookup:
+    """
+    Constant-time timestamp -> price lookups over one PriceWindow. Each symbol
+    column is unpacked into a list once per window (600 floats), which indexes
+    faster than the buffer view on every lookup.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.start_timestamp = window.start_timestamp
+        self.last_second = window.end_timestamp - window.start_timestamp - 1
+        self.columns = {symbol: window.prices(symbol).tolist() for symbol in window.symbols}
+
+    def second(self, timestamp):
+        return min(max(int(timestamp) - self.start_timestamp, 0), self.last_second)
+
+    def price(self, symbol, timestamp=None):
+        """Price of symbol at timestamp (default: now). Raises KeyError for a symbol not in the window."""
+        return self.columns[symbol][self.second(time.time() if timestamp is None else timestamp)]
+
+    def prices(self, symbols=None, timestamp=None):
+        """
+        Prices of many symbols (default: all in the window) at the same second.
+        Raises KeyError for a symbol not in the window.
+        """
+        second = self.second(time.time() if timestamp is None else timestamp)
+        columns = self.columns
+        if symbols is None:
+            return {symbol: column[second] for symbol, column in columns.items()}
+        return {symbol: columns[symbol][second] for symbol in symbols}
+
+
+# One lookup per window while warm; windows are immutable once loaded
+_lookups = {}
+
+
+def lookup_for(window):
+    """The PriceLookup for window, reused across invocations while it is current."""
+    lookup = _lookups.get(id(window))
+    if lookup is None or lookup.window is not window:
+        _lookups.clear()
+        lookup = _lookups[id(window)] = PriceLookup(window)
+    return lookup
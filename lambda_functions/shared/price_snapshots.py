@@ -0,0 +1,117 @@
+import json
+import struct
+from array import array
+from datetime import datetime
+
+# Layout of a snapshot blob:
+#   prefix  - magic, format version and header length (little-endian)
+#   header  - UTF-8 JSON with the window bounds and number of snapshots
+#   offsets - count + 1 little-endian uint32 offsets into the body section
+#   bodies  - the pre-serialized /prices response body for every current_second
+#
+# Within a window the /prices answer depends only on current_second, so it is
+# rendered once here and the handler just returns the bytes for the second.
+MAGIC = b'TQPS'
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<4sII')
+OFFSET = struct.Struct('<I')
+
+
+def window_second_time(window, current_second):
+    """Wall-clock time within the window at which (minute % 10) * 60 + second == current_second."""
+    return window.start_timestamp + (current_second - window.start_timestamp % 600) % 600
+
+
+def prices_payload(window, current_second):
+    """The /prices response body for one current_second of a PriceWindow."""
+    prices = {}
+
+    for symbol in window.missing:
+        prices[symbol] = {
+            'error': 'No data available',
+            'current': None
+        }
+
+    for symbol, asset_data in window.symbols.items():
+        second = min(current_second, window.num_seconds - 1)
+        second_timestamp = window.start_timestamp + second
+
+        prices[symbol] = {
+            'current': window.price_at(symbol, second),
+            'timestamp': second_timestamp,
+            'datetime': datetime.fromtimestamp(second_timestamp).isoformat(),
+            'second': second,
+            'period_high': asset_data['period_high'],
+            'period_low': asset_data['period_low'],
+            'hour_start': asset_data['start_price'],
+            'hour_projected_end': asset_data['end_price'],
+            'period_change_percent': asset_data['period_change_percent']
+        }
+        if second != current_second:
+            prices[symbol]['note'] = 'Using last available second (simulation may be outdated)'
+
+    return {
+        'success': True,
+        'data': {
+            'prices': prices,
+            'current_second': current_second,
+            'current_time': datetime.utcfromtimestamp(window_second_time(window, current_second)).isoformat(),
+            'simulation_timestamp': window.header['timestamp'],
+            'simulation_datetime': window.header['datetime'],
+            'simulation_start': window.start_timestamp,
+            'simulation_end': window.end_timestamp,
+            'resolution': window.header['resolution']
+        },
+        'message': f'Prices for second {current_second} fetched successfully'
+    }
+
+
+def encode_price_snapshots(window, num_seconds=600):
+    """Render and pack the /prices body for every current_second of the window."""
+    bodies = [json.dumps(prices_payload(window, second)).encode('utf-8') for second in range(num_seconds)]
+
+    offsets = array('I', [0])
+    for body in bodies:
+        offsets.append(offsets[-1] + len(body))
+
+    header = json.dumps({
+        'start_timestamp': window.start_timestamp,
+        'end_timestamp': window.end_timestamp,
+        'count': num_seconds
+    }, separators=(',', ':')).encode('utf-8')
+
+    return b''.join(
+        [PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)), header]
+        + [OFFSET.pack(offset) for offset in offsets]
+        + bodies
+    )
+
+
+class PriceSnapshots:
+    """Read-only view over a snapshot blob; body(second) is a constant-time slice."""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+
+        magic, version, header_length = PREFIX.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a price snapshot file')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported price snapshot format version {version}')
+
+        header_end = PREFIX.size + header_length
+        self.header = json.loads(bytes(self._buffer[PREFIX.size:header_end]).decode('utf-8'))
+        self.start_timestamp = self.header['start_timestamp']
+        self.end_timestamp = self.header['end_timestamp']
+        self.count = self.header['count']
+
+        self._offsets_start = header_end
+        self._bodies_start = header_end + (self.count + 1) * OFFSET.size
+
+    def body(self, second):
+        """Pre-serialized /prices body for current_second, as bytes."""
+        if not 0 <= second < self.count:
+            raise IndexError(f'No snapshot for second {second}')
+        start, = OFFSET.unpack_from(self._buffer, self._offsets_start + second * OFFSET.size)
+        end, = OFFSET.unpack_from(self._buffer, self._offsets_start + (second + 1) * OFFSET.size)
+        return bytes(self._buffer[self._bodies_start + start:self._bodies_start + end])
@@ -0,0 +1,124 @@
+import json
+import struct
+import sys
+from array import array
+
+# Layout of a price window file:
+#   prefix  - magic, format version and header length (little-endian)
+#   header  - UTF-8 JSON with window metadata and per-symbol stats/offsets,
+#             space-padded so the price data starts 8-byte aligned
+#   data    - one contiguous little-endian float64 array per symbol, num_seconds long
+#
+# The price for second i of a symbol lives at data_start + offset + i * 8, and its
+# timestamp is start_timestamp + i, so nothing per-second is stored besides the price.
+MAGIC = b'TQPW'
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<4sII')
+PRICE = struct.Struct('<d')
+
+ASSET_FIELDS = (
+    'start_price', 'end_price', 'period_high', 'period_low',
+    'period_change', 'period_change_percent', 'based_on'
+)
+
+
+def encode_price_window(simulated_data):
+    """
+    Encode a simulated window (the same dict written as latest_simulated_1sec.json)
+    into the compact columnar format.
+    """
+    num_seconds = simulated_data['end_timestamp'] - simulated_data['start_timestamp']
+
+    symbols = {}
+    missing = []
+    columns = []
+    offset = 0
+
+    for symbol, asset_data in simulated_data['assets'].items():
+        if asset_data is None or not asset_data.get('seconds'):
+            missing.append(symbol)
+            continue
+
+        prices = array('d', (second['price'] for second in asset_data['seconds']))
+        if len(prices) != num_seconds:
+            raise ValueError(f'{symbol} has {len(prices)} prices, expected {num_seconds}')
+        if sys.byteorder != 'little':
+            prices.byteswap()
+
+        entry = {field: asset_data[field] for field in ASSET_FIELDS if field in asset_data}
+        entry['offset'] = offset
+        symbols[symbol] = entry
+
+        columns.append(prices.tobytes())
+        offset += len(prices) * PRICE.size
+
+    header = json.dumps({
+        'timestamp': simulated_data['timestamp'],
+        'datetime': simulated_data['datetime'],
+        'start_timestamp': simulated_data['start_timestamp'],
+        'end_timestamp': simulated_data['end_timestamp'],
+        'num_seconds': num_seconds,
+        'resolution': simulated_data['resolution'],
+        'dtype': 'float64',
+        'symbols': symbols,
+        'missing': missing
+    }, separators=(',', ':')).encode('utf-8')
+
+    padding = -(PREFIX.size + len(header)) % PRICE.size
+    header += b' ' * padding
+
+    return b''.join([PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)), header] + columns)
+
+
+class PriceWindow:
+    """
+    Read-only view over an encoded price window. Only the header is decoded up
+    front; prices are read straight out of the underlying buffer on demand.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+
+        magic, version, header_length = PREFIX.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a price window file')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported price window format version {version}')
+
+        header_end = PREFIX.size + header_length
+        self.header = json.loads(bytes(self._buffer[PREFIX.size:header_end]).decode('utf-8'))
+        self._data_start = header_end
+
+        self.start_timestamp = self.header['start_timestamp']
+        self.end_timestamp = self.header['end_timestamp']
+        self.num_seconds = self.header['num_seconds']
+        self.symbols = self.header['symbols']
+        self.missing = self.header['missing']
+
+    def __contains__(self, symbol):
+        return symbol in self.symbols
+
+    def asset(self, symbol):
+        """Per-symbol metadata (start/end price, period high/low, change, offset)."""
+        return self.symbols[symbol]
+
+    def price_at(self, symbol, second):
+        """Price of symbol at the given second of the window, without touching other data."""
+        if not 0 <= second < self.num_seconds:
+            raise IndexError(f'Second {second} outside window of {self.num_seconds} seconds')
+        position = self._data_start + self.symbols[symbol]['offset'] + second * PRICE.size
+        return PRICE.unpack_from(self._buffer, position)[0]
+
+    def prices(self, symbol, start=0, stop=None):
+        """
+        Slice of one symbol's prices as a float64 memoryview (zero copy on
+        little-endian hosts).
+        """
+        stop = self.num_seconds if stop is None else min(stop, self.num_seconds)
+        begin = self._data_start + self.symbols[symbol]['offset']
+        column = self._buffer[begin + start * PRICE.size:begin + stop * PRICE.size]
+        if sys.byteorder == 'little':
+            return column.cast('d')
+        values = array('d', column.tobytes())
+        values.byteswap()
+        return memoryview(values)
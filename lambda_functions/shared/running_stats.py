@@ -0,0 +1,59 @@
+import math
+
+# Volatility used when there are not enough returns to estimate one
+DEFAULT_VOLATILITY = 0.02
+
+
+class ReturnStats:
+    """
+    Single-pass (Welford) mean/variance of the step-to-step returns of a price
+    series, plus the running trend from its first to its last price.
+
+    Prices are pushed one at a time as they are read, so the statistics come out
+    of the same pass that streams the history in.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, first_price=None, last_price=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.first_price = first_price
+        self.last_price = last_price
+
+    def push(self, price):
+        """Append the newest price to the series."""
+        if self.last_price is not None:
+            ret = (price - self.last_price) / self.last_price
+            self.count += 1
+            delta = ret - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (ret - self.mean)
+        else:
+            self.first_price = price
+        self.last_price = price
+
+    @property
+    def volatility(self):
+        if self.count > 1:
+            return math.sqrt(self.m2 / (self.count - 1))
+        return DEFAULT_VOLATILITY
+
+    @property
+    def trend(self):
+        if self.first_price:
+            return (self.last_price - self.first_price) / self.first_price
+        return 0
+
+    def summary(self):
+        """Returns mean return, volatility, and trend."""
+        if self.count == 0:
+            return 0, DEFAULT_VOLATILITY, 0
+        return self.mean, self.volatility, self.trend
+
+    @classmethod
+    def from_prices(cls, prices):
+        """Build the accumulator from a stream of prices, oldest first."""
+        stats = cls()
+        for price in prices:
+            stats.push(price)
+        return stats
@@ -0,0 +1,142 @@
+from botocore.exceptions import ClientError
+import time
+
+# Active-session lookups that avoid scanning the sessions table.
+#
+# Every session carries expires_bucket = expires_at // BUCKET_SECONDS. The
+# ExpiresBucketIndex GSI (hash expires_bucket, range expires_at, keys only)
+# lets a reader query just the buckets that can still hold live sessions, with
+# a key condition on expires_at, so expired rows waiting for TTL deletion are
+# never read and the cost does not grow with the table.
+#
+# Only buckets up to now + MAX_SESSION_SECONDS are queried, so a session that
+# outlives MAX_SESSION_SECONDS is invisible to the index until its expiry comes
+# within that horizon. session_item() refuses to build such a session; every
+# writer should go through it.
+#
+# Sessions written without expires_bucket (before the index existed) never
+# appear in the index. backfill_legacy() is the one-off migration for them: a
+# single paginated scan for live rows without the attribute that sets it on
+# each (session_checker runs it for {"backfill": true}). Expired legacy rows
+# are left for TTL. Until that has run, scan_fallback makes the checks look for
+# legacy rows with the same scan; it is off by default because the scan reads
+# the whole table on every call.
+EXPIRES_INDEX = 'ExpiresBucketIndex'
+BUCKET_SECONDS = 3600
+# Longest session lifetime; bounds how many buckets can hold live sessions
+MAX_SESSION_SECONDS = 24 * 3600
+# Items read per page by the legacy scan
+SCAN_PAGE_SIZE = 500
+
+
+def expires_bucket(expires_at):
+    return int(expires_at) // BUCKET_SECONDS
+
+
+def session_item(session_id, user_id, expires_at, now=None, **attributes):
+    """
+    Session item with the bucket attribute the expiry index needs. Raises
+    ValueError for a session lasting longer than MAX_SESSION_SECONDS from now,
+    which the expiry index would not find.
+    """
+    now = int(time.time()) if now is None else int(now)
+    if int(expires_at) - now > MAX_SESSION_SECONDS:
+        raise ValueError(f'Sessions may last at most {MAX_SESSION_SECONDS} seconds')
+    return dict(
+        attributes,
+        session_id=session_id,
+        user_id=user_id,
+        expires_at=int(expires_at),
+        expires_bucket=expires_bucket(expires_at)
+    )
+
+
+def live_buckets(now, max_session_seconds=MAX_SESSION_SECONDS):
+    """Buckets that can hold sessions expiring after now, soonest first."""
+    return range(expires_bucket(now), expires_bucket(now + max_session_seconds) + 1)
+
+
+def backfill_bucket(sessions_table, session_id, expires_at):
+    """Set expires_bucket on a legacy session, unless it was set or deleted meanwhile."""
+    from boto3.dynamodb.conditions import Attr
+    try:
+        sessions_table.update_item(
+            Key={'session_id': session_id},
+            UpdateExpression='SET expires_bucket = :bucket',
+            ConditionExpression=Attr('session_id').exists() & Attr('expires_bucket').not_exists(),
+            ExpressionAttributeValues={':bucket': expires_bucket(expires_at)}
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+
+
+def iter_legacy_active(sessions_table, now):
+    """
+    Unexpired sessions without expires_bucket, found with a paginated scan and
+    backfilled as they are yielded. Stop iterating to stop the scan.
+    """
+    from boto3.dynamodb.conditions import Attr
+    scan = {
+        'FilterExpression': Attr('expires_at').gt(now) & Attr('expires_bucket').not_exists(),
+        'ProjectionExpression': 'session_id, expires_at',
+        'Limit': SCAN_PAGE_SIZE
+    }
+    while True:
+        response = sessions_table.scan(**scan)
+        for item in response.get('Items', []):
+            backfill_bucket(sessions_table, item['session_id'], item['expires_at'])
+            yield item
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def backfill_legacy(sessions_table, now):
+    """Set expires_bucket on every unexpired legacy session; returns how many."""
+    return sum(1 for _ in iter_legacy_active(sessions_table, now))
+
+
+def any_active(sessions_table, now, max_session_seconds=MAX_SESSION_SECONDS, scan_fallback=False):
+    """
+    True as soon as one unexpired session is found (Limit=1 per bucket), then
+    in legacy rows when scan_fallback is set.
+    """
+    from boto3.dynamodb.conditions import Key
+    for bucket in live_buckets(now, max_session_seconds):
+        response = sessions_table.query(
+            IndexName=EXPIRES_INDEX,
+            KeyConditionExpression=Key('expires_bucket').eq(bucket) & Key('expires_at').gt(now),
+            Limit=1
+        )
+        if response.get('Items'):
+            return True
+    if scan_fallback:
+        return next(iter_legacy_active(sessions_table, now), None) is not None
+    return False
+
+
+def count_active(sessions_table, now, max_session_seconds=MAX_SESSION_SECONDS, scan_fallback=False):
+    """
+    Number of unexpired sessions, counted with Select=COUNT over the live buckets
+    and following pagination, plus the legacy rows when scan_fallback is set.
+    Approximate only in that the index is eventually consistent.
+    """
+    from boto3.dynamodb.conditions import Key
+    total = 0
+    for bucket in live_buckets(now, max_session_seconds):
+        query = {
+            'IndexName': EXPIRES_INDEX,
+            'KeyConditionExpression': Key('expires_bucket').eq(bucket) & Key('expires_at').gt(now),
+            'Select': 'COUNT'
+        }
+        while True:
+            response = sessions_table.query(**query)
+            total += response.get('Count', 0)
+            if 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    # After the index count: rows backfilled here were not in it
+    if scan_fallback:
+        total += sum(1 for _ in iter_legacy_active(sessions_table, now))
+    return total
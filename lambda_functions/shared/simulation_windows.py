@@ -0,0 +1,72 @@
+import json
+
+# Simulation windows aligned to wall-clock 10-minute boundaries.
+#
+# Window W covers [W, W + WINDOW_SECONDS) where W = ts // WINDOW_SECONDS *
+# WINDOW_SECONDS, so second ts of a window is prices[ts - W], the same index as
+# ts % 600. Each window is written once, under keys versioned by its start,
+# before it begins; a reader computes the key for "now" by arithmetic and never
+# sees a window being replaced. The manifest is a small pointer to the windows
+# that exist, for readers that find their window missing (simulator late).
+WINDOW_SECONDS = 600
+WINDOWS_PREFIX = 'simulated_data/windows/'
+MANIFEST_KEY = f'{WINDOWS_PREFIX}manifest.json'
+# Windows listed in the manifest, newest last
+MANIFEST_WINDOWS = 6
+
+SIMULATED_DATA = 'simulated_1sec.json'
+PRICE_WINDOW = 'price_window.bin'
+PRICE_SNAPSHOTS = 'prices_snapshots.bin'
+
+
+def window_start(timestamp):
+    """Start of the aligned window containing timestamp."""
+    return int(timestamp) // WINDOW_SECONDS * WINDOW_SECONDS
+
+
+def window_key(start_timestamp, name):
+    """Key of one object (SIMULATED_DATA, PRICE_WINDOW, PRICE_SNAPSHOTS) of the window at start_timestamp."""
+    return f'{WINDOWS_PREFIX}{int(start_timestamp)}/{name}'
+
+
+def key_window_start(key):
+    """start_timestamp of a window object key, or None for other keys."""
+    if not key.startswith(WINDOWS_PREFIX):
+        return None
+    start = key[len(WINDOWS_PREFIX):].split('/', 1)[0]
+    return int(start) if start.isdigit() else None
+
+
+def latest_start(manifest, timestamp):
+    """Newest window in the manifest that has started by timestamp, or None."""
+    started = [start for start in manifest.get('windows', []) if start <= timestamp]
+    return max(started) if started else None
+
+
+def update_manifest(manifest, starts, updated_at):
+    """The manifest with starts added, keeping the newest MANIFEST_WINDOWS windows."""
+    windows = sorted(set(manifest.get('windows', [])) | set(starts))[-MANIFEST_WINDOWS:]
+    return {
+        'window_seconds': WINDOW_SECONDS,
+        'windows': windows,
+        'updated_at': int(updated_at)
+    }
+
+
+def read_manifest(s3_client, bucket):
+    """The manifest, or an empty one if no window has been written yet."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=MANIFEST_KEY)
+    except s3_client.exceptions.NoSuchKey:
+        return {'windows': []}
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+
+def write_manifest(s3_client, bucket, manifest):
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=MANIFEST_KEY,
+        Body=json.dumps(manifest, separators=(',', ':')),
+        ContentType='application/json',
+        CacheControl='no-cache'
+    )
@@ -0,0 +1,59 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Shard keys embed a zero-padded epoch timestamp, so S3's lexicographic key order
+# is also time order and a ListObjectsV2 StartAfter query acts as the index.
+TIMESTAMP_WIDTH = 10
+MAX_READ_WORKERS = 16
+
+
+def shard_key(prefix, timestamp, suffix='.json'):
+    """Key of the shard written at the given epoch timestamp."""
+    return f"{prefix}{int(timestamp):0{TIMESTAMP_WIDTH}d}{suffix}"
+
+
+def shard_timestamp(prefix, key):
+    """Epoch timestamp encoded in a shard key."""
+    return int(key[len(prefix):len(prefix) + TIMESTAMP_WIDTH])
+
+
+def list_shard_keys(s3_client, bucket, prefix, after_timestamp, until_timestamp=None):
+    """
+    Keys of shards written strictly after after_timestamp (and at or before
+    until_timestamp when given), oldest first. Only keys in that range are listed.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    # The bare timestamp prefix sorts just before the first shard written a second later
+    start_after = shard_key(prefix, int(after_timestamp) + 1, suffix='')
+
+    keys = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, StartAfter=start_after):
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if until_timestamp is not None and shard_timestamp(prefix, key) > until_timestamp:
+                return keys
+            keys.append(key)
+    return keys
+
+
+def write_shard(s3_client, bucket, key, payload):
+    """Write one immutable JSON shard."""
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(payload, separators=(',', ':')),
+        ContentType='application/json'
+    )
+
+
+def read_shards(s3_client, bucket, keys):
+    """Fetch and parse the given shards concurrently, returned in the order of keys."""
+    def read(key):
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+        return json.loads(response['Body'].read().decode('utf-8'))
+
+    if not keys:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(keys))) as executor:
+        return list(executor.map(read, keys))
@@ -0,0 +1,128 @@
+from decimal import Decimal
+
+# Mark-to-market valuation shared by the portfolio API and the leaderboard builder.
+#
+# value_portfolio is the exact path: Decimal arithmetic for the figures that are
+# shown to users. batch_position_values values every position of many portfolios
+# in one vectorized float64 pass (market value, cost basis and P/L per position),
+# and batch_portfolio_values sums those per portfolio for ranking; callers
+# re-value the few portfolios they actually display with value_portfolio.
+
+
+def value_position(holding, price):
+    """Exact market value, cost basis and P/L of one holding at the given price."""
+    current_price = Decimal(str(price))
+    quantity = Decimal(str(holding['quantity']))
+    avg_price = Decimal(str(holding['avg_price']))
+
+    market_value = current_price * quantity
+    cost_basis = avg_price * quantity
+    profit_loss = market_value - cost_basis
+    profit_loss_percent = (profit_loss / cost_basis * 100) if cost_basis > 0 else Decimal('0')
+
+    return {
+        'quantity': quantity,
+        'avg_price': avg_price,
+        'current_price': current_price,
+        'market_value': market_value,
+        'cost_basis': cost_basis,
+        'profit_loss': profit_loss,
+        'profit_loss_percent': profit_loss_percent
+    }
+
+
+def value_portfolio(portfolio, prices):
+    """
+    Exact valuation of one portfolio (symbol -> {'quantity', 'avg_price'}) against
+    prices (symbol -> price). Holdings without a price are left out.
+    Returns (positions, total_market_value, total_cost_basis).
+    """
+    positions = []
+    total_market_value = Decimal('0')
+    total_cost_basis = Decimal('0')
+
+    for symbol, holding in portfolio.items():
+        if symbol not in prices:
+            continue
+
+        position = value_position(holding, prices[symbol])
+        position['symbol'] = symbol
+        positions.append(position)
+
+        total_market_value += position['market_value']
+        total_cost_basis += position['cost_basis']
+
+    return positions, total_market_value, total_cost_basis
+
+
+def batch_position_values(portfolios, prices):
+    """
+    Market value, cost basis and P/L of every position of every portfolio in one
+    vectorized pass, as float64 arrays.
+
+    All positions are flattened into parallel arrays, priced against a single
+    price vector and valued together. Positions without a price are left out, as
+    in value_portfolio. Returns a dict of equal-length arrays with the
+    value_position keys plus 'owner' (index into portfolios) and 'symbol' (index
+    into list(prices)), in portfolio order.
+    """
+    import numpy as np
+
+    symbols = list(prices)
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+    price_vector = np.array([float(prices[symbol]) for symbol in symbols])
+
+    owners = []
+    symbol_ids = []
+    quantities = []
+    avg_prices = []
+    # Converting each Decimal to float is most of the cost; the rest is vectorized
+    for owner, portfolio in enumerate(portfolios):
+        for symbol, holding in portfolio.items():
+            symbol_id = symbol_index.get(symbol)
+            if symbol_id is None:
+                continue
+            owners.append(owner)
+            symbol_ids.append(symbol_id)
+            quantities.append(float(holding['quantity']))
+            avg_prices.append(float(holding['avg_price']))
+
+    symbol_ids = np.array(symbol_ids, dtype=np.intp)
+    quantities = np.array(quantities)
+    avg_prices = np.array(avg_prices)
+    current_prices = price_vector[symbol_ids]
+
+    market_values = quantities * current_prices
+    cost_bases = quantities * avg_prices
+    profit_losses = market_values - cost_bases
+    profit_loss_percents = np.divide(
+        profit_losses * 100, cost_bases,
+        out=np.zeros_like(profit_losses), where=cost_bases > 0
+    )
+
+    return {
+        'owner': np.array(owners, dtype=np.intp),
+        'symbol': symbol_ids,
+        'quantity': quantities,
+        'avg_price': avg_prices,
+        'current_price': current_prices,
+        'market_value': market_values,
+        'cost_basis': cost_bases,
+        'profit_loss': profit_losses,
+        'profit_loss_percent': profit_loss_percents
+    }
+
+
+def batch_portfolio_values(portfolios, prices):
+    """
+    Market value and cost basis of every portfolio, summed per owner from
+    batch_position_values. Returns two float64 arrays indexed like portfolios.
+    """
+    import numpy as np
+
+    positions = batch_position_values(portfolios, prices)
+    count = len(portfolios)
+    return tuple(
+        np.bincount(positions['owner'], weights=positions[key], minlength=count).astype(np.float64, copy=False)
+        for key in ('market_value', 'cost_basis')
+    )
@@ -0,0 +1,65 @@
+import json
+
+# Compact client-side form of a PriceWindow.
+#
+# Clients get every second of the window at once and play it back locally
+# instead of asking for one second at a time. The price for wall-clock time t
+# is prices[second] with second = t - start_timestamp, clamped to the window.
+# Windows are aligned to 10-minute boundaries, so this is also t % 600.
+PRICE_DECIMALS = 4
+SECOND_INDEX = 'since_start'
+
+
+def window_payload(window, symbols=None):
+    """Window bounds, summary and per-second prices for symbols (default: all)."""
+    symbols = list(window.symbols) if symbols is None else symbols
+
+    return {
+        'start_timestamp': window.start_timestamp,
+        'end_timestamp': window.end_timestamp,
+        'num_seconds': window.num_seconds,
+        'resolution': window.header['resolution'],
+        'simulation_timestamp': window.header['timestamp'],
+        'second_index': SECOND_INDEX,
+        'symbols': {
+            symbol: {
+                'start_price': window.symbols[symbol]['start_price'],
+                'end_price': window.symbols[symbol]['end_price'],
+                'period_high': window.symbols[symbol]['period_high'],
+                'period_low': window.symbols[symbol]['period_low'],
+                'period_change_percent': window.symbols[symbol]['period_change_percent'],
+                'prices': [round(price, PRICE_DECIMALS) for price in window.prices(symbol)]
+            }
+            for symbol in symbols
+        },
+        'missing': list(window.missing)
+    }
+
+
+def window_messages(window, max_bytes):
+    """
+    The window as a list of serialized 'window' messages no larger than max_bytes
+    each (for transports with frame limits), split by symbol. A client has the
+    whole window once it holds chunks 0..chunks-1 for the same start_timestamp.
+    """
+    groups = []
+    current = []
+    current_size = 0
+    for symbol in window.symbols:
+        size = len(json.dumps(window_payload(window, [symbol])['symbols'], separators=(',', ':')))
+        if current and current_size + size > max_bytes * 0.9:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append(symbol)
+        current_size += size
+    groups.append(current)
+
+    return [
+        json.dumps({
+            'type': 'window',
+            'chunk': i,
+            'chunks': len(groups),
+            'window': window_payload(window, group)
+        }, separators=(',', ':'))
+        for i, group in enumerate(groups)
+    ]
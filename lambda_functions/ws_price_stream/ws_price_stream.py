@@ -0,0 +1,85 @@
+import json
+import os
+import aws_clients
+import metrics
+import market_data_cache
+from window_payload import window_messages
+
+s3_client = aws_clients.lazy_client('s3')
+
+# API Gateway WebSocket messages are limited to 128 KB
+MAX_MESSAGE_BYTES = 96 * 1024
+
+
+def management_client(event):
+    """apigatewaymanagementapi client for the endpoint the event came from, reused while warm."""
+    request_context = event['requestContext']
+    endpoint = f"https://{request_context['domainName']}/{request_context['stage']}"
+    return aws_clients.client('apigatewaymanagementapi', endpoint_url=endpoint)
+
+
+def send(client, connection_id, message):
+    """Post one message; returns False if the client has already gone away."""
+    try:
+        client.post_to_connection(ConnectionId=connection_id, Data=message.encode('utf-8'))
+        return True
+    except client.exceptions.GoneException:
+        return False
+
+
+@metrics.instrument('ws_price_stream')
+def lambda_handler(event, context):
+    """
+    WebSocket price stream.
+    Instead of polling /prices every second, a client connects once and sends
+    {"action": "subscribe"}; it receives the whole current 10-minute window of
+    simulated prices (split into chunks under the frame limit) and ticks through
+    it locally, subscribing again when the window ends.
+    """
+    market_data_bucket = os.environ['MARKET_DATA_BUCKET']
+
+    request_context = event['requestContext']
+    route_key = request_context['routeKey']
+    connection_id = request_context['connectionId']
+
+    if route_key in ('$connect', '$disconnect'):
+        return {'statusCode': 200}
+
+    try:
+        body = json.loads(event.get('body') or '{}')
+    except ValueError:
+        body = {}
+    # Valid JSON that is not an object ([], "x") is treated like malformed JSON
+    if not isinstance(body, dict):
+        body = {}
+
+    action = body.get('action', 'subscribe')
+    client = management_client(event)
+
+    if action == 'ping':
+        send(client, connection_id, json.dumps({'type': 'pong'}))
+        return {'statusCode': 200}
+
+    if action != 'subscribe':
+        send(client, connection_id, json.dumps({'type': 'error', 'message': f'Unknown action {action}'}))
+        return {'statusCode': 400}
+
+    try:
+        window = market_data_cache.get_price_window(s3_client, market_data_bucket)
+    except s3_client.exceptions.NoSuchKey:
+        send(client, connection_id, json.dumps({
+            'type': 'error',
+            'message': 'No price data available yet. Please wait for the first simulation run.'
+        }))
+        return {'statusCode': 404}
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        send(client, connection_id, json.dumps({'type': 'error', 'message': f'Error fetching prices: {str(e)}'}))
+        return {'statusCode': 500}
+
+    for message in window_messages(window, MAX_MESSAGE_BYTES):
+        if not send(client, connection_id, message):
+            print(f"Connection {connection_id} closed before the window was sent")
+            break
+
+    return {'statusCode': 200}
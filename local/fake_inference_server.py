@@ -0,0 +1,119 @@
+"""
+Local stand-in for the OpenAI-compatible chat completion endpoint used by news_generator.
+
+Answers POST /v1/chat/completions (and /models/<id>/v1/chat/completions) with
+canned financial prose built from the prompt, with optional artificial latency
+and failures so the concurrent generation pipeline can be exercised offline:
+
+    python local/fake_inference_server.py --port 8766 --latency 2 --fail-rate 0.1
+    HUGGINGFACE_BASE_URL=http://127.0.0.1:8766 python -c "..."
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SENTENCES = [
+    "Market participants are weighing the latest policy signals from major central banks.",
+    "Traders remain cautious as investors reassess the outlook for interest rates.",
+    "Analysts say positioning has turned more defensive ahead of key data releases.",
+    "Currency desks report steady flows as attention shifts to upcoming economic indicators.",
+    "Sentiment has been shaped by shifting expectations for growth and inflation."
+]
+
+HEADLINES = [
+    "Currencies Steady as Traders Await Policy Signals",
+    "Forex Markets Weigh Central Bank Outlook",
+    "Investors Turn Cautious Ahead of Key Data",
+    "Traders Reassess Rate Path as Markets Shift"
+]
+
+
+def fake_completion(prompt):
+    """Canned text shaped like what the prompt asks for."""
+    lowered = prompt.lower()
+    if 'headline:' in lowered and 'article:' in lowered:
+        return f"HEADLINE: {random.choice(HEADLINES)}\nARTICLE: {' '.join(random.sample(SENTENCES, 3))}"
+    if 'headline' in lowered:
+        return random.choice(HEADLINES)
+    return ' '.join(random.sample(SENTENCES, 3))
+
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    request_count = 0
+
+    def do_POST(self):
+        FakeInferenceHandler.request_count += 1
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.latency:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+
+        if random.random() < self.fail_rate:
+            self.send_json(503, {'error': 'fake inference failure'})
+            return
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        messages = request.get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        content = fake_completion(prompt)
+
+        self.send_json(200, {
+            'id': f'chatcmpl-{FakeInferenceHandler.request_count}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': len(prompt.split()),
+                'completion_tokens': len(content.split()),
+                'total_tokens': len(prompt.split()) + len(content.split())
+            }
+        })
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, latency=0.0, fail_rate=0.0):
+    """Start the fake in a background thread and return the server (port 0 picks a free port)."""
+    FakeInferenceHandler.latency = latency
+    FakeInferenceHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeInferenceHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean seconds of delay per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with HTTP 503')
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.fail_rate)
+    print(f"Fake inference server listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
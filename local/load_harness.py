@@ -0,0 +1,412 @@
+"""
+Load harness: replays the frontend's request schedule for many virtual users
+against the Lambda handlers in-process, with S3 and DynamoDB served by moto.
+
+Every virtual user follows App.js: /portfolio every second, /prices every
+second (or one /prices?mode=window per 10-minute window with --prices window),
+/news?since=<cursor> every 10 seconds, /leaderboard once on load, and trades
+in bursts. leaderboard_builder runs once a minute as its scheduled job. The
+schedule is played in virtual time as fast as the handlers allow, one request
+at a time (moto is not thread-safe), so latencies are service times without
+queueing. AWS calls are counted per endpoint through a botocore before-call
+hook, and the handlers' metrics records (see lambda_functions/shared/metrics.py)
+are collected in memory to break each endpoint's time down by span.
+
+Like a browser, virtual users send Accept-Encoding (--accept-encoding, '' for
+none) and revalidate with the last ETag they got for each URL (--no-etags to
+turn that off); response bytes are counted as they would go on the wire.
+
+    pip install moto
+    python local/load_harness.py --users 1000 --duration 30
+    python local/load_harness.py --users 1000 --duration 30 --prices window --json baseline.json
+    python local/load_harness.py --users 1000 --duration 30 --accept-encoding '' --no-etags
+"""
+import argparse
+import base64
+import gzip
+import heapq
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAMBDAS = os.path.join(ROOT, 'lambda_functions')
+
+sys.path.insert(0, os.path.join(LAMBDAS, 'shared'))
+for name in sorted(os.listdir(LAMBDAS)):
+    if name != 'shared' and os.path.isdir(os.path.join(LAMBDAS, name)):
+        sys.path.insert(0, os.path.join(LAMBDAS, name))
+
+os.environ.update({
+    'AWS_DEFAULT_REGION': 'eu-west-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'MARKET_DATA_BUCKET': 'trade-quest-load-market-data',
+    'NEWS_BUCKET': 'trade-quest-load-news',
+    'USERS_TABLE': 'trade-quest-load-users',
+    'TRADES_TABLE': 'trade-quest-load-trades',
+    'LEADERBOARD_TABLE': 'trade-quest-load-leaderboard'
+})
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+DEFAULT_SYMBOLS = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 'USDCAD=X', 'USDCHF=X']
+
+# Endpoint being served, so the AWS call hook knows whom to charge
+current_endpoint = [None]
+aws_calls = defaultdict(Counter)
+
+
+def count_aws_call(model, **kwargs):
+    aws_calls[current_endpoint[0]][f'{model.service_model.service_name}.{model.name}'] += 1
+
+
+def create_resources(num_users, symbols):
+    """Buckets and tables shaped like terraform/main.tf, seeded with history, windows, news and users."""
+    s3 = boto3.client('s3')
+    dynamodb = boto3.client('dynamodb')
+
+    for bucket in (os.environ['MARKET_DATA_BUCKET'], os.environ['NEWS_BUCKET']):
+        s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+
+    dynamodb.create_table(
+        TableName=os.environ['USERS_TABLE'],
+        KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'user_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    dynamodb.create_table(
+        TableName=os.environ['TRADES_TABLE'],
+        KeySchema=[{'AttributeName': 'trade_id', 'KeyType': 'HASH'}, {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'trade_id', 'AttributeType': 'S'},
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'N'}
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'UserIdIndex',
+            'KeySchema': [{'AttributeName': 'user_id', 'KeyType': 'HASH'}, {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}],
+            'Projection': {'ProjectionType': 'ALL'}
+        }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    dynamodb.create_table(
+        TableName=os.environ['LEADERBOARD_TABLE'],
+        KeySchema=[{'AttributeName': 'period', 'KeyType': 'HASH'}, {'AttributeName': 'rank', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'period', 'AttributeType': 'S'},
+            {'AttributeName': 'rank', 'AttributeType': 'N'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+    import news_log
+    import price_history_store
+    import price_simulator
+
+    now = int(time.time())
+    rng = random.Random(7)
+    prices = {symbol: rng.uniform(0.5, 150) for symbol in symbols}
+    for minutes_ago in range(60, 0, -1):
+        timestamp = now - minutes_ago * 60
+        for symbol in symbols:
+            prices[symbol] *= 1 + rng.gauss(0, 0.001)
+        price_history_store.write_minute_shard(
+            s3, os.environ['MARKET_DATA_BUCKET'], timestamp, '',
+            {symbol: {'timestamp': timestamp, 'price': round(price, 5)} for symbol, price in prices.items()}
+        )
+    price_simulator.lambda_handler({}, None)
+
+    news_log.append_articles(s3, os.environ['NEWS_BUCKET'], now, [
+        {
+            'id': f'news_{now}_{i}', 'timestamp': now, 'publish_at': now, 'valid_until': now + 3600,
+            'headline': f'Load test headline {i}', 'article': 'Load test article.',
+            'category': 'market_wide', 'sentiment': 'neutral', 'symbol': 'MARKET'
+        }
+        for i in range(3)
+    ])
+
+    users = boto3.resource('dynamodb').Table(os.environ['USERS_TABLE'])
+    with users.batch_writer() as batch:
+        for i in range(num_users):
+            batch.put_item(Item={
+                'user_id': f'user-{i}', 'username': f'user-{i}', 'balance': Decimal('100000'),
+                'portfolio': {}, 'total_trades': 0, 'total_profit_loss': Decimal('0')
+            })
+
+
+def get_event(params=None, headers=None, method='GET'):
+    return {
+        'queryStringParameters': params or {},
+        'headers': headers or {},
+        'requestContext': {'http': {'method': method}}
+    }
+
+
+class VirtualUser:
+    def __init__(self, user_id, rng):
+        self.user_id = user_id
+        self.rng = rng
+        self.news_cursor = None
+        self.held = Counter()
+        # Last ETag per URL, sent back as If-None-Match
+        self.etags = {}
+
+
+def request_headers(user, url, client):
+    headers = {}
+    if client['accept_encoding']:
+        headers['accept-encoding'] = client['accept_encoding']
+    if client['etags'] and url in user.etags:
+        headers['if-none-match'] = user.etags[url]
+    return headers
+
+
+def wire_body(response):
+    """The response body as bytes on the wire (still compressed, if it was)."""
+    body = response.get('body') or ''
+    return base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+
+
+def decoded_body(response):
+    body = wire_body(response)
+    encoding = (response.get('headers') or {}).get('Content-Encoding')
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(body)
+    return body
+
+
+def build_schedule(num_users, duration, prices_mode, trade_bursts_per_minute, burst_size, seed):
+    """Heap of (virtual_time, seq, endpoint, user) for the whole run."""
+    rng = random.Random(seed)
+    events = []
+    seq = 0
+
+    def add(at, endpoint, user):
+        nonlocal seq
+        if at < duration:
+            heapq.heappush(events, (at, seq, endpoint, user))
+            seq += 1
+
+    start_wall = time.time()
+    for i in range(num_users):
+        user = VirtualUser(f'user-{i}', random.Random(seed + i))
+        joined = rng.uniform(0, 1)
+
+        add(joined, 'leaderboard', user)
+        for tick in range(int(duration) + 1):
+            add(joined + tick, 'portfolio', user)
+            if prices_mode == 'second':
+                add(joined + tick, 'prices', user)
+        if prices_mode == 'window':
+            add(joined, 'prices_window', user)
+            boundary = (int(start_wall) // 600 + 1) * 600 - start_wall
+            while boundary < duration:
+                add(boundary + rng.uniform(0, 1), 'prices_window', user)
+                boundary += 600
+        for tick in range(0, int(duration) + 1, 10):
+            add(joined + tick, 'news', user)
+
+        at = joined + rng.expovariate(trade_bursts_per_minute / 60) if trade_bursts_per_minute else duration
+        while at < duration:
+            for n in range(rng.randint(1, burst_size)):
+                add(at + n * 0.2, 'trade', user)
+            at += rng.expovariate(trade_bursts_per_minute / 60)
+
+    for tick in range(0, int(duration) + 1, 60):
+        add(tick + 0.5, 'leaderboard_builder', None)
+
+    return events
+
+
+def request(endpoint, user, symbols, modules, client):
+    """(handler, event) for one scheduled request."""
+    if endpoint == 'leaderboard_builder':
+        return modules['leaderboard_builder'], {}
+
+    gets = {
+        'portfolio': ('api_get_portfolio', {'user_id': user.user_id}),
+        'prices': ('api_get_prices', {}),
+        'prices_window': ('api_get_prices', {'mode': 'window'}),
+        'news': ('api_get_news', {'since': user.news_cursor} if user.news_cursor else {}),
+        'leaderboard': ('api_get_leaderboard', {})
+    }
+    if endpoint in gets:
+        module, params = gets[endpoint]
+        url = (endpoint, tuple(sorted(params.items())))
+        return modules[module], get_event(params, request_headers(user, url, client))
+    if endpoint == 'trade':
+        held = [symbol for symbol, quantity in user.held.items() if quantity > 0]
+        if held and user.rng.random() < 0.4:
+            symbol = user.rng.choice(held)
+            order = {'symbol': symbol, 'action': 'sell', 'quantity': user.rng.randint(1, user.held[symbol])}
+        else:
+            order = {'symbol': user.rng.choice(symbols), 'action': 'buy', 'quantity': user.rng.randint(1, 100)}
+        headers = request_headers(user, None, dict(client, etags=False))
+        event = get_event(headers=headers, method='POST')
+        return modules['api_execute_trade'], dict(event, body=json.dumps(dict(order, user_id=user.user_id)))
+    raise ValueError(endpoint)
+
+
+def after_response(endpoint, user, event, response):
+    """Carry client state (news cursor, ETags, holdings) forward like the frontend does."""
+    if response.get('statusCode') != 200:
+        return
+    etag = (response.get('headers') or {}).get('ETag')
+    if etag and endpoint != 'trade':
+        user.etags[(endpoint, tuple(sorted(event['queryStringParameters'].items())))] = etag
+    if endpoint == 'news':
+        user.news_cursor = json.loads(decoded_body(response))['data']['cursor']
+    elif endpoint == 'trade':
+        order = json.loads(event['body'])
+        sign = 1 if order['action'] == 'buy' else -1
+        user.held[order['symbol']] += sign * order['quantity']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def run(args):
+    with mock_aws():
+        # After mock_aws, which resets the default session; before any handler creates its clients
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register('before-call', count_aws_call)
+
+        import metrics
+        sink = metrics.MemorySink()
+        metrics.set_sink(sink)
+
+        symbols = DEFAULT_SYMBOLS[:args.symbols]
+        os.environ['ASSETS_TO_TRACK'] = json.dumps(symbols)
+
+        current_endpoint[0] = 'setup'
+        setup_start = time.perf_counter()
+        create_resources(args.users, symbols)
+        print(f"Seeded {args.users} users, {len(symbols)} symbols in {time.perf_counter() - setup_start:.1f}s")
+
+        import api_execute_trade
+        import api_get_leaderboard
+        import api_get_news
+        import api_get_portfolio
+        import api_get_prices
+        import leaderboard_builder
+        modules = {
+            module.__name__: module.lambda_handler
+            for module in (api_execute_trade, api_get_leaderboard, api_get_news,
+                           api_get_portfolio, api_get_prices, leaderboard_builder)
+        }
+
+        events = build_schedule(args.users, args.duration, args.prices, args.trade_bursts, args.burst_size, args.seed)
+        total = len(events)
+        print(f"{total} requests scheduled over {args.duration}s of virtual time ({total / args.duration:.0f} req/s offered)")
+
+        client = {'accept_encoding': args.accept_encoding, 'etags': args.etags}
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        wire_bytes = Counter()
+        span_totals = defaultdict(Counter)
+        sink.records.clear()
+        run_start = time.perf_counter()
+
+        while events:
+            _, _, endpoint, user = heapq.heappop(events)
+            handler, event = request(endpoint, user, symbols, modules, client)
+
+            current_endpoint[0] = endpoint
+            started = time.perf_counter()
+            response = handler(event, None)
+            latencies[endpoint].append(time.perf_counter() - started)
+            statuses[endpoint][response.get('statusCode')] += 1
+            if endpoint != 'leaderboard_builder':
+                wire_bytes[endpoint] += len(wire_body(response))
+
+            after_response(endpoint, user, event, response)
+
+            for record in sink.records:
+                for definition in record['_aws']['CloudWatchMetrics'][0]['Metrics']:
+                    if definition['Unit'] == 'Milliseconds':
+                        span_totals[endpoint][definition['Name']] += record[definition['Name']]
+            sink.records.clear()
+
+        wall = time.perf_counter() - run_start
+
+    report = {
+        'users': args.users,
+        'virtual_seconds': args.duration,
+        'prices_mode': args.prices,
+        'accept_encoding': args.accept_encoding,
+        'etags': args.etags,
+        'requests': total,
+        'wall_seconds': wall,
+        'throughput_rps': total / wall if wall else 0.0,
+        'endpoints': {}
+    }
+
+    print(f"\n{total} requests in {wall:.1f}s wall: {report['throughput_rps']:.0f} req/s")
+    print(f"{'endpoint':<20} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'errors':>7} {'304':>6} {'bytes/req':>10}  AWS calls/request")
+    for endpoint in sorted(latencies):
+        values = sorted(latencies[endpoint])
+        count = len(values)
+        calls = aws_calls[endpoint]
+        entry = {
+            'count': count,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000,
+            'statuses': {str(code): n for code, n in statuses[endpoint].items()},
+            'wire_bytes_per_request': wire_bytes[endpoint] / count,
+            'aws_calls_per_request': {op: n / count for op, n in sorted(calls.items())},
+            'span_ms_per_request': {name: total / count for name, total in span_totals[endpoint].most_common()}
+        }
+        report['endpoints'][endpoint] = entry
+
+        errors = count - statuses[endpoint][200] - statuses[endpoint][304]
+        per_request = ', '.join(f'{op} {n:.2f}' for op, n in entry['aws_calls_per_request'].items()) or '-'
+        print(f"{endpoint:<20} {count:>8} {entry['p50_ms']:>8.2f} {entry['p95_ms']:>8.2f} "
+              f"{entry['p99_ms']:>8.2f} {entry['max_ms']:>8.2f} {errors:>7} {statuses[endpoint][304]:>6} "
+              f"{entry['wire_bytes_per_request']:>10.0f}  {per_request}")
+
+    print(f"\n{'endpoint':<20} mean ms per request by span")
+    for endpoint, entry in sorted(report['endpoints'].items()):
+        spans = ', '.join(f'{name} {ms:.2f}' for name, ms in entry['span_ms_per_request'].items())
+        print(f"{endpoint:<20} {spans}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the frontend polling schedule against the Lambda handlers')
+    parser.add_argument('--users', type=int, default=200, help='virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='virtual seconds to simulate')
+    parser.add_argument('--prices', choices=['second', 'window'], default='second',
+                        help='poll /prices every second, or fetch one window per 10 minutes')
+    parser.add_argument('--symbols', type=int, default=4, help=f'tracked symbols (at most {len(DEFAULT_SYMBOLS)})')
+    parser.add_argument('--trade-bursts', type=float, default=0.5, help='trade bursts per user per minute')
+    parser.add_argument('--burst-size', type=int, default=3, help='most trades in one burst')
+    parser.add_argument('--accept-encoding', default='gzip, br', help="Accept-Encoding sent by clients ('' for none)")
+    parser.add_argument('--no-etags', dest='etags', action='store_false', help='do not revalidate with If-None-Match')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the report to this file')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Local stand-in for the API Gateway WebSocket price stream.
+
+Reads one message per line from stdin, as the browser would send them
+({"action": "subscribe"}, {"action": "ping"}), picks the route the way the
+deployed API does (route_selection_expression $request.body.action, else
+$default) and invokes ws_price_stream.lambda_handler in-process. Messages the
+handler posts back go through a fake apigatewaymanagementapi client and are
+printed, one line each. $connect is sent first and $disconnect at end of input.
+
+Prices come from MARKET_DATA_BUCKET, so point it (and AWS_ENDPOINT_URL_S3 if
+needed) at a bucket the simulator has written, or pass --moto to seed an
+in-memory one with an hour of history and a simulated window:
+
+    echo '{"action": "subscribe"}' | python local/ws_shim.py --moto
+    python local/ws_shim.py --moto --gone-after 1 --max-message-bytes 8000
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAMBDAS = os.path.join(ROOT, 'lambda_functions')
+
+sys.path.insert(0, os.path.join(LAMBDAS, 'shared'))
+sys.path.insert(0, os.path.join(LAMBDAS, 'ws_price_stream'))
+
+# Routes the deployed API has besides $connect / $disconnect / $default (terraform/main.tf)
+ACTION_ROUTES = ('subscribe', 'ping')
+
+CONNECTION_ID = 'local-connection'
+
+
+class GoneException(Exception):
+    """What post_to_connection raises once the client has disconnected."""
+
+
+class FakeManagementClient:
+    """Prints what the handler posts; raises GoneException after gone_after messages."""
+
+    class exceptions:
+        GoneException = GoneException
+
+    def __init__(self, raw=False, gone_after=None):
+        self.raw = raw
+        self.gone_after = gone_after
+        self.posted = 0
+
+    def post_to_connection(self, ConnectionId, Data):
+        if self.gone_after is not None and self.posted >= self.gone_after:
+            raise GoneException(ConnectionId)
+        self.posted += 1
+        print(f"<- {Data.decode('utf-8') if self.raw else summarize(Data)}")
+
+
+def summarize(data):
+    """One line for a posted message: its type and size, and the symbols a window chunk holds."""
+    message = json.loads(data)
+    summary = f"{message.get('type')} ({len(data)} bytes)"
+    if 'chunk' in message:
+        summary += f" chunk {message['chunk']}/{message['chunks']}"
+    if isinstance(message.get('window'), dict):
+        window = message['window']
+        summary += f" window {window.get('start_timestamp')} symbols {', '.join(window.get('symbols', {}))}"
+    if 'message' in message:
+        summary += f": {message['message']}"
+    return summary
+
+
+def route_for(body):
+    """The route API Gateway would select for a message body."""
+    try:
+        action = json.loads(body).get('action')
+    except (ValueError, AttributeError):
+        return '$default'
+    return action if action in ACTION_ROUTES else '$default'
+
+
+def ws_event(route_key, body=None):
+    return {
+        'requestContext': {
+            'routeKey': route_key,
+            'connectionId': CONNECTION_ID,
+            'domainName': 'localhost',
+            'stage': 'local'
+        },
+        'body': body
+    }
+
+
+def serve(lines, client):
+    import ws_price_stream
+    ws_price_stream.management_client = lambda event: client
+
+    print(f"$connect -> {ws_price_stream.lambda_handler(ws_event('$connect'), None)}")
+    for line in lines:
+        body = line.strip()
+        if not body:
+            continue
+        route_key = route_for(body)
+        response = ws_price_stream.lambda_handler(ws_event(route_key, body), None)
+        print(f"{route_key} -> {response}")
+    print(f"$disconnect -> {ws_price_stream.lambda_handler(ws_event('$disconnect'), None)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local WebSocket shim for ws_price_stream')
+    parser.add_argument('--moto', action='store_true', help='serve prices from an in-memory S3 seeded by the load harness')
+    parser.add_argument('--raw', action='store_true', help='print posted messages in full')
+    parser.add_argument('--gone-after', type=int, help='disconnect the client after this many messages')
+    parser.add_argument('--max-message-bytes', type=int, help='override the frame size the window is split to')
+    parser.add_argument('--metrics', action='store_true', help='also print the handler\'s EMF metrics records')
+    args = parser.parse_args()
+
+    if not args.metrics:
+        import metrics
+        metrics.set_sink(metrics.MemorySink())
+
+    client = FakeManagementClient(raw=args.raw, gone_after=args.gone_after)
+    if args.max_message_bytes:
+        import ws_price_stream
+        ws_price_stream.MAX_MESSAGE_BYTES = args.max_message_bytes
+
+    if not args.moto:
+        serve(sys.stdin, client)
+        return
+
+    # Sets the harness environment (buckets, tables, region) on import
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import load_harness
+    with load_harness.mock_aws():
+        load_harness.boto3.setup_default_session()
+        os.environ['ASSETS_TO_TRACK'] = json.dumps(load_harness.DEFAULT_SYMBOLS)
+        load_harness.create_resources(0, load_harness.DEFAULT_SYMBOLS)
+        serve(sys.stdin, client)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Yahoo Finance chart/spark endpoints used by price_collector.
+
+Serves random-walk quotes in the same chart/result/meta (and spark/result/response/meta)
+shape as the real API, with optional artificial latency and failures so the
+concurrent fetch engine can be exercised offline:
+
+    python local/yahoo_stub_server.py --port 8765 --latency 0.5 --fail-rate 0.1
+    YAHOO_BASE_URL=http://localhost:8765 python -c "..."
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+_prices = {}
+_lock = threading.Lock()
+
+
+def next_meta(symbol):
+    """Advance the symbol's random walk and return a chart 'meta' block."""
+    with _lock:
+        price = _prices.get(symbol, random.uniform(1, 200))
+        price *= 1 + random.gauss(0, 0.001)
+        _prices[symbol] = price
+
+    return {
+        'symbol': symbol,
+        'currency': 'USD',
+        'regularMarketPrice': round(price, 4),
+        'regularMarketDayHigh': round(price * 1.01, 4),
+        'regularMarketDayLow': round(price * 0.99, 4),
+        'regularMarketOpen': round(price * 0.995, 4),
+        'previousClose': round(price * 0.998, 4)
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    request_count = 0
+
+    def do_GET(self):
+        StubHandler.request_count += 1
+        if self.latency:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+
+        if random.random() < self.fail_rate:
+            self.send_json(500, {'error': 'stub failure'})
+            return
+
+        url = urlparse(self.path)
+        if url.path.startswith('/v8/finance/chart/'):
+            symbol = unquote(url.path[len('/v8/finance/chart/'):])
+            self.send_json(200, {
+                'chart': {
+                    'result': [{'meta': next_meta(symbol), 'timestamp': [], 'indicators': {}}],
+                    'error': None
+                }
+            })
+        elif url.path == '/v8/finance/spark':
+            symbols = parse_qs(url.query).get('symbols', [''])[0].split(',')
+            self.send_json(200, {
+                'spark': {
+                    'result': [
+                        {'symbol': symbol, 'response': [{'meta': next_meta(symbol)}]}
+                        for symbol in symbols if symbol
+                    ],
+                    'error': None
+                }
+            })
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, latency=0.0, fail_rate=0.0):
+    """Start the stub in a background thread and return the server (port 0 picks a free port)."""
+    StubHandler.latency = latency
+    StubHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean seconds of delay per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with HTTP 500')
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.fail_rate)
+    print(f"Yahoo stub listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -12,6 +12,44 @@ resource "aws_s3_bucket_versioning" "market_data" {
   }
 }
 
+resource "aws_s3_bucket_lifecycle_configuration" "market_data" {
+  bucket = aws_s3_bucket.market_data.id
+
+  rule {
+    id     = "expire-minute-price-shards"
+    status = "Enabled"
+
+    filter {
+      prefix = "collected_prices/minutes/"
+    }
+
+    expiration {
+      days = 2
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+
+  rule {
+    id     = "expire-simulation-windows"
+    status = "Enabled"
+
+    filter {
+      prefix = "simulated_data/windows/"
+    }
+
+    expiration {
+      days = 2
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+}
+
 resource "aws_s3_bucket" "news_data" {
   bucket = "${var.project_name}-news-${var.environment}"
 }
@@ -23,6 +61,28 @@ resource "aws_s3_bucket_versioning" "news_data" {
   }
 }
 
+resource "aws_s3_bucket_lifecycle_configuration" "news_data" {
+  bucket = aws_s3_bucket.news_data.id
+
+  rule {
+    id     = "expire-news-log-shards"
+    status = "Enabled"
+
+    filter {
+      prefix = "news_log/"
+    }
+
+    expiration {
+      days = 2
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+
+}
+
 resource "aws_s3_bucket" "lambda_artifacts" {
   bucket = "${var.project_name}-lambda-artifacts-${var.environment}"
 }
@@ -72,12 +132,30 @@ resource "aws_dynamodb_table" "sessions" {
     type = "S"
   }
 
+  attribute {
+    name = "expires_bucket"
+    type = "N"
+  }
+
+  attribute {
+    name = "expires_at"
+    type = "N"
+  }
+
   global_secondary_index {
     name            = "UserIdIndex"
     hash_key        = "user_id"
     projection_type = "ALL"
   }
 
+  # Hourly expiry buckets: session_checker queries only buckets that can hold live sessions
+  global_secondary_index {
+    name            = "ExpiresBucketIndex"
+    hash_key        = "expires_bucket"
+    range_key       = "expires_at"
+    projection_type = "KEYS_ONLY"
+  }
+
   ttl {
     attribute_name = "expires_at"
     enabled        = true
@@ -193,7 +271,8 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
           "dynamodb:Query",
-          "dynamodb:Scan"
+          "dynamodb:Scan",
+          "dynamodb:BatchWriteItem"
         ]
         Resource = [
           aws_dynamodb_table.users.arn,
@@ -214,6 +293,13 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "logs:PutLogEvents"
         ]
         Resource = "arn:aws:logs:*:*:*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "execute-api:ManageConnections"
+        ]
+        Resource = "${aws_apigatewayv2_api.price_stream.execution_arn}/*"
       }
     ]
   })
@@ -395,6 +481,24 @@ resource "aws_lambda_function" "api_get_prices" {
 }
 
 
+resource "aws_lambda_function" "ws_price_stream" {
+  filename         = "${path.module}/../lambda_packages/ws_price_stream.zip"
+  function_name    = "${var.project_name}-ws-price-stream-${var.environment}"
+  role            = aws_iam_role.lambda_execution_role.arn
+  handler         = "ws_price_stream.lambda_handler"
+  source_code_hash = fileexists("${path.module}/../lambda_packages/ws_price_stream.zip") ? filebase64sha256("${path.module}/../lambda_packages/ws_price_stream.zip") : null
+  runtime         = "python3.11"
+  timeout         = 30
+  memory_size     = 256
+
+  environment {
+    variables = {
+      MARKET_DATA_BUCKET = aws_s3_bucket.market_data.id
+    }
+  }
+}
+
+
 resource "aws_lambda_function" "api_get_news" {
   filename         = "${path.module}/../lambda_packages/api_get_news.zip"
   function_name    = "${var.project_name}-api-get-news-${var.environment}"
@@ -453,6 +557,24 @@ resource "aws_lambda_function" "api_get_portfolio" {
 }
 
 
+resource "aws_lambda_function" "api_get_trades" {
+  filename         = "${path.module}/../lambda_packages/api_get_trades.zip"
+  function_name    = "${var.project_name}-api-get-trades-${var.environment}"
+  role            = aws_iam_role.lambda_execution_role.arn
+  handler         = "api_get_trades.lambda_handler"
+  source_code_hash = fileexists("${path.module}/../lambda_packages/api_get_trades.zip") ? filebase64sha256("${path.module}/../lambda_packages/api_get_trades.zip") : null
+  runtime         = "python3.11"
+  timeout         = 30
+  memory_size     = 256
+
+  environment {
+    variables = {
+      TRADES_TABLE = aws_dynamodb_table.trades.name
+    }
+  }
+}
+
+
 resource "aws_lambda_function" "api_get_leaderboard" {
   filename         = "${path.module}/../lambda_packages/api_get_leaderboard.zip"
   function_name    = "${var.project_name}-api-get-leaderboard-${var.environment}"
@@ -463,11 +585,31 @@ resource "aws_lambda_function" "api_get_leaderboard" {
   timeout         = 30
   memory_size     = 256
 
+  environment {
+    variables = {
+      LEADERBOARD_TABLE = aws_dynamodb_table.leaderboard.name
+    }
+  }
+}
+
+
+resource "aws_lambda_function" "leaderboard_builder" {
+  filename         = "${path.module}/../lambda_packages/leaderboard_builder.zip"
+  function_name    = "${var.project_name}-leaderboard-builder-${var.environment}"
+  role            = aws_iam_role.lambda_execution_role.arn
+  handler         = "leaderboard_builder.lambda_handler"
+  source_code_hash = fileexists("${path.module}/../lambda_packages/leaderboard_builder.zip") ? filebase64sha256("${path.module}/../lambda_packages/leaderboard_builder.zip") : null
+  runtime         = "python3.11"
+  timeout         = 300
+  memory_size     = 1024
+
   environment {
     variables = {
       LEADERBOARD_TABLE  = aws_dynamodb_table.leaderboard.name
       USERS_TABLE        = aws_dynamodb_table.users.name
       MARKET_DATA_BUCKET = aws_s3_bucket.market_data.id
+      LEADERBOARD_SIZE   = "100"
+      SCAN_SEGMENTS      = "4"
     }
   }
 }
@@ -486,6 +628,9 @@ resource "aws_lambda_function" "session_checker" {
   environment {
     variables = {
       SESSIONS_TABLE = aws_dynamodb_table.sessions.name
+      # Legacy sessions without expires_bucket are migrated once with
+      # {"backfill": true}; set to "true" to also scan for them on every check
+      SESSIONS_SCAN_FALLBACK = "false"
     }
   }
 }
@@ -562,6 +707,25 @@ resource "aws_lambda_permission" "allow_eventbridge_price_collection" {
   source_arn    = aws_cloudwatch_event_rule.price_collection.arn
 }
 
+resource "aws_cloudwatch_event_rule" "leaderboard_build" {
+  name                = "${var.project_name}-leaderboard-build-${var.environment}"
+  description         = "Materialize leaderboard rankings every minute"
+  schedule_expression = var.leaderboard_build_schedule
+}
+
+resource "aws_cloudwatch_event_target" "leaderboard_build_target" {
+  rule     = aws_cloudwatch_event_rule.leaderboard_build.name
+  arn      = aws_lambda_function.leaderboard_builder.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_leaderboard_build" {
+  statement_id  = "AllowExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.leaderboard_builder.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.leaderboard_build.arn
+}
+
 resource "aws_cloudwatch_event_rule" "hourly_simulation" {
   name                = "${var.project_name}-simulation-${var.environment}"
   description         = "Trigger simulation pipeline every 10 minutes"
@@ -602,10 +766,12 @@ resource "aws_apigatewayv2_api" "trade_quest_api" {
   protocol_type = "HTTP"
 
   cors_configuration {
-    allow_origins = ["*"]
-    allow_methods = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    allow_headers = ["*"]
-    max_age       = 300
+    allow_origins  = ["*"]
+    allow_methods  = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+    allow_headers  = ["*"]
+    # Read by the frontend to key window playback on server time
+    expose_headers = ["x-server-time"]
+    max_age        = 300
   }
 }
 
@@ -712,6 +878,28 @@ resource "aws_lambda_permission" "api_get_portfolio" {
   source_arn    = "${aws_apigatewayv2_api.trade_quest_api.execution_arn}/*/*"
 }
 
+resource "aws_apigatewayv2_integration" "get_trades" {
+  api_id           = aws_apigatewayv2_api.trade_quest_api.id
+  integration_type = "AWS_PROXY"
+  integration_uri  = aws_lambda_function.api_get_trades.invoke_arn
+}
+
+resource "aws_apigatewayv2_route" "get_trades" {
+  api_id             = aws_apigatewayv2_api.trade_quest_api.id
+  route_key          = "GET /trades"
+  target             = "integrations/${aws_apigatewayv2_integration.get_trades.id}"
+  authorization_type = "JWT"
+  authorizer_id      = aws_apigatewayv2_authorizer.cognito.id
+}
+
+resource "aws_lambda_permission" "api_get_trades" {
+  statement_id  = "AllowAPIGatewayInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api_get_trades.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.trade_quest_api.execution_arn}/*/*"
+}
+
 resource "aws_apigatewayv2_integration" "get_leaderboard" {
   api_id           = aws_apigatewayv2_api.trade_quest_api.id
   integration_type = "AWS_PROXY"
@@ -733,6 +921,43 @@ resource "aws_lambda_permission" "api_get_leaderboard" {
 }
 
 
+# WEBSOCKET PRICE STREAM
+
+resource "aws_apigatewayv2_api" "price_stream" {
+  name                       = "${var.project_name}-price-stream-${var.environment}"
+  protocol_type              = "WEBSOCKET"
+  route_selection_expression = "$request.body.action"
+}
+
+resource "aws_apigatewayv2_stage" "price_stream_prod" {
+  api_id      = aws_apigatewayv2_api.price_stream.id
+  name        = "prod"
+  auto_deploy = true
+}
+
+resource "aws_apigatewayv2_integration" "price_stream" {
+  api_id           = aws_apigatewayv2_api.price_stream.id
+  integration_type = "AWS_PROXY"
+  integration_uri  = aws_lambda_function.ws_price_stream.invoke_arn
+}
+
+resource "aws_apigatewayv2_route" "price_stream" {
+  for_each = toset(["$connect", "$disconnect", "$default", "subscribe", "ping"])
+
+  api_id    = aws_apigatewayv2_api.price_stream.id
+  route_key = each.value
+  target    = "integrations/${aws_apigatewayv2_integration.price_stream.id}"
+}
+
+resource "aws_lambda_permission" "ws_price_stream" {
+  statement_id  = "AllowAPIGatewayInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.ws_price_stream.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.price_stream.execution_arn}/*/*"
+}
+
+
 # COGNITO
 
 resource "aws_cognito_user_pool" "trade_quest_pool" {
@@ -67,6 +67,11 @@ output "api_gateway_url" {
   value       = aws_apigatewayv2_stage.prod.invoke_url
 }
 
+output "price_stream_url" {
+  description = "WebSocket URL for the price stream"
+  value       = aws_apigatewayv2_stage.price_stream_prod.invoke_url
+}
+
 # Lambda Outputs
 output "finnhub_fetcher_function_name" {
   description = "Finnhub data fetcher Lambda function name"
@@ -67,3 +67,9 @@ variable "news_release_schedule" {
   type        = string
   default     = "rate(5 minutes)"
 }
+
+variable "leaderboard_build_schedule" {
+  description = "Rate expression for leaderboard materialization (default: every minute)"
+  type        = string
+  default     = "rate(1 minute)"
+}
@@ -0,0 +1,48 @@
+import os
+import sys
+
+# The Lambda zips are flat: each function's modules sit next to the shared
+# ones, so put every function directory and shared/ on the path the same way.
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAMBDAS = os.path.join(ROOT, 'lambda_functions')
+
+sys.path.insert(0, os.path.join(LAMBDAS, 'shared'))
+for name in sorted(os.listdir(LAMBDAS)):
+    if name != 'shared' and os.path.isdir(os.path.join(LAMBDAS, name)):
+        sys.path.insert(0, os.path.join(LAMBDAS, name))
+
+# Never let a test reach real AWS
+os.environ.update({
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing'
+})
+
+
+START = 1_700_000_400
+SECONDS = 600
+
+
+def make_window(start=START, symbols=('AAA', 'BBB'), num_seconds=SECONDS):
+    """Simulated window dict whose price at second i is base + i / 100."""
+    assets = {}
+    for n, symbol in enumerate(symbols):
+        base = 10.0 * (n + 1)
+        prices = [base + i / 100 for i in range(num_seconds)]
+        assets[symbol] = {
+            'seconds': [{'second': i, 'timestamp': start + i, 'price': p} for i, p in enumerate(prices)],
+            'start_price': prices[0],
+            'end_price': prices[-1],
+            'period_high': max(prices),
+            'period_low': min(prices),
+            'period_change': prices[-1] - prices[0],
+            'period_change_percent': (prices[-1] - prices[0]) / prices[0] * 100
+        }
+    return {
+        'timestamp': start,
+        'datetime': '2023-11-14T22:20:00',
+        'start_timestamp': start,
+        'end_timestamp': start + num_seconds,
+        'resolution': '1sec',
+        'assets': assets
+    }
@@ -0,0 +1,86 @@
+import json
+import types
+import aws_clients
+import boto3
+import market_data_cache
+import pytest
+import api_get_prices
+from conftest import SECONDS, START, make_window
+from moto import mock_aws
+from price_window_format import encode_price_window
+from simulation_windows import PRICE_WINDOW, window_key
+
+BUCKET = 'market-data'
+WINDOW_EVENT = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'mode': 'window'}}
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv('MARKET_DATA_BUCKET', BUCKET)
+    with mock_aws():
+        aws_clients.clear()
+        market_data_cache.clear_cache()
+        api_get_prices._window_json.clear()
+        client = boto3.client('s3')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def put_window(s3, start):
+    s3.put_object(Bucket=BUCKET, Key=window_key(start, PRICE_WINDOW), Body=encode_price_window(make_window(start=start)))
+
+
+def get_window(monkeypatch, now):
+    monkeypatch.setattr(api_get_prices, 'time', types.SimpleNamespace(time=lambda: now))
+    return api_get_prices.lambda_handler(WINDOW_EVENT, None)
+
+
+def test_window_without_next_is_cached_briefly(s3, monkeypatch):
+    put_window(s3, START)
+
+    response = get_window(monkeypatch, START + 100)
+    data = json.loads(response['body'])['data']
+
+    assert response['statusCode'] == 200
+    assert data['window']['start_timestamp'] == START
+    assert data['next_window'] is None
+    assert response['headers']['Cache-Control'] == f'public, max-age={api_get_prices.NEXT_WINDOW_RETRY_SECONDS}'
+
+
+def test_window_includes_next_once_written(s3, monkeypatch):
+    put_window(s3, START)
+    before = get_window(monkeypatch, START + 100)
+
+    put_window(s3, START + SECONDS)
+    # Past the missing-object recheck interval
+    response = get_window(monkeypatch, START + 110)
+    data = json.loads(response['body'])['data']
+
+    assert data['window']['start_timestamp'] == START
+    assert data['next_window']['start_timestamp'] == START + SECONDS
+    assert data['next_window']['symbols']['AAA']['prices'][0] == 10.0
+    assert response['headers']['ETag'] != before['headers']['ETag']
+    assert response['headers']['Cache-Control'] == f'public, max-age={SECONDS - 110}'
+
+
+def test_server_time_is_a_header_outside_the_etagged_body(s3, monkeypatch):
+    put_window(s3, START)
+    first = get_window(monkeypatch, START + 100)
+    second = get_window(monkeypatch, START + 105.5)
+
+    assert first['body'] == second['body']
+    assert first['headers']['ETag'] == second['headers']['ETag']
+    assert 'server_time' not in json.loads(first['body'])['data']
+    assert float(second['headers']['X-Server-Time']) == START + 105.5
+    assert second['headers']['Access-Control-Expose-Headers'] == 'X-Server-Time'
+
+
+def test_revalidation_carries_fresh_server_time(s3, monkeypatch):
+    put_window(s3, START)
+    etag = get_window(monkeypatch, START + 100)['headers']['ETag']
+
+    monkeypatch.setattr(api_get_prices, 'time', types.SimpleNamespace(time=lambda: START + 120))
+    response = api_get_prices.lambda_handler(dict(WINDOW_EVENT, headers={'If-None-Match': etag}), None)
+
+    assert response['statusCode'] == 304
+    assert float(response['headers']['X-Server-Time']) == START + 120
@@ -0,0 +1,43 @@
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_counters_from_worker_threads_are_not_lost():
+    sink = metrics.MemorySink()
+    metrics.set_sink(sink)
+
+    @metrics.instrument('threads')
+    def handler(event, context):
+        def work(_):
+            for _ in range(2000):
+                metrics.count('s3.GetObject.calls')
+                metrics.count('s3.bytes_read', 10, 'Bytes')
+                metrics.current().add_time('s3.GetObject', 0.5)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(work, range(16)))
+        return {'statusCode': 200}
+
+    try:
+        handler({}, None)
+    finally:
+        metrics.set_sink(metrics.stdout_sink)
+
+    record = sink.records[-1]
+    assert record['s3.GetObject.calls'] == 16 * 2000
+    assert record['s3.bytes_read'] == 16 * 2000 * 10
+    assert record['s3.GetObject'] == 16 * 2000 * 0.5
+    assert record['errors'] == 0
+
+
+def test_record_lists_every_metric_with_its_unit():
+    collector = metrics.Metrics('unit')
+    collector.add_time('parse', 1.23456)
+    collector.count('s3.bytes_read', 100, 'Bytes')
+
+    record = collector.record('cold')
+    assert record['parse'] == 1.235
+    assert record['_aws']['CloudWatchMetrics'][0]['Metrics'] == [
+        {'Name': 'parse', 'Unit': 'Milliseconds'},
+        {'Name': 's3.bytes_read', 'Unit': 'Bytes'}
+    ]
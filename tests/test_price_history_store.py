@@ -0,0 +1,77 @@
+import json
+import types
+import aws_clients
+import boto3
+import price_history_store
+import price_simulator
+import pytest
+from moto import mock_aws
+from simulation_windows import MANIFEST_KEY
+
+BUCKET = 'market-data'
+NOW = 1_700_000_000 // 60 * 60 + 30
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv('MARKET_DATA_BUCKET', BUCKET)
+    with mock_aws():
+        aws_clients.clear()
+        client = boto3.client('s3')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def data_point(timestamp, price):
+    return {'timestamp': timestamp, 'datetime': '', 'price': price}
+
+
+def put_legacy(s3, minutes, now=NOW):
+    history = {'assets': {
+        symbol: {'symbol': symbol, 'data_points': [
+            data_point(now - (minutes - 1 - i) * 60, base + i / 1000) for i in range(minutes)
+        ]}
+        for symbol, base in (('EURUSD=X', 1.1), ('USDJPY=X', 150.0))
+    }}
+    s3.put_object(Bucket=BUCKET, Key=price_history_store.LEGACY_HISTORY_KEY, Body=json.dumps(history))
+
+
+def test_seed_from_legacy_fills_missing_minutes(s3):
+    put_legacy(s3, 70)
+    # One minute already collected since the deploy
+    price_history_store.write_minute_shard(s3, BUCKET, NOW - 60, '', {'EURUSD=X': data_point(NOW - 60, 9.9)})
+
+    assert price_history_store.seed_from_legacy(s3, BUCKET, now=NOW) == 59
+    history = price_history_store.load_history(s3, BUCKET, now=NOW)
+
+    eurusd = history['assets']['EURUSD=X']['data_points']
+    assert len(eurusd) == 60
+    assert eurusd[-2]['price'] == 9.9
+    # The collected shard for that minute wins, and it has no USDJPY=X
+    assert len(history['assets']['USDJPY=X']['data_points']) == 59
+
+    # Nothing left to seed
+    assert price_history_store.seed_from_legacy(s3, BUCKET, now=NOW) == 0
+
+
+def test_seed_without_legacy_document(s3):
+    assert price_history_store.seed_from_legacy(s3, BUCKET, now=NOW) == 0
+
+
+def test_simulator_seeds_from_legacy_history(s3, monkeypatch):
+    put_legacy(s3, 60, now=NOW)
+    monkeypatch.setattr(price_simulator, 'time', types.SimpleNamespace(time=lambda: NOW))
+
+    body = json.loads(price_simulator.lambda_handler({}, None)['body'])
+
+    assert len(body['windows_generated']) == 2
+    assert body['assets_simulated'] == 2
+
+
+def test_simulator_skips_windows_without_history(s3, monkeypatch):
+    monkeypatch.setattr(price_simulator, 'time', types.SimpleNamespace(time=lambda: NOW))
+
+    body = json.loads(price_simulator.lambda_handler({}, None)['body'])
+
+    assert body['windows_generated'] == []
+    assert s3.list_objects_v2(Bucket=BUCKET, Prefix=MANIFEST_KEY).get('KeyCount') == 0
@@ -0,0 +1,88 @@
+import pytest
+from conftest import SECONDS, START, make_window
+from price_lookup import PriceLookup, lookup_for, second_at
+from price_snapshots import PriceSnapshots, encode_price_snapshots
+from price_window_format import PriceWindow, encode_price_window
+
+
+@pytest.fixture
+def window():
+    return PriceWindow(encode_price_window(make_window()))
+
+
+def test_second_at_inside_window(window):
+    assert second_at(window, START) == 0
+    assert second_at(window, START + 123) == 123
+    assert second_at(window, START + 123.9) == 123
+
+
+def test_second_at_clamps_before_start(window):
+    assert second_at(window, START - 1) == 0
+    assert second_at(window, 0) == 0
+
+
+def test_second_at_clamps_at_and_after_end(window):
+    assert second_at(window, START + SECONDS - 1) == SECONDS - 1
+    assert second_at(window, START + SECONDS) == SECONDS - 1
+    assert second_at(window, START + 10 * SECONDS) == SECONDS - 1
+
+
+def test_second_at_accepts_snapshots():
+    snapshots = PriceSnapshots(encode_price_snapshots(PriceWindow(encode_price_window(make_window()))))
+    assert second_at(snapshots, START - 5) == 0
+    assert second_at(snapshots, START + 42) == 42
+    assert second_at(snapshots, START + SECONDS + 5) == SECONDS - 1
+
+
+def test_price_matches_window_column(window):
+    lookup = PriceLookup(window)
+    assert lookup.price('AAA', START + 100) == window.price_at('AAA', 100)
+    assert lookup.price('BBB', START - 50) == window.price_at('BBB', 0)
+    assert lookup.price('BBB', START + SECONDS + 50) == window.price_at('BBB', SECONDS - 1)
+
+
+def test_prices_defaults_to_every_symbol(window):
+    prices = PriceLookup(window).prices(timestamp=START + 7)
+    assert prices == {'AAA': window.price_at('AAA', 7), 'BBB': window.price_at('BBB', 7)}
+
+
+def test_prices_for_requested_symbols(window):
+    assert PriceLookup(window).prices(['BBB'], START + 7) == {'BBB': window.price_at('BBB', 7)}
+    assert PriceLookup(window).prices([], START + 7) == {}
+
+
+def test_prices_raises_for_missing_symbol(window):
+    lookup = PriceLookup(window)
+    with pytest.raises(KeyError):
+        lookup.prices(['AAA', 'NOPE'], START)
+    with pytest.raises(KeyError):
+        lookup.price('NOPE', START)
+
+
+def test_symbol_without_prices_is_not_priced():
+    simulated = make_window()
+    simulated['assets']['CCC'] = None
+    window = PriceWindow(encode_price_window(simulated))
+
+    assert window.missing == ['CCC']
+    with pytest.raises(KeyError):
+        PriceLookup(window).prices(['CCC'], START)
+
+
+def test_lookup_for_reuses_lookup_for_same_window(window):
+    assert lookup_for(window) is lookup_for(window)
+
+
+def test_lookup_for_rebuilds_for_new_window(window):
+    first = lookup_for(window)
+    next_window = PriceWindow(encode_price_window(make_window(start=START + SECONDS)))
+
+    second = lookup_for(next_window)
+    assert second is not first
+    assert second.window is next_window
+    assert second.price('AAA', START + SECONDS) == next_window.price_at('AAA', 0)
+
+    # Going back to the old window builds a fresh lookup rather than serving a stale one
+    again = lookup_for(window)
+    assert again.window is window
+    assert again is not first
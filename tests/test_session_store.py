@@ -0,0 +1,117 @@
+import json
+import types
+import aws_clients
+import boto3
+import pytest
+import session_checker
+import session_store
+from moto import mock_aws
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def sessions_table(monkeypatch):
+    monkeypatch.setenv('SESSIONS_TABLE', 'sessions')
+    with mock_aws():
+        aws_clients.clear()
+        dynamodb = boto3.resource('dynamodb')
+        yield dynamodb.create_table(
+            TableName='sessions',
+            KeySchema=[{'AttributeName': 'session_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'session_id', 'AttributeType': 'S'},
+                {'AttributeName': 'expires_bucket', 'AttributeType': 'N'},
+                {'AttributeName': 'expires_at', 'AttributeType': 'N'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': session_store.EXPIRES_INDEX,
+                'KeySchema': [
+                    {'AttributeName': 'expires_bucket', 'KeyType': 'HASH'},
+                    {'AttributeName': 'expires_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'KEYS_ONLY'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+
+
+def legacy_item(session_id, expires_at):
+    return {'session_id': session_id, 'user_id': 'alice', 'expires_at': expires_at}
+
+
+def test_indexed_sessions(sessions_table):
+    sessions_table.put_item(Item=session_store.session_item('live', 'alice', NOW + 600, now=NOW))
+    sessions_table.put_item(Item=session_store.session_item('expired', 'bob', NOW - 600, now=NOW - 3600))
+
+    assert session_store.any_active(sessions_table, NOW)
+    assert session_store.count_active(sessions_table, NOW) == 1
+    assert not session_store.any_active(sessions_table, NOW + 601)
+
+
+def test_legacy_sessions_found_by_scan_fallback(sessions_table):
+    sessions_table.put_item(Item=legacy_item('legacy', NOW + 600))
+    sessions_table.put_item(Item=legacy_item('legacy-expired', NOW - 600))
+
+    assert not session_store.any_active(sessions_table, NOW)
+    assert session_store.any_active(sessions_table, NOW, scan_fallback=True)
+
+
+def test_scan_fallback_backfills_bucket(sessions_table):
+    sessions_table.put_item(Item=legacy_item('legacy', NOW + 600))
+    sessions_table.put_item(Item=legacy_item('legacy-expired', NOW - 600))
+    sessions_table.put_item(Item=session_store.session_item('indexed', 'bob', NOW + 900, now=NOW))
+
+    assert session_store.count_active(sessions_table, NOW, scan_fallback=True) == 2
+
+    item = sessions_table.get_item(Key={'session_id': 'legacy'})['Item']
+    assert item['expires_bucket'] == session_store.expires_bucket(NOW + 600)
+    assert 'expires_bucket' not in sessions_table.get_item(Key={'session_id': 'legacy-expired'})['Item']
+    # Now in the index, and not counted twice
+    assert session_store.count_active(sessions_table, NOW) == 2
+    assert session_store.count_active(sessions_table, NOW, scan_fallback=True) == 2
+
+
+def test_scan_fallback_follows_pages(sessions_table, monkeypatch):
+    monkeypatch.setattr(session_store, 'SCAN_PAGE_SIZE', 3)
+    for n in range(10):
+        sessions_table.put_item(Item=legacy_item(f'expired-{n}', NOW - n - 1))
+    sessions_table.put_item(Item=legacy_item('legacy', NOW + 60))
+
+    assert session_store.any_active(sessions_table, NOW, scan_fallback=True)
+    assert session_store.count_active(sessions_table, NOW, scan_fallback=True) == 1
+
+
+def test_session_item_rejects_sessions_beyond_the_index_horizon():
+    item = session_store.session_item('s', 'alice', NOW + session_store.MAX_SESSION_SECONDS, now=NOW, ip='1.2.3.4')
+    assert item['expires_bucket'] == session_store.expires_bucket(NOW + session_store.MAX_SESSION_SECONDS)
+    assert item['ip'] == '1.2.3.4'
+
+    with pytest.raises(ValueError):
+        session_store.session_item('s', 'alice', NOW + session_store.MAX_SESSION_SECONDS + 1, now=NOW)
+
+
+def check_sessions(monkeypatch, event):
+    monkeypatch.setattr(session_checker, 'time', types.SimpleNamespace(time=lambda: NOW))
+    return json.loads(session_checker.lambda_handler(event, None)['body'])
+
+
+def test_backfill_moves_legacy_sessions_into_the_index(sessions_table, monkeypatch):
+    sessions_table.put_item(Item=legacy_item('legacy', NOW + 600))
+    sessions_table.put_item(Item=legacy_item('legacy-expired', NOW - 600))
+
+    assert check_sessions(monkeypatch, {})['any_active'] is False
+    assert check_sessions(monkeypatch, {'backfill': True}) == {'backfilled': 1}
+
+    body = check_sessions(monkeypatch, {})
+    assert body['any_active'] is True
+    assert body['active_sessions'] == 1
+    assert check_sessions(monkeypatch, {'backfill': True}) == {'backfilled': 0}
+
+
+def test_checker_counts_only_when_asked(sessions_table, monkeypatch):
+    for n in range(3):
+        sessions_table.put_item(Item=session_store.session_item(f's{n}', 'alice', NOW + 60 * (n + 1), now=NOW))
+
+    assert check_sessions(monkeypatch, {})['active_sessions'] == 1
+    assert check_sessions(monkeypatch, {'count': True})['active_sessions'] == 3
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from simulation_engine import simulate_second_prices
+
+SECONDS = 600
+
+
+def simulate(start_prices, anchor_prices=None, trends=(0.02, -0.02), seed=1):
+    return simulate_second_prices(
+        start_prices=start_prices,
+        mean_returns=[0.0, 0.0],
+        volatilities=[0.4, 0.4],
+        trends=list(trends),
+        seeds=[seed, seed + 1],
+        num_seconds=SECONDS,
+        anchor_prices=anchor_prices
+    )
+
+
+def test_anchor_equal_to_start_changes_nothing():
+    start = [150.0, 1.1]
+    np.testing.assert_allclose(simulate(start, anchor_prices=start), simulate(start))
+
+
+def test_reanchored_window_continues_from_start_price():
+    start = [160.0, 1.2]
+    plain = simulate(start)
+    reanchored = simulate(start, anchor_prices=[150.0, 1.1])
+
+    # The first second moves from the previous window's end exactly as an unanchored window would
+    np.testing.assert_allclose(reanchored[:, 0], plain[:, 0])
+    # ...and the last second is where a window simulated from the collected price ends
+    np.testing.assert_allclose(reanchored[:, -1], simulate([150.0, 1.1])[:, -1])
+
+
+def test_chained_windows_do_not_compound_the_trend():
+    anchor = [150.0, 1.1]
+    start = anchor
+    for window in range(50):
+        prices = simulate(start, anchor_prices=anchor, seed=window)
+        start = prices[:, -1].tolist()
+
+    # Each window ends within one window's trend and noise of the collected
+    # price; compounding 50 windows of a 2% trend would be e^1 away
+    assert 0.8 < start[0] / 150.0 < 1.25
+    assert 0.8 < start[1] / 1.1 < 1.25
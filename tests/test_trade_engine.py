@@ -0,0 +1,200 @@
+import aws_clients
+import boto3
+import json
+import pytest
+import api_execute_trade
+import trade_engine
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from moto import mock_aws
+
+USERS = 'users'
+TRADES = 'trades'
+
+
+@pytest.fixture
+def dynamodb():
+    with mock_aws():
+        aws_clients.clear()
+        resource = boto3.resource('dynamodb')
+        resource.create_table(
+            TableName=USERS,
+            KeySchema=[{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'user_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        resource.create_table(
+            TableName=TRADES,
+            KeySchema=[
+                {'AttributeName': 'trade_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'trade_id', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'N'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield resource
+
+
+def user(dynamodb, user_id='alice'):
+    return dynamodb.Table(USERS).get_item(Key={'user_id': user_id})['Item']
+
+
+class ConflictingClient:
+    """
+    The real DynamoDB client, except that the first `conflicts` transactions
+    are cancelled as a concurrent write to the account would cancel them,
+    after running `concurrent_write` in place of that write.
+    """
+
+    def __init__(self, conflicts, concurrent_write=None):
+        self.client = boto3.client('dynamodb')
+        self.conflicts = conflicts
+        self.concurrent_write = concurrent_write
+        self.reads = 0
+        self.transactions = 0
+
+    def get_item(self, **kwargs):
+        self.reads += 1
+        return self.client.get_item(**kwargs)
+
+    def transact_write_items(self, **kwargs):
+        self.transactions += 1
+        if self.transactions <= self.conflicts:
+            if self.concurrent_write:
+                self.concurrent_write()
+            raise ClientError({
+                'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+                'CancellationReasons': [{'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]
+            }, 'TransactWriteItems')
+        return self.client.transact_write_items(**kwargs)
+
+
+def buy(quantity=10, price='1.5', symbol='EURUSD=X'):
+    return trade_engine.execute_trade(USERS, TRADES, 'alice', symbol, 'buy', quantity, Decimal(price))
+
+
+def test_new_user_is_created(dynamodb):
+    record, balance = buy()
+
+    assert balance == Decimal('99985')
+    item = user(dynamodb)
+    assert item['portfolio'] == {'EURUSD=X': {'quantity': 10, 'avg_price': Decimal('1.5')}}
+    assert item['total_trades'] == 1
+    assert record['sequence'] == 1
+
+
+def test_existing_user_updates_only_traded_symbols(dynamodb):
+    dynamodb.Table(USERS).put_item(Item={
+        'user_id': 'alice', 'balance': Decimal('1000'), 'total_trades': 4,
+        'portfolio': {'GBPUSD=X': {'quantity': 3, 'avg_price': Decimal('1.2')}}
+    })
+
+    records, balance = trade_engine.execute_orders(USERS, TRADES, 'alice', [
+        ('EURUSD=X', 'buy', 10),
+        ('GBPUSD=X', 'sell', 3)
+    ], {'EURUSD=X': Decimal('1.5'), 'GBPUSD=X': Decimal('1.3')})
+
+    assert balance == Decimal('988.9')
+    assert [r['sequence'] for r in records] == [5, 6]
+    item = user(dynamodb)
+    assert item['portfolio'] == {'EURUSD=X': {'quantity': 10, 'avg_price': Decimal('1.5')}}
+    assert item['total_trades'] == 6
+
+
+def test_existing_user_without_portfolio(dynamodb):
+    dynamodb.Table(USERS).put_item(Item={'user_id': 'alice', 'username': 'alice', 'balance': Decimal('1000')})
+
+    _, balance = buy()
+
+    assert balance == Decimal('985')
+    item = user(dynamodb)
+    assert item['portfolio'] == {'EURUSD=X': {'quantity': 10, 'avg_price': Decimal('1.5')}}
+    assert item['balance'] == Decimal('985')
+    assert item['username'] == 'alice'
+
+
+def test_existing_user_without_balance(dynamodb):
+    dynamodb.Table(USERS).put_item(Item={'user_id': 'alice', 'portfolio': {}})
+
+    _, balance = buy()
+
+    assert balance == trade_engine.INITIAL_BALANCE - Decimal('15')
+    assert user(dynamodb)['balance'] == balance
+
+
+def test_existing_user_with_neither(dynamodb):
+    dynamodb.Table(USERS).put_item(Item={'user_id': 'alice', 'username': 'alice'})
+
+    buy()
+    _, balance = buy(quantity=5, price='2', symbol='GBPUSD=X')
+
+    assert balance == trade_engine.INITIAL_BALANCE - Decimal('25')
+    item = user(dynamodb)
+    assert set(item['portfolio']) == {'EURUSD=X', 'GBPUSD=X'}
+    assert item['total_trades'] == 2
+
+
+def test_rejected_trade_writes_nothing(dynamodb):
+    dynamodb.Table(USERS).put_item(Item={'user_id': 'alice', 'balance': Decimal('10'), 'portfolio': {}})
+
+    with pytest.raises(trade_engine.TradeRejected):
+        buy()
+
+    assert user(dynamodb)['balance'] == Decimal('10')
+    assert dynamodb.Table(TRADES).scan()['Count'] == 0
+
+
+def test_conflict_is_retried_against_the_reread_account(dynamodb, monkeypatch):
+    users = dynamodb.Table(USERS)
+    users.put_item(Item={'user_id': 'alice', 'balance': Decimal('1000'), 'total_trades': 0, 'portfolio': {}})
+
+    def concurrent_trade():
+        users.update_item(
+            Key={'user_id': 'alice'},
+            UpdateExpression='SET balance = :balance, total_trades = :trades',
+            ExpressionAttributeValues={':balance': Decimal('900'), ':trades': 1}
+        )
+
+    client = ConflictingClient(conflicts=1, concurrent_write=concurrent_trade)
+    monkeypatch.setattr(trade_engine, 'dynamodb_client', client)
+
+    record, balance = buy()
+
+    assert client.reads == 2
+    assert client.transactions == 2
+    assert balance == Decimal('885')
+    assert record['sequence'] == 2
+    item = user(dynamodb)
+    assert item['balance'] == Decimal('885')
+    assert item['total_trades'] == 2
+    assert dynamodb.Table(TRADES).scan()['Count'] == 1
+
+
+def test_persistent_conflict_gives_up(dynamodb, monkeypatch):
+    dynamodb.Table(USERS).put_item(Item={'user_id': 'alice', 'balance': Decimal('1000'), 'portfolio': {}})
+    client = ConflictingClient(conflicts=trade_engine.MAX_ATTEMPTS)
+    monkeypatch.setattr(trade_engine, 'dynamodb_client', client)
+
+    with pytest.raises(trade_engine.TradeConflict):
+        buy()
+
+    assert client.transactions == trade_engine.MAX_ATTEMPTS
+    assert user(dynamodb)['balance'] == Decimal('1000')
+    assert dynamodb.Table(TRADES).scan()['Count'] == 0
+
+
+def test_persistent_conflict_is_a_409(dynamodb, monkeypatch):
+    monkeypatch.setenv('USERS_TABLE', USERS)
+    monkeypatch.setenv('TRADES_TABLE', TRADES)
+    monkeypatch.setenv('MARKET_DATA_BUCKET', 'market-data')
+    monkeypatch.setattr(api_execute_trade, 'current_prices', lambda bucket, symbols: {s: Decimal('1.5') for s in symbols})
+    monkeypatch.setattr(trade_engine, 'dynamodb_client', ConflictingClient(conflicts=trade_engine.MAX_ATTEMPTS))
+
+    body = {'user_id': 'alice', 'symbol': 'EURUSD=X', 'action': 'buy', 'quantity': 10}
+    response = api_execute_trade.lambda_handler({'headers': {}, 'body': json.dumps(body)}, None)
+
+    assert response['statusCode'] == 409
+    assert 'changed during the trade' in json.loads(response['body'])['message']
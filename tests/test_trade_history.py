@@ -0,0 +1,143 @@
+import boto3
+import pytest
+from decimal import Decimal
+from moto import mock_aws
+from trade_history import InvalidCursor, decode_cursor, encode_cursor, iter_trades, query_page, summarize
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def trades_table():
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb')
+        table = dynamodb.create_table(
+            TableName='trades',
+            KeySchema=[
+                {'AttributeName': 'trade_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'trade_id', 'AttributeType': 'S'},
+                {'AttributeName': 'timestamp', 'AttributeType': 'N'},
+                {'AttributeName': 'user_id', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'UserIdIndex',
+                'KeySchema': [
+                    {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield table
+
+
+def trade(number, symbol, action, quantity, price, user_id='alice', timestamp=None):
+    return {
+        'trade_id': f'{user_id}-{number:04d}',
+        'user_id': user_id,
+        'timestamp': START + number if timestamp is None else timestamp,
+        'sequence': number,
+        'symbol': symbol,
+        'action': action,
+        'quantity': quantity,
+        'price': Decimal(price),
+        'total_value': Decimal(price) * quantity
+    }
+
+
+def put_trades(table, trades):
+    with table.batch_writer() as batch:
+        for item in trades:
+            batch.put_item(Item=item)
+
+
+def test_query_page_follows_symbol_filter_across_pages(trades_table):
+    # Every third trade is AAA, so each page of 5 matches reads well past 5 items
+    put_trades(trades_table, [trade(n, 'AAA' if n % 3 == 0 else 'BBB', 'buy', 1, '10') for n in range(30)])
+    put_trades(trades_table, [trade(n, 'AAA', 'buy', 1, '10', user_id='bob') for n in range(30)])
+
+    seen = []
+    cursor = None
+    while True:
+        trades, cursor = query_page(trades_table, 'alice', symbol='AAA', limit=4, cursor=cursor)
+        assert len(trades) <= 4
+        assert all(t['symbol'] == 'AAA' for t in trades)
+        seen.extend(t['trade_id'] for t in trades)
+        if cursor is None:
+            break
+
+    assert seen == [f'alice-{n:04d}' for n in range(27, -1, -3)]
+
+
+def test_query_page_time_range(trades_table):
+    put_trades(trades_table, [trade(n, 'AAA', 'buy', 1, '10') for n in range(10)])
+
+    trades, cursor = query_page(trades_table, 'alice', start=START + 2, end=START + 5)
+    assert [t['timestamp'] for t in trades] == [START + 5, START + 4, START + 3, START + 2]
+    assert cursor is None
+
+
+def test_decode_cursor_round_trips():
+    key = {'user_id': 'alice', 'timestamp': Decimal(START), 'trade_id': 'alice-0001'}
+    assert decode_cursor(encode_cursor(key), 'alice') == {'user_id': 'alice', 'timestamp': START, 'trade_id': 'alice-0001'}
+
+
+def test_decode_cursor_rejects_other_users_cursor(trades_table):
+    put_trades(trades_table, [trade(n, 'AAA', 'buy', 1, '10', user_id='bob') for n in range(5)])
+    _, cursor = query_page(trades_table, 'bob', limit=2)
+    assert cursor is not None
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, 'alice')
+    with pytest.raises(InvalidCursor):
+        query_page(trades_table, 'alice', cursor=cursor)
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not a cursor!', 'alice')
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor({'user_id': 'alice'}), 'alice')
+
+
+def test_summarize_realized_profit_loss_and_vwap(trades_table):
+    put_trades(trades_table, [
+        trade(1, 'AAA', 'buy', 10, '100'),
+        trade(2, 'AAA', 'buy', 10, '110'),
+        trade(3, 'AAA', 'sell', 5, '120'),
+        trade(4, 'BBB', 'buy', 4, '50'),
+        trade(5, 'AAA', 'sell', 5, '90')
+    ])
+
+    summary = summarize(iter_trades(trades_table, 'alice'))
+
+    aaa = summary['AAA']
+    assert (aaa['trades'], aaa['buys'], aaa['sells']) == (4, 2, 2)
+    assert aaa['buy_vwap'] == Decimal('105')
+    assert aaa['sell_vwap'] == Decimal('105')
+    # Average cost 105: +15 on each of the first 5 sold, -15 on the next 5
+    assert aaa['realized_profit_loss'] == Decimal('0')
+    assert aaa['open_quantity'] == Decimal('10')
+    assert (aaa['first_timestamp'], aaa['last_timestamp']) == (START + 1, START + 5)
+
+    bbb = summary['BBB']
+    assert bbb['buy_vwap'] == Decimal('50')
+    assert bbb['sell_vwap'] is None
+    assert bbb['realized_profit_loss'] == Decimal('0')
+
+
+def test_summarize_orders_same_second_trades_by_sequence():
+    # A batch order: buy then sell in the same second, returned sell first
+    batch = [
+        trade(2, 'AAA', 'sell', 10, '120', timestamp=START),
+        trade(1, 'AAA', 'buy', 10, '100', timestamp=START),
+        trade(3, 'AAA', 'buy', 1, '130', timestamp=START + 1)
+    ]
+
+    aaa = summarize(batch)['AAA']
+    assert aaa['realized_profit_loss'] == Decimal('200')
+    assert aaa['open_quantity'] == Decimal('1')
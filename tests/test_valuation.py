@@ -0,0 +1,36 @@
+import pytest
+from decimal import Decimal
+from valuation import batch_portfolio_values, batch_position_values, value_portfolio
+
+PRICES = {'EURUSD=X': 1.25, 'GBPUSD=X': 1.5}
+PORTFOLIOS = [
+    {'EURUSD=X': {'quantity': Decimal(10), 'avg_price': Decimal('1.2')}},
+    {},
+    {
+        'GBPUSD=X': {'quantity': Decimal(4), 'avg_price': Decimal('2')},
+        'DELISTED': {'quantity': Decimal(7), 'avg_price': Decimal('3')},
+        'EURUSD=X': {'quantity': Decimal(2), 'avg_price': Decimal('0')}
+    }
+]
+
+
+def test_batch_positions_match_exact_valuation():
+    batch = batch_position_values(PORTFOLIOS, PRICES)
+    exact = [
+        dict(position, owner=owner)
+        for owner, portfolio in enumerate(PORTFOLIOS)
+        for position in value_portfolio(portfolio, PRICES)[0]
+    ]
+
+    assert batch['owner'].tolist() == [0, 2, 2]
+    assert [list(PRICES)[i] for i in batch['symbol']] == [p['symbol'] for p in exact]
+    for key in ('market_value', 'cost_basis', 'profit_loss', 'profit_loss_percent'):
+        assert batch[key].tolist() == pytest.approx([float(p[key]) for p in exact])
+
+
+def test_batch_totals():
+    market_values, cost_bases = batch_portfolio_values(PORTFOLIOS, PRICES)
+
+    assert market_values.tolist() == pytest.approx([12.5, 0, 8.5])
+    assert cost_bases.tolist() == pytest.approx([12, 0, 8])
+    assert batch_portfolio_values([], PRICES)[0].tolist() == []
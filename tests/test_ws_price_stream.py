@@ -0,0 +1,72 @@
+import json
+import types
+import aws_clients
+import boto3
+import market_data_cache
+import pytest
+import ws_price_stream
+from conftest import START, make_window
+from moto import mock_aws
+from price_window_format import encode_price_window
+from simulation_windows import PRICE_WINDOW, window_key
+
+BUCKET = 'market-data'
+
+
+class Gone(Exception):
+    pass
+
+
+class FakeManagementClient:
+    class exceptions:
+        GoneException = Gone
+
+    def __init__(self):
+        self.sent = []
+
+    def post_to_connection(self, ConnectionId, Data):
+        self.sent.append(json.loads(Data))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('MARKET_DATA_BUCKET', BUCKET)
+    fake = FakeManagementClient()
+    monkeypatch.setattr(ws_price_stream, 'management_client', lambda event: fake)
+    with mock_aws():
+        aws_clients.clear()
+        market_data_cache.clear_cache()
+        s3 = boto3.client('s3')
+        s3.create_bucket(Bucket=BUCKET)
+        s3.put_object(Bucket=BUCKET, Key=window_key(START, PRICE_WINDOW), Body=encode_price_window(make_window()))
+        monkeypatch.setattr(market_data_cache, 'time', types.SimpleNamespace(time=lambda: START + 10))
+        yield fake
+
+
+def message(route_key, body):
+    return {
+        'requestContext': {'routeKey': route_key, 'connectionId': 'c1', 'domainName': 'localhost', 'stage': 'local'},
+        'body': body
+    }
+
+
+def test_ping(client):
+    assert ws_price_stream.lambda_handler(message('ping', '{"action": "ping"}'), None) == {'statusCode': 200}
+    assert client.sent == [{'type': 'pong'}]
+
+
+def test_subscribe_sends_window(client):
+    assert ws_price_stream.lambda_handler(message('subscribe', '{"action": "subscribe"}'), None) == {'statusCode': 200}
+    assert [m['type'] for m in client.sent] == ['window']
+    assert client.sent[0]['window']['start_timestamp'] == START
+
+
+@pytest.mark.parametrize('body', ['not json', '[]', '"x"', '42', 'null'])
+def test_non_object_body_is_treated_as_default_subscribe(client, body):
+    assert ws_price_stream.lambda_handler(message('$default', body), None) == {'statusCode': 200}
+    assert [m['type'] for m in client.sent] == ['window']
+
+
+def test_unknown_action(client):
+    assert ws_price_stream.lambda_handler(message('$default', '{"action": "nope"}'), None) == {'statusCode': 400}
+    assert client.sent == [{'type': 'error', 'message': 'Unknown action nope'}]